@@ -0,0 +1,73 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+
+from backend.api import deps
+from backend.api.api_v1.endpoints.login import get_optional_current_user
+from backend.core.config import settings
+from backend.core.routing import upstream_router
+from backend.core.upstream import UpstreamError
+from backend.core.usage import current_usage
+from backend.db.write_behind import answer_history_buffer
+from backend.models.user import User
+from backend.schemas.answer import AnswerQuery, AnswerResponse
+
+# روتر درگاه مدل‌های هوش مصنوعی (منتقل‌شده از viraai.io-ai-project/app.py)
+router = APIRouter()
+
+
+# ------------------- مسیر برای تولید پاسخ با مدل هوش مصنوعی -------------------
+@router.post(
+    "/answer", response_model=AnswerResponse, dependencies=[Depends(deps.shed_under_memory_pressure)]
+)
+async def get_answer(
+    query: AnswerQuery,
+    request: Request,
+    user: Optional[User] = Depends(get_optional_current_user),
+) -> Any:
+    """
+    ارسال سؤال به بهترین ارائه‌دهنده مدل تولید متن (طبق سیاست مسیریابی این مسیر،
+    با Failover به ارائه‌دهنده‌های دیگر) و برگرداندن پاسخ آن.
+    خطای آخرین ارائه‌دهنده با کد 502 (یا 504 برای Timeout) برگردانده می‌شود.
+    هر فراخوانی (موفق یا ناموفق) بدون انتظار برای دیتابیس در سابقه پاسخ‌ها ثبت می‌شود؛
+    احراز هویت اختیاری است و در صورت وجود، سابقه و مصرف به نام کاربر ثبت می‌شوند.
+    """
+    started = time.perf_counter()
+    answer: Optional[str] = None
+    status = "ok"
+    provider = model = "unknown"
+    try:
+        client, answer = await upstream_router.generate(query.question, route=request.scope["route"].path)
+        provider, model = client.name, client.model
+    except UpstreamError as exc:
+        status = exc.reason
+        provider, model = exc.provider, upstream_router.model_of(exc.provider)
+        raise HTTPException(status_code=exc.status_code, detail=exc.detail)
+    except asyncio.CancelledError:
+        status = "cancelled"
+        raise
+    finally:
+        latency_ms = round((time.perf_counter() - started) * 1000)
+        # مصرف این درخواست به نام مدل (به جای مسیر) شمرده می‌شود
+        usage = current_usage.get()
+        if usage is not None:
+            usage.model = model
+            usage.prompt_chars = len(query.question)
+            usage.completion_chars = len(answer) if answer else 0
+            usage.upstream_ms = latency_ms
+            usage.failed = status != "ok"
+        if settings.ANSWER_HISTORY_ENABLED:
+            answer_history_buffer.add(
+                user_id=user.id if user is not None else None,
+                provider=provider,
+                model=model,
+                prompt=query.question,
+                answer=answer,
+                status=status,
+                latency_ms=latency_ms,
+                created_at=datetime.now(),
+            )
+    return {"answer": answer}
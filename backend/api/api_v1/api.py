@@ -1,7 +1,7 @@
 from fastapi import APIRouter
 
 # وارد کردن روترهای کاربران و آیتم‌ها که قبلاً تعریف کرده‌ایم
-from backend.api.api_v1.endpoints import users, items
+from backend.api.api_v1.endpoints import users, items, admin
 
 # ایجاد روتر اصلی API نسخه 1
 api_router = APIRouter()
@@ -16,6 +16,9 @@ api_router.include_router(users.router, prefix="/users", tags=["users"])
 # تگ "items" در مستندات Swagger/OpenAPI استفاده می‌شود.
 api_router.include_router(items.router, prefix="/items", tags=["items"])
 
+# اتصال روتر مدیریتی (مانیتورینگ و آمار داخلی) به مسیر اصلی "/admin"
+api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
+
 # در آینده، روترهای اضافی مانند Auth، Health Check و... می‌توانند به همین ترتیب اضافه شوند.
 
 # مثال:
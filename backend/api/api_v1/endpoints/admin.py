@@ -0,0 +1,199 @@
+import time
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.api import deps
+from backend.api.compression import compression_metrics
+from backend.api.profiling import clear_profiles, merge_profiles, profiler, write_profile
+from backend.api.api_v1.endpoints.login import get_current_active_superuser
+from backend.core import auth_cache
+from backend.core.config import settings
+from backend.core.embeddings import item_embedding_queue, item_vector_index
+from backend.core.memory import memory_profiler, memory_watchdog
+from backend.core.routing import upstream_router
+from backend.core.security import password_hasher
+from backend.crud.item_stats import owner_item_stats as crud_item_stats
+from backend.db.instrumentation import statement_stats
+from backend.db.session import get_engine
+from backend.db.write_behind import answer_history_buffer
+
+# روتر مسیرهای مدیریتی و مانیتورینگ (فقط برای مدیر ارشد)
+router = APIRouter(dependencies=[Depends(get_current_active_superuser)])
+
+
+# ------------------- مسیر برای مشاهده آمار استخر اتصال -------------------
+@router.get("/pool")
+async def read_pool_stats() -> Any:
+    """
+    وضعیت لحظه‌ای استخر اتصال دیتابیس: تعداد اتصال‌های در حال استفاده/بیکار/Overflow،
+    هیستوگرام زمان انتظار Checkout و سن اتصال‌ها.
+    """
+    pool = get_engine().pool
+    return pool.metrics.snapshot(pool)
+
+
+# ------------------- مسیر برای مشاهده آمار فشرده‌سازی -------------------
+@router.get("/compression")
+async def read_compression_stats() -> Any:
+    """
+    آمار فشرده‌سازی پاسخ‌ها برای هر الگوریتم: حجم ورودی/خروجی، نسبت فشرده‌سازی
+    و زمان CPU مصرف‌شده.
+    """
+    return compression_metrics.snapshot()
+
+
+# ------------------- مسیر برای مشاهده وضعیت استخر هش رمز عبور -------------------
+@router.get("/password-hasher")
+async def read_password_hasher_stats() -> Any:
+    """
+    وضعیت استخر bcrypt: تعداد کارهای در حال اجرا، عمق صف و میانگین زمان هر فراخوانی.
+    """
+    return password_hasher.snapshot()
+
+
+# ------------------- مسیر برای مشاهده آمار کش احراز هویت -------------------
+@router.get("/auth-cache")
+async def read_auth_cache_stats() -> Any:
+    """
+    آمار کش توکن‌های تأییدشده و کش کاربر جاری (اندازه، hit/miss و ابطال‌ها).
+    """
+    return auth_cache.snapshot()
+
+
+# ------------------- مسیرهای آمار دستورات SQL -------------------
+@router.get("/sql")
+async def read_sql_stats(
+    order_by: str = Query("total", pattern="^(total|count|max|rows|errors)$"),
+    limit: int = Query(50, ge=1, le=1000),
+) -> Any:
+    """
+    پرهزینه‌ترین دستورات SQL نرمال‌شده (تعداد، زمان کل/میانگین/بیشینه، ردیف‌ها)،
+    لاگ آخرین دستورات کند با پارامترهای پنهان‌شده و یافته‌های N+1 هر مسیر.
+    """
+    return statement_stats.snapshot(order_by, limit)
+
+
+@router.delete("/sql")
+async def reset_sql_stats() -> Any:
+    """
+    پاک کردن آمار دستورات SQL، لاگ دستورات کند و یافته‌های N+1.
+    """
+    statement_stats.reset()
+    return {"reset": True}
+
+
+# ------------------- مسیرهای پروفایلر نمونه‌بردار -------------------
+@router.get("/profile")
+async def read_profile() -> Any:
+    """
+    پروفایل تجمیعی درخواست‌های کند در قالب Collapsed Stack (ورودی flamegraph.pl
+    یا speedscope). در اجرای چندپردازه‌ای، پروفایل همه Workerها جمع زده می‌شود.
+    """
+    if settings.PROFILING_DIR:
+        await run_in_threadpool(write_profile, settings.PROFILING_DIR, profiler)
+        content = await run_in_threadpool(merge_profiles, settings.PROFILING_DIR)
+    else:
+        content = profiler.collapsed()
+    filename = f"profile-{time.strftime('%Y%m%d-%H%M%S')}.folded"
+    return Response(
+        content,
+        media_type="text/plain; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/profile/status")
+async def read_profile_status() -> Any:
+    """
+    وضعیت پروفایلر این Worker: تنظیمات، تعداد درخواست‌ها و نمونه‌های ثبت‌شده.
+    """
+    return {"enabled": settings.PROFILING_ENABLED, **profiler.snapshot()}
+
+
+@router.delete("/profile")
+async def reset_profile() -> Any:
+    """
+    پاک کردن پروفایل تجمیع‌شده (برای شروع ثبت یک بازه جدید).
+    """
+    profiler.reset()
+    if settings.PROFILING_DIR:
+        await run_in_threadpool(clear_profiles, settings.PROFILING_DIR)
+    return {"reset": True}
+
+
+# ------------------- مسیرهای نگهبان حافظه -------------------
+@router.get("/memory")
+async def read_memory_status() -> Any:
+    """
+    وضعیت حافظه این Worker: مصرف نسبت به محدودیت، سطح فشار (ok/soft/hard)،
+    درخواست‌های ردشده، کش‌های ثبت‌شده و آخرین تغییرات سطح.
+    """
+    return {
+        **memory_watchdog.snapshot(),
+        "tracemalloc": memory_profiler.enabled,
+        "tracemalloc_snapshots": len(memory_profiler.snapshots),
+    }
+
+
+@router.get("/memory/tracemalloc")
+async def read_tracemalloc_report(fresh: bool = False) -> Any:
+    """
+    گزارش متنی عکس‌های tracemalloc این Worker (بزرگ‌ترین منابع تخصیص و رشد نسبت
+    به عکس قبلی). با fresh=true پیش از گزارش یک عکس تازه گرفته می‌شود.
+    """
+    if not memory_profiler.enabled:
+        raise HTTPException(status_code=409, detail="tracemalloc is not enabled (MEMORY_TRACEMALLOC_ENABLED)")
+    if fresh:
+        await run_in_threadpool(memory_profiler.take, "on demand")
+    filename = f"tracemalloc-{time.strftime('%Y%m%d-%H%M%S')}.txt"
+    return Response(
+        memory_profiler.report(),
+        media_type="text/plain; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+# ------------------- مسیر برای مشاهده بافر سابقه پاسخ‌ها -------------------
+@router.get("/answer-history")
+async def read_answer_history_stats() -> Any:
+    """
+    وضعیت بافر نوشتن با تأخیر سابقه /answer در این Worker: ردیف‌های در انتظار،
+    درج‌شده و دور ریخته‌شده (بافر پر یا خطای درج).
+    """
+    return answer_history_buffer.snapshot()
+
+
+# ------------------- مسیر برای مشاهده وضعیت ارائه‌دهنده‌های مدل -------------------
+@router.get("/upstream")
+async def read_upstream_stats() -> Any:
+    """
+    آمار مسیریابی مدل‌های بالادستی در این Worker: EWMA زمان پاسخ و نرخ خطا،
+    وضعیت (healthy، ejected، recovering) و هزینه هر ارائه‌دهنده، و سیاست هر گروه مسیر.
+    """
+    return upstream_router.snapshot()
+
+
+# ------------------- مسیر برای مشاهده ایندکس برداری آیتم‌ها -------------------
+@router.get("/embeddings")
+async def read_embedding_stats() -> Any:
+    """
+    وضعیت ایندکس برداری آیتم‌ها (بردارهای زنده، سطرهای آزاد، اندازه فایل ماتریس)
+    و صف محاسبه بردار این Worker.
+    """
+    return {
+        "index": await run_in_threadpool(item_vector_index.snapshot),
+        "queue": {"pending": len(item_embedding_queue), "dropped": item_embedding_queue.dropped},
+    }
+
+
+# ------------------- مسیر برای بازسازی شمارنده‌های آیتم -------------------
+@router.post("/item-stats/rebuild")
+async def rebuild_item_stats(db: AsyncSession = Depends(deps.get_db)) -> Any:
+    """
+    بازسازی کامل شمارنده‌های آیتم هر مالک از روی جدول items (کار ترمیم).
+    """
+    owners = await crud_item_stats.rebuild(db)
+    return {"owners": owners}
@@ -1,19 +1,25 @@
-from typing import Any, List
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 # وارد کردن توابع CRUD و مدل‌های Pydantic
 # ما از مدل‌های ItemCreate، ItemInDB و ItemUpdate که قبلاً تعریف شده‌اند، استفاده می‌کنیم.
-from backend.crud import crud_item
-from backend.schemas.item import ItemCreate, ItemInDB, ItemUpdate
+from backend.crud.item import decode_search_cursor, encode_search_cursor, item as crud_item
+from backend.schemas.item import ItemCreate, ItemInDB, ItemSearchPage, ItemSemanticHit, ItemUpdate
+from backend.api.serialization import FastSerializationRoute
+from backend.api.etag import etag_matches, make_etag, not_modified, set_etag
 from backend.api import deps # وابستگی‌های دیتابیس (get_db)
+from backend.core.config import settings
 
-router = APIRouter()
+# FastSerializationRoute در صورت فعال بودن FAST_SERIALIZATION مسیر سریع سریال‌سازی را اعمال می‌کند
+router = APIRouter(route_class=FastSerializationRoute)
 
 # ------------------- مسیر (Endpoint) برای لیست کردن آیتم‌ها -------------------
-@router.get("/", response_model=List[ItemInDB])
+@router.get("/", response_model=List[ItemInDB], dependencies=[Depends(deps.shed_under_memory_pressure)])
 async def read_items(
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
@@ -21,10 +27,66 @@ async def read_items(
     """
     دریافت تمام آیتم‌ها با قابلیت صفحه‌بندی (Pagination).
     """
+    # ETag ضعیف صفحه از روی نسخه ردیف‌ها، بدون ساخت اشیای ORM و سریال‌سازی
+    versions = await crud_item.get_multi_versions(db, skip=skip, limit=limit)
+    etag = make_etag("items", skip, limit, versions, weak=True)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
     items = await crud_item.get_multi(db, skip=skip, limit=limit)
+    set_etag(response, etag)
     return items
 
 
+# ------------------- مسیر برای جستجوی متنی آیتم‌ها -------------------
+# توجه: این مسیر باید قبل از "/{item_id}" تعریف شود.
+@router.get("/search", response_model=ItemSearchPage, dependencies=[Depends(deps.shed_under_memory_pressure)])
+async def search_items(
+    q: str = Query(..., min_length=1, max_length=256),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(deps.get_db),
+) -> Any:
+    """
+    جستجوی متنی در عنوان و توضیحات آیتم‌ها، مرتب‌شده بر اساس میزان تطابق.
+    برای صفحه بعد، مقدار next_cursor را در پارامتر cursor ارسال کنید.
+    """
+    try:
+        after = decode_search_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    hits = await crud_item.search(db, query=q, limit=limit, after=after)
+
+    next_cursor = None
+    if len(hits) == limit:
+        last = hits[-1]
+        next_cursor = encode_search_cursor(last["rank"], last["id"])
+    return {"items": hits, "next_cursor": next_cursor}
+
+
+# ------------------- مسیر برای جستجوی معنایی آیتم‌ها -------------------
+# توجه: این مسیر هم باید قبل از "/{item_id}" تعریف شود.
+@router.get(
+    "/semantic-search",
+    response_model=List[ItemSemanticHit],
+    dependencies=[Depends(deps.shed_under_memory_pressure)],
+)
+async def semantic_search_items(
+    q: str = Query(..., min_length=1, max_length=256),
+    limit: int = Query(20, ge=1, le=100),
+    owner_id: Optional[int] = None,
+    db: AsyncSession = Depends(deps.get_db),
+) -> Any:
+    """
+    جستجوی معنایی در عنوان و توضیحات آیتم‌ها با ایندکس برداری، مرتب‌شده بر
+    اساس شباهت؛ با owner_id فقط آیتم‌های همان مالک جستجو می‌شوند.
+    """
+    if not settings.EMBEDDINGS_ENABLED:
+        raise HTTPException(status_code=503, detail="Semantic search is disabled")
+    return await crud_item.semantic_search(db, query=q, limit=limit, owner_id=owner_id)
+
+
 # ------------------- مسیر برای ایجاد آیتم جدید -------------------
 @router.post("/", response_model=ItemInDB)
 async def create_item(
@@ -44,15 +106,26 @@ async def create_item(
 @router.get("/{item_id}", response_model=ItemInDB)
 async def read_item_by_id(
     item_id: int,
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(deps.get_db),
 ) -> Any:
     """
     دریافت یک آیتم خاص با استفاده از ID.
     """
+    # ابتدا فقط نسخه رکورد خوانده می‌شود؛ اگر کلاینت نسخه فعلی را دارد، پاسخ 304 است.
+    version = await crud_item.get_version(db, id=item_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Item not found")
+    etag = make_etag("item", *version)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
     item = await crud_item.get(db, id=item_id)
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
-    
+
+    set_etag(response, etag)
     return item
 
 
@@ -1,32 +1,42 @@
-from typing import Generator, Annotated
+from typing import Generator, Annotated, Optional
 from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
-from jose import jwt, JWTError
+from fastapi.security import APIKeyHeader, OAuth2PasswordBearer
+from jose import JWTError
 from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
-from backend.db.session import get_db
+from backend.api.deps import get_db
+from backend.core.auth_cache import principal_cache, token_cache
+from backend.crud.api_token import api_token as crud_api_token
 from backend.core.config import settings
+from backend.core.security import jwt  # ایمپورت تنبل jose.jwt
+from backend.core.usage import current_usage
 from backend.models.user import User
 from backend.schemas.token import TokenPayload
 
 # تعریف طرح امنیتی OAuth2PasswordBearer
 # این مشخص می‌کند که توکن از کدام نقطه پایانی (endpoint) دریافت می‌شود.
+# auto_error=False تا درخواست‌های دارای کلید API (بدون توکن Bearer) نیز پذیرفته شوند.
 reusable_oauth2 = OAuth2PasswordBearer(
-    tokenUrl=f"{settings.API_V1_STR}/login/access-token"
+    tokenUrl=f"{settings.API_V1_STR}/login/access-token",
+    auto_error=False,
 )
 
+# کلید API در هدر X-API-Key (جایگزین توکن JWT برای سرویس‌ها و اسکریپت‌ها)
+api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
+
 # ----------------------------------------------------
 # توابع کمکی برای دریافت کاربر جاری
 # ----------------------------------------------------
 
 async def get_current_user(
     db: AsyncSession = Depends(get_db),
-    token: str = Depends(reusable_oauth2),
+    token: Optional[str] = Depends(reusable_oauth2),
+    api_key: Optional[str] = Depends(api_key_header),
 ) -> User:
     """
-    اعتبارسنجی توکن JWT و بازگرداندن شیء کاربر متناظر.
+    اعتبارسنجی توکن JWT (یا کلید API) و بازگرداندن شیء کاربر متناظر.
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -34,29 +44,67 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    try:
-        # رمزگشایی (Decode) توکن
-        payload = jwt.decode(
-            token,
-            settings.SECRET_KEY,
-            algorithms=[settings.ALGORITHM]
-        )
-        token_data = TokenPayload(**payload)
-    except (JWTError, ValidationError):
-        # اگر رمزگشایی یا اعتبارسنجی مدل Pydantic شکست خورد
+    if api_key:
+        # کلید API: بررسی هش آن (با کش مثبت و منفی)
+        user_id = await crud_api_token.authenticate(db, token=api_key)
+        if user_id is None:
+            raise credentials_exception
+    elif not token:
         raise credentials_exception
+    else:
+        # توکن‌های قبلاً تأییدشده (تا زمان exp) بدون رمزگشایی دوباره پذیرفته می‌شوند
+        user_id = token_cache.get(token)
+    if user_id is None:
+        try:
+            # رمزگشایی (Decode) توکن
+            payload = jwt.decode(
+                token,
+                settings.SECRET_KEY,
+                algorithms=[settings.SECURITY_ALGORITHM]
+            )
+            token_data = TokenPayload(**payload)
+        except (JWTError, ValidationError):
+            # اگر رمزگشایی یا اعتبارسنجی مدل Pydantic شکست خورد
+            raise credentials_exception
+        if token_data.sub is None:
+            raise credentials_exception
+        user_id = token_data.sub
+        token_cache.put(token, user_id, token_data.exp)
 
-    # پیدا کردن کاربر در دیتابیس بر اساس ID موجود در توکن
-    user_statement = select(User).where(User.id == token_data.sub)
-    result = await db.execute(user_statement)
-    user = result.scalars().first()
-
+    # کاربر از کش کوتاه‌مدت (بدون رفت‌وبرگشت به دیتابیس) یا در غیر این صورت از دیتابیس
+    user = await principal_cache.get(db, User, user_id)
     if user is None:
-        raise credentials_exception
-        
+        # پیدا کردن کاربر در دیتابیس بر اساس ID موجود در توکن
+        user_statement = select(User).where(User.id == user_id)
+        result = await db.execute(user_statement)
+        user = result.scalars().first()
+
+        if user is None:
+            raise credentials_exception
+        principal_cache.put(user)
+
+    # مصرف این درخواست به نام همین کاربر شمرده می‌شود
+    usage = current_usage.get()
+    if usage is not None:
+        usage.user_id = user.id
     return user
 
 
+async def get_optional_current_user(
+    db: AsyncSession = Depends(get_db),
+    token: Optional[str] = Depends(reusable_oauth2),
+    api_key: Optional[str] = Depends(api_key_header),
+) -> Optional[User]:
+    """
+    برای مسیرهای بدون الزام احراز هویت (مانند /answer): بدون توکن یا کلید API
+    None برمی‌گرداند و در غیر این صورت مانند get_current_user کاربر را (و
+    شناسه او را برای شمارش مصرف) مشخص می‌کند؛ اعتبارنامه نامعتبر 401 می‌گیرد.
+    """
+    if not token and not api_key:
+        return None
+    return await get_current_user(db=db, token=token, api_key=api_key)
+
+
 async def get_current_active_user(
     current_user: User = Depends(get_current_user),
 ) -> User:
@@ -74,7 +122,7 @@ async def get_current_active_superuser(
     """
     اطمینان از فعال بودن و مدیر ارشد بودن کاربر جاری.
     """
-    if not crud.user.is_superuser(current_user):
+    if not crud_user.is_superuser(current_user):
         raise HTTPException(
             status_code=403, 
             detail="The user doesn't have enough privileges"
@@ -84,4 +132,4 @@ async def get_current_active_superuser(
 # این بخش برای رفع خطای Imports از user.py در اینجا اضافه می‌شود.
 # در حالت عادی، ماژول CRUD در لایه API نباید مستقیماً import شود، 
 # اما برای استفاده از تابع is_superuser در اینجا ضروری است.
-from backend import crud 
+from backend.crud.crud_user import user as crud_user
@@ -1,20 +1,31 @@
-from typing import Any, List
+from datetime import datetime, timedelta
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 # وارد کردن توابع CRUD و مدل‌ها
 # توجه: فرض می‌کنیم crud_user، UserCreate، UserInDB و UserUpdate قبلاً تعریف شده‌اند.
-from backend.crud import crud_user
-from backend.schemas.user import UserCreate, UserInDB, UserUpdate
+from backend.crud.crud_user import user as crud_user
+from backend.crud.item_stats import owner_item_stats as crud_item_stats
+from backend.crud.usage import as_utc, usage as crud_usage
+from backend.models.user import User
+from backend.schemas.usage import UsageReport
+from backend.schemas.user import UserCreate, UserInDB, UserStats, UserUpdate
+from backend.api.api_v1.endpoints.login import get_current_active_user
+from backend.api.serialization import FastSerializationRoute
+from backend.api.etag import etag_matches, make_etag, not_modified, set_etag
 from backend.api import deps # وابستگی‌ها (get_db)
 
-router = APIRouter()
+# FastSerializationRoute در صورت فعال بودن FAST_SERIALIZATION مسیر سریع سریال‌سازی را اعمال می‌کند
+router = APIRouter(route_class=FastSerializationRoute)
 
 
 # ------------------- مسیر (Endpoint) برای لیست کردن کاربران -------------------
-@router.get("/", response_model=List[UserInDB])
+@router.get("/", response_model=List[UserInDB], dependencies=[Depends(deps.shed_under_memory_pressure)])
 async def read_users(
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
@@ -22,7 +33,14 @@ async def read_users(
     """
     دریافت تمام کاربران با قابلیت صفحه‌بندی (Pagination).
     """
+    # ETag ضعیف صفحه از روی نسخه ردیف‌ها، بدون ساخت اشیای ORM و سریال‌سازی
+    versions = await crud_user.get_multi_versions(db, skip=skip, limit=limit)
+    etag = make_etag("users", skip, limit, versions, weak=True)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
     users = await crud_user.get_multi(db, skip=skip, limit=limit)
+    set_etag(response, etag)
     return users
 
 
@@ -49,22 +67,101 @@ async def create_user(
     return user
 
 
+# ------------------- مسیر برای دریافت آمار چند کاربر -------------------
+# توجه: این مسیر باید قبل از "/{user_id}" تعریف شود.
+@router.get("/stats", response_model=List[UserStats], dependencies=[Depends(deps.shed_under_memory_pressure)])
+async def read_users_stats(
+    ids: List[int] = Query(...),
+    db: AsyncSession = Depends(deps.get_db),
+) -> Any:
+    """
+    دریافت آمار آیتم‌های چند کاربر در یک درخواست (مثال: ?ids=1&ids=2).
+    کاربرانی که آیتمی ندارند با item_count=0 برگردانده می‌شوند.
+    """
+    if len(ids) > 1000:
+        raise HTTPException(status_code=400, detail="Too many ids (max 1000)")
+
+    stats = await crud_item_stats.get_many(db, owner_ids=ids)
+    return [
+        UserStats(
+            user_id=user_id,
+            item_count=stats[user_id].item_count if user_id in stats else 0,
+            last_updated=stats[user_id].updated_at if user_id in stats else None,
+        )
+        for user_id in dict.fromkeys(ids)
+    ]
+
+
 # ------------------- مسیر برای دریافت یک کاربر خاص -------------------
 @router.get("/{user_id}", response_model=UserInDB)
 async def read_user_by_id(
     user_id: int,
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(deps.get_db),
 ) -> Any:
     """
     دریافت یک کاربر خاص با استفاده از ID.
     """
+    # ابتدا فقط نسخه رکورد خوانده می‌شود؛ اگر کلاینت نسخه فعلی را دارد، پاسخ 304 است.
+    version = await crud_user.get_version(db, id=user_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    etag = make_etag("user", *version)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
     user = await crud_user.get(db, id=user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    
+
+    set_etag(response, etag)
     return user
 
 
+# ------------------- مسیر برای دریافت آمار یک کاربر -------------------
+@router.get("/{user_id}/stats", response_model=UserStats)
+async def read_user_stats(
+    user_id: int,
+    db: AsyncSession = Depends(deps.get_db),
+) -> Any:
+    """
+    دریافت تعداد آیتم‌های یک کاربر و زمان آخرین تغییر آن (یک جستجوی کلید اصلی).
+    """
+    stats = await crud_item_stats.get(db, owner_id=user_id)
+    if not stats:
+        return UserStats(user_id=user_id)
+    return UserStats(
+        user_id=user_id, item_count=stats.item_count, last_updated=stats.updated_at
+    )
+
+
+# ------------------- مسیر برای دریافت گزارش مصرف یک کاربر -------------------
+@router.get("/{user_id}/usage", response_model=UsageReport)
+async def read_user_usage(
+    user_id: int,
+    granularity: str = Query("hour", pattern="^(minute|hour|day)$"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    مصرف کاربر (تعداد درخواست‌ها، خطاها، طول سؤال/پاسخ و زمان‌ها) به تفکیک مدل
+    و بازه زمانی (UTC؛ پیش‌فرض 24 ساعت گذشته). فقط خود کاربر یا مدیر ارشد.
+    """
+    if current_user.id != user_id and not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    end = as_utc(end) if end else datetime.utcnow()
+    start = as_utc(start) if start else end - timedelta(days=1)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    buckets = await crud_usage.get_report(
+        db, user_id=user_id, granularity=granularity, start=start, end=end
+    )
+    return UsageReport(user_id=user_id, granularity=granularity, start=start, end=end, buckets=buckets)
+
+
 # ------------------- مسیر برای به‌روزرسانی کاربر -------------------
 @router.put("/{user_id}", response_model=UserInDB)
 async def update_user(
@@ -0,0 +1,329 @@
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - وابستگی اختیاری
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - وابستگی اختیاری
+    zstandard = None
+
+# ----------------------------------------------------------------------
+# فشرده‌سازی پاسخ‌ها با مذاکره روی Accept-Encoding (zstd / br / gzip)
+# ----------------------------------------------------------------------
+# پاسخ‌های کامل (بدنه در یک پیام) فقط اگر از حداقل اندازه بزرگ‌تر باشند فشرده
+# می‌شوند. پاسخ‌های استریمی (StreamingResponse، مثلاً NDJSON) تکه‌به‌تکه فشرده و
+# پس از هر تکه flush می‌شوند تا کلاینت رکوردها را بدون تأخیر دریافت کند.
+
+# نوع محتواهایی که ارزش فشرده‌سازی دارند
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/ld+json",
+    "application/problem+json",
+    "application/javascript",
+    "application/xml",
+    "text/",
+)
+
+# ترتیب ترجیح سرور در صورت برابر بودن وزن q کلاینت
+ENCODING_PREFERENCE = ("zstd", "br", "gzip")
+
+
+class _GzipCompressor:
+    def __init__(self, level: int):
+        # wbits=31 یعنی قالب gzip (هدر و CRC)
+        self._obj = zlib.compressobj(min(max(level, 1), 9), zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._obj.flush(zlib.Z_FINISH)
+
+
+class _BrotliCompressor:
+    def __init__(self, level: int):
+        self._obj = brotli.Compressor(quality=min(max(level, 0), 11))
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.process(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush()
+
+    def finish(self) -> bytes:
+        return self._obj.finish()
+
+
+class _ZstdCompressor:
+    def __init__(self, level: int):
+        self._obj = zstandard.ZstdCompressor(level=min(max(level, 1), 22)).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._obj.flush()
+
+
+def available_encodings() -> Dict[str, Callable[[int], Any]]:
+    """الگوریتم‌های قابل استفاده (br و zstd فقط در صورت نصب بودن کتابخانه‌شان)."""
+    encodings: Dict[str, Callable[[int], Any]] = {"gzip": _GzipCompressor}
+    if brotli is not None:
+        encodings["br"] = _BrotliCompressor
+    if zstandard is not None:
+        encodings["zstd"] = _ZstdCompressor
+    return encodings
+
+
+def negotiate_encoding(accept_encoding: str, available: Tuple[str, ...]) -> Optional[str]:
+    """
+    انتخاب بهترین content-coding بر اساس وزن‌های q در Accept-Encoding (RFC 9110).
+    q=0 یعنی غیرمجاز؛ `*` وزن الگوریتم‌هایی را تعیین می‌کند که صریحاً نام برده نشده‌اند.
+    """
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[token] = q
+
+    wildcard = weights.get("*", 0.0)
+    best, best_q = None, 0.0
+    for encoding in ENCODING_PREFERENCE:
+        if encoding not in available:
+            continue
+        q = weights.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+# ------------------- تنظیمات فشرده‌سازی هر مسیر -------------------
+@dataclass(frozen=True)
+class CompressionPolicy:
+    """سیاست فشرده‌سازی یک مسیر؛ مقادیر None یعنی استفاده از تنظیمات سراسری."""
+    enabled: bool = True
+    level: Optional[int] = None
+    min_size: Optional[int] = None
+
+
+def compression(
+    level: Optional[int] = None, *, min_size: Optional[int] = None, enabled: bool = True
+) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """
+    دکوریتور تعیین سطح فشرده‌سازی برای یک Endpoint (زیر دکوریتور router قرار گیرد).
+    `level` در بازه مجاز هر الگوریتم محدود می‌شود (gzip: 1-9، br: 0-11، zstd: 1-22).
+    """
+    def decorator(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+        endpoint.__compression__ = CompressionPolicy(enabled=enabled, level=level, min_size=min_size)
+        return endpoint
+
+    return decorator
+
+
+# ------------------- آمار فشرده‌سازی -------------------
+class CompressionMetrics:
+    """
+    آمار تجمعی فشرده‌سازی برای هر الگوریتم: تعداد پاسخ‌ها، حجم ورودی/خروجی،
+    زمان CPU صرف‌شده و تعداد پاسخ‌هایی که به دلیل کوچک بودن فشرده نشدند.
+    """
+
+    def __init__(self):
+        self.encodings: Dict[str, Dict[str, float]] = {}
+        self.skipped_small = 0
+        self.skipped_unacceptable = 0
+
+    def observe(self, encoding: str, bytes_in: int, bytes_out: int, cpu_seconds: float, streamed: bool) -> None:
+        """ثبت آمار یک پاسخ فشرده‌شده پس از پایان ارسال آن."""
+        stats = self.encodings.setdefault(
+            encoding,
+            {"responses": 0, "streamed": 0, "bytes_in": 0, "bytes_out": 0, "cpu_seconds": 0.0},
+        )
+        stats["responses"] += 1
+        stats["streamed"] += int(streamed)
+        stats["bytes_in"] += bytes_in
+        stats["bytes_out"] += bytes_out
+        stats["cpu_seconds"] += cpu_seconds
+
+    def snapshot(self) -> Dict[str, Any]:
+        encodings = {}
+        for name, stats in self.encodings.items():
+            encodings[name] = {
+                **stats,
+                # نسبت فشرده‌سازی (حجم اصلی به حجم فشرده) و هزینه CPU برای هر مگابایت ورودی
+                "ratio": stats["bytes_in"] / stats["bytes_out"] if stats["bytes_out"] else 0.0,
+                "cpu_ms_per_mb": (
+                    stats["cpu_seconds"] * 1000 / (stats["bytes_in"] / 1e6) if stats["bytes_in"] else 0.0
+                ),
+            }
+        return {
+            "encodings": encodings,
+            "skipped_small": self.skipped_small,
+            "skipped_unacceptable": self.skipped_unacceptable,
+        }
+
+
+compression_metrics = CompressionMetrics()
+
+
+# ------------------- میان‌افزار ASGI -------------------
+class CompressionMiddleware:
+    """
+    میان‌افزار ASGI فشرده‌سازی پاسخ‌ها. سیاست هر مسیر از ویژگی `__compression__`
+    Endpoint خوانده می‌شود که Router پس از تطبیق مسیر در scope قرار می‌دهد.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        min_size: int = 1024,
+        levels: Optional[Dict[str, int]] = None,
+        metrics: CompressionMetrics = compression_metrics,
+    ):
+        self.app = app
+        self.min_size = min_size
+        self.levels = levels or {}
+        self.metrics = metrics
+        self.encodings = available_encodings()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(
+            Headers(scope=scope).get("accept-encoding", ""), tuple(self.encodings)
+        )
+        responder = _CompressionResponder(self, scope, send, encoding)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    """وضعیت یک پاسخ: نگه داشتن پیام start تا رسیدن اولین تکه بدنه."""
+
+    def __init__(self, middleware: CompressionMiddleware, scope: Scope, send: Send, encoding: Optional[str]):
+        self.middleware = middleware
+        self.scope = scope
+        self.downstream = send
+        self.encoding = encoding
+        self.start: Optional[Message] = None
+        self.compressor: Any = None
+        self.streamed = False
+        self.passthrough = False
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_seconds = 0.0
+
+    def _policy(self) -> CompressionPolicy:
+        endpoint = self.scope.get("endpoint")
+        return getattr(endpoint, "__compression__", None) or CompressionPolicy()
+
+    def _is_compressible(self, headers: MutableHeaders) -> bool:
+        status = self.start["status"]
+        if status < 200 or status in (204, 206, 304) or "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "").lower()
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    def _run(self, fn: Callable[..., bytes], *args: Any) -> bytes:
+        # زمان CPU همین رشته (event loop)، مستقل از انتظارهای ورودی/خروجی
+        started = time.thread_time()
+        out = fn(*args)
+        self.cpu_seconds += time.thread_time() - started
+        self.bytes_out += len(out)
+        return out
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.downstream(message)
+            return
+
+        body: bytes = message.get("body", b"")
+        more_body: bool = message.get("more_body", False)
+
+        if self.compressor is None:
+            headers = MutableHeaders(raw=self.start["headers"])
+            policy = self._policy()
+            if not policy.enabled or not self._is_compressible(headers):
+                await self._pass_through(message)
+                return
+            # پاسخ به Accept-Encoding بستگی دارد، چه فشرده شود چه نشود
+            headers.add_vary_header("Accept-Encoding")
+            if self.encoding is None:
+                self.middleware.metrics.skipped_unacceptable += 1
+                await self._pass_through(message)
+                return
+            min_size = policy.min_size if policy.min_size is not None else self.middleware.min_size
+            if not more_body and len(body) < min_size:
+                self.middleware.metrics.skipped_small += 1
+                await self._pass_through(message)
+                return
+
+            level = policy.level if policy.level is not None else self.middleware.levels.get(self.encoding, 6)
+            self.compressor = self.middleware.encodings[self.encoding](level)
+            headers["Content-Encoding"] = self.encoding
+            # نمایش فشرده بایت‌به‌بایت متفاوت است؛ ETag قوی به ضعیف تبدیل می‌شود
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = f"W/{etag}"
+            self.streamed = more_body
+
+            if not more_body:
+                self.bytes_in += len(body)
+                compressed = self._run(self.compressor.compress, body) + self._run(self.compressor.finish)
+                headers["Content-Length"] = str(len(compressed))
+                self._record()
+                await self.downstream(self.start)
+                await self.downstream({"type": "http.response.body", "body": compressed})
+                return
+
+            del headers["Content-Length"]
+            await self.downstream(self.start)
+
+        # حالت استریمی: فشرده‌سازی و flush هر تکه
+        self.bytes_in += len(body)
+        chunk = self._run(self.compressor.compress, body)
+        if more_body:
+            chunk += self._run(self.compressor.flush)
+        else:
+            chunk += self._run(self.compressor.finish)
+            self._record()
+        await self.downstream({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+    async def _pass_through(self, message: Message) -> None:
+        self.passthrough = True
+        await self.downstream(self.start)
+        await self.downstream(message)
+
+    def _record(self) -> None:
+        self.middleware.metrics.observe(
+            self.encoding, self.bytes_in, self.bytes_out, self.cpu_seconds, self.streamed
+        )
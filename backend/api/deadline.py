@@ -0,0 +1,158 @@
+import asyncio
+import json
+from typing import Any, Dict, Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from backend.core.deadline import Deadline, DeadlineExceeded, current_deadline, parse_timeout
+from backend.core.metrics import registry
+
+# ----------------------------------------------------------------------
+# مهلت سراسری درخواست‌ها و لغو کار با قطع اتصال کلاینت
+# ----------------------------------------------------------------------
+# هر درخواست در Task جداگانه اجرا می‌شود تا با پایان مهلت یا قطع اتصال کلاینت
+# لغو شود؛ لغو Task، فراخوانی در حال اجرای مدل بالادستی و انتظار برای دیتابیس را
+# هم (با CancelledError) قطع می‌کند. دستور SQL در حال اجرا با statement_timeout
+# (تنظیم‌شده در deps.get_db) در سمت خود PostgreSQL متوقف می‌شود.
+
+request_cancellations = registry.counter(
+    "request_cancellations_total",
+    "Requests whose work was cancelled, by route template and reason (deadline, disconnect).",
+    ("route", "reason"),
+)
+
+# کد وضعیت قراردادی nginx برای «کلاینت پیش از پاسخ اتصال را بست»؛ سرور آن را
+# برای کلاینت نمی‌فرستد ولی میان‌افزارهای بیرونی (متریک‌ها) آن را ثبت می‌کنند.
+CLIENT_CLOSED_REQUEST = 499
+# SQLSTATE خطای لغو دستور در PostgreSQL (query_canceled، از جمله statement_timeout)
+QUERY_CANCELED = "57014"
+
+
+def _is_deadline_error(exc: BaseException) -> bool:
+    """خطای ناشی از پایان مهلت: DeadlineExceeded یا لغو دستور با statement_timeout."""
+    if isinstance(exc, DeadlineExceeded):
+        return True
+    orig = getattr(exc, "orig", None)
+    return orig is not None and QUERY_CANCELED in (
+        getattr(orig, "sqlstate", None),
+        getattr(orig, "pgcode", None),
+        getattr(getattr(orig, "__cause__", None), "sqlstate", None),
+    )
+
+
+class DeadlineMiddleware:
+    """
+    مهلت هر درخواست از سرآیند `header` (حداکثر `max_timeout`) یا پیش‌فرض گروه مسیر
+    (طولانی‌ترین پیشوند منطبق در `routes`) یا `default` تعیین می‌شود.
+    با پایان مهلت پیش از شروع پاسخ، 504 برگردانده می‌شود.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        default: float,
+        max_timeout: float,
+        routes: Dict[str, float],
+        header: str = "x-request-timeout",
+    ):
+        self.app = app
+        self.default = default
+        self.max_timeout = max_timeout
+        self.header = header.lower().encode()
+        # طولانی‌ترین پیشوند ابتدا بررسی می‌شود
+        self.routes = sorted(routes.items(), key=lambda item: len(item[0]), reverse=True)
+
+    def timeout_for(self, scope: Scope) -> float:
+        for name, value in scope["headers"]:
+            if name == self.header:
+                requested = parse_timeout(value.decode("latin-1"))
+                if requested is not None:
+                    return min(requested, self.max_timeout)
+                break
+        path = scope["path"]
+        for prefix, timeout in self.routes:
+            if path == prefix or path.startswith(prefix.rstrip("/") + "/"):
+                return timeout
+        return self.default
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        deadline = Deadline(self.timeout_for(scope))
+        started = False
+        cancelled: Optional[str] = None
+
+        async def send_tracking(message: Message) -> None:
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        # پیام‌های ورودی از طریق صف به برنامه می‌رسند تا http.disconnect حتی وقتی
+        # برنامه منتظر دیتابیس یا مدل بالادستی است (و receive را صدا نمی‌زند) دیده شود.
+        # ظرفیت 1 باعث می‌شود بدنه درخواست فقط هم‌گام با مصرف برنامه خوانده شود.
+        messages: "asyncio.Queue[Message]" = asyncio.Queue(maxsize=1)
+
+        async def watch_disconnect() -> None:
+            nonlocal cancelled
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    if not app_task.done():
+                        cancelled = "disconnect"
+                        app_task.cancel()
+                    return
+                await messages.put(message)
+
+        token = current_deadline.set(deadline)
+        try:
+            app_task = asyncio.ensure_future(self.app(scope, messages.get, send_tracking))
+        finally:
+            current_deadline.reset(token)
+        watcher = asyncio.ensure_future(watch_disconnect())
+        try:
+            done, _ = await asyncio.wait((app_task,), timeout=max(deadline.remaining(), 0))
+            if not done:
+                cancelled = "deadline"
+                app_task.cancel()
+            try:
+                await app_task
+            except asyncio.CancelledError:
+                if cancelled is None:
+                    raise
+            except Exception as exc:
+                if started or not (deadline.expired or _is_deadline_error(exc)):
+                    raise
+                cancelled = "deadline"
+        finally:
+            watcher.cancel()
+            if not app_task.done():
+                # لغو Task بیرونی (مثلاً خاموشی سرور)
+                app_task.cancel()
+
+        if cancelled is None:
+            return
+        route = scope.get("route")
+        request_cancellations.labels(route.path if route is not None else "<unrouted>", cancelled).inc()
+        if started:
+            return
+        if cancelled == "deadline":
+            await _send_json(send, 504, {"detail": "Request deadline exceeded"})
+        else:
+            await _send_json(send, CLIENT_CLOSED_REQUEST, {"detail": "Client closed request"})
+
+
+async def _send_json(send: Send, status: int, content: Any) -> None:
+    body = json.dumps(content).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -1,10 +1,24 @@
 from typing import AsyncGenerator
 
+from fastapi import HTTPException, status
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from backend.core.config import settings
+from backend.core.deadline import Deadline, current_deadline
+from backend.core.memory import memory_shed_requests, memory_watchdog
+
 # AsyncSessionLocal را از فایل session.py وارد می‌کنیم
 # فرض بر این است که backend/db/session.py قبلاً ایجاد شده است
-from backend.db.session import AsyncSessionLocal
+from backend.db.session import AsyncSessionLocal, get_engine
+
+
+def _statement_timeout_listener(deadline: Deadline):
+    def set_statement_timeout(session, transaction, connection) -> None:
+        # SET LOCAL فقط تا پایان همین تراکنش معتبر است؛ هر تراکنش بودجه باقی‌مانده را می‌گیرد
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {deadline.remaining_ms()}")
+
+    return set_statement_timeout
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
@@ -14,7 +28,13 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
     این تابع یک نشست دیتابیس را ایجاد کرده، آن را به تابع روتر تحویل می‌دهد
     و پس از پایان کار، نشست را بسته یا خطاها را مدیریت می‌کند.
     """
+    # اطمینان از ساخته شدن موتور (در حالت عادی lifespan آن را ساخته است)
+    engine = get_engine()
     db = AsyncSessionLocal()
+    # دستورات SQL این درخواست در خود PostgreSQL با پایان مهلت درخواست لغو می‌شوند
+    deadline = current_deadline.get()
+    if deadline is not None and settings.DB_DEADLINE_STATEMENT_TIMEOUT and engine.dialect.name == "postgresql":
+        event.listen(db.sync_session, "after_begin", _statement_timeout_listener(deadline))
     try:
         # نشست دیتابیس را به تابع روتر تحویل می‌دهد
         yield db
@@ -22,4 +42,19 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
         # در نهایت، مطمئن می‌شود که نشست دیتابیس بسته شود
         await db.close()
 
+
+def shed_under_memory_pressure() -> None:
+    """
+    وابستگی مسیرهای سنگین (صفحه‌های بزرگ، جستجو، فراخوانی مدل): تحت فشار حافظه
+    (از آستانه نرم به بالا) درخواست جدید قبل از هر کار دیگری با 503 رد می‌شود.
+    """
+    if memory_watchdog.shedding:
+        memory_watchdog.shed += 1
+        memory_shed_requests.inc()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="سرویس موقتاً تحت فشار حافظه است؛ کمی بعد دوباره تلاش کنید.",
+            headers={"Retry-After": str(settings.MEMORY_SHED_RETRY_AFTER)},
+        )
+
 # در آینده، توابع وابستگی برای احراز هویت (Authentication) نیز به این فایل اضافه خواهند شد.
@@ -0,0 +1,47 @@
+import hashlib
+from typing import Any
+
+from fastapi import Request, Response
+
+# ----------------------------------------------------------------------
+# توابع کمکی ETag و درخواست‌های شرطی (Conditional GET)
+# ----------------------------------------------------------------------
+
+
+def make_etag(*parts: Any, weak: bool = False) -> str:
+    """
+    ساخت ETag از روی اجزای نسخه (مثلاً id و updated_at).
+
+    :param weak: ETag ضعیف (W/) برای لیست‌ها که معادل معنایی را نشان می‌دهد.
+    """
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+    return f'W/"{digest}"' if weak else f'"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    بررسی هدر If-None-Match با مقایسه ضعیف (RFC 9110): پیشوند W/ نادیده گرفته می‌شود.
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque for candidate in header.split(",")
+    )
+
+
+def not_modified(etag: str) -> Response:
+    """پاسخ 304 بدون بدنه، همراه با همان ETag."""
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
+def set_etag(response: Response, etag: str) -> None:
+    """
+    افزودن ETag به پاسخ. no-cache یعنی کلاینت می‌تواند ذخیره کند اما باید
+    پیش از استفاده با If-None-Match اعتبارسنجی کند.
+    """
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
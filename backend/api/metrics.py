@@ -0,0 +1,209 @@
+import asyncio
+import time
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import APIRouter, Response
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from backend.api.compression import compression_metrics
+from backend.core import auth_cache
+from backend.core.config import settings
+from backend.core.metrics import CONTENT_TYPE, exposition, merge_directory, registry
+from backend.core.security import password_hasher
+from backend.db import session as db_session
+from backend.db.pool import CHECKOUT_WAIT_BUCKETS
+
+# ----------------------------------------------------------------------
+# متریک‌های HTTP: تعداد و زمان پاسخ هر مسیر (بر اساس الگوی مسیر) و درخواست‌های در حال اجرا
+# ----------------------------------------------------------------------
+http_requests = registry.counter(
+    "http_requests_total", "HTTP requests by method, route template and status.", ("method", "route", "status")
+)
+http_duration = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by method and route template.", ("method", "route")
+)
+http_in_flight = registry.gauge("http_requests_in_flight", "HTTP requests currently being served.")
+
+# متدهای دیگر (ارسال‌شده توسط اسکنرها) در یک برچسب جمع می‌شوند تا تعداد سری‌ها محدود بماند
+_METHODS = frozenset(("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"))
+# درخواست‌هایی که به هیچ مسیری نرسیدند (404، یا رد شده قبل از Router مثل 429)
+UNROUTED = "<unrouted>"
+
+
+class MetricsMiddleware:
+    """
+    میان‌افزار ASGI ثبت متریک‌های HTTP. برچسب route الگوی مسیر است (مثلاً
+    /api/v1/items/{item_id})، نه مسیر خام، تا تعداد سری‌ها محدود بماند.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        # Endpoint -> الگوی مسیر برای مسیرهای Starlette که route را در scope قرار نمی‌دهند
+        self._templates: Dict[Callable[..., Any], str] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        method = scope["method"] if scope["method"] in _METHODS else "OTHER"
+        started = time.perf_counter()
+        http_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_in_flight.dec()
+            route = self._route_template(scope)
+            http_requests.labels(method, route, str(status)).inc()
+            http_duration.labels(method, route).observe(elapsed)
+
+    def _route_template(self, scope: Scope) -> str:
+        # APIRoute پس از تطبیق، خودش را در scope["route"] قرار می‌دهد
+        route = scope.get("route")
+        if route is not None:
+            return route.path
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return UNROUTED
+        template = self._templates.get(endpoint)
+        if template is None:
+            template = UNROUTED
+            for candidate in scope["app"].router.routes:
+                if getattr(candidate, "endpoint", None) is endpoint:
+                    template = candidate.path
+                    break
+            self._templates[endpoint] = template
+        return template
+
+
+# ----------------------------------------------------------------------
+# Collectorها: بازتاب آمار موجود (استخر، فشرده‌سازی، هش رمز، کش احراز هویت)
+# ----------------------------------------------------------------------
+pool_connections = registry.gauge(
+    "db_pool_connections", "Connection pool connections by state.", ("state",)
+)
+pool_size = registry.gauge("db_pool_size", "Configured connection pool size.")
+pool_checkout_wait = registry.histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting to check out a pooled connection.",
+    buckets=CHECKOUT_WAIT_BUCKETS,
+)
+pool_checkout_timeouts = registry.counter(
+    "db_pool_checkout_timeouts_total", "Connection checkouts that timed out."
+)
+
+
+def collect_pool() -> None:
+    engine = db_session.engine
+    if engine is None:
+        return
+    pool = engine.pool
+    pool_size.set(pool.size())
+    pool_connections.labels("checked_out").set(pool.checkedout())
+    pool_connections.labels("checked_in").set(pool.checkedin())
+    pool_connections.labels("overflow").set(max(pool.overflow(), 0))
+    metrics = getattr(pool, "metrics", None)
+    if metrics is not None:
+        pool_checkout_wait.labels().set(metrics.wait_buckets, metrics.wait_sum)
+        pool_checkout_timeouts.labels().set(metrics.checkout_timeouts)
+
+
+compression_bytes = registry.counter(
+    "compression_bytes_total", "Response bytes before (in) and after (out) compression.", ("encoding", "direction")
+)
+compression_responses = registry.counter(
+    "compression_responses_total", "Compressed responses by encoding.", ("encoding",)
+)
+compression_cpu = registry.counter(
+    "compression_cpu_seconds_total", "CPU time spent compressing responses.", ("encoding",)
+)
+
+
+def collect_compression() -> None:
+    for encoding, stats in compression_metrics.encodings.items():
+        compression_bytes.labels(encoding, "in").set(stats["bytes_in"])
+        compression_bytes.labels(encoding, "out").set(stats["bytes_out"])
+        compression_responses.labels(encoding).set(stats["responses"])
+        compression_cpu.labels(encoding).set(stats["cpu_seconds"])
+
+
+password_hash_in_flight = registry.gauge("password_hash_in_flight", "bcrypt calls running in the executor.")
+password_hash_queue = registry.gauge("password_hash_queue_depth", "bcrypt calls waiting for a worker or capacity.")
+password_hash_calls = registry.counter("password_hash_calls_total", "Completed bcrypt hash/verify calls.")
+password_hash_seconds = registry.counter("password_hash_seconds_total", "Total time spent in bcrypt calls.")
+
+
+def collect_password_hasher() -> None:
+    snapshot = password_hasher.snapshot()
+    password_hash_in_flight.set(snapshot["in_flight"])
+    password_hash_queue.set(snapshot["queue_depth"])
+    password_hash_calls.labels().set(password_hasher.calls)
+    password_hash_seconds.labels().set(password_hasher.total_seconds)
+
+
+auth_cache_requests = registry.counter(
+    "auth_cache_requests_total", "Authentication cache lookups by cache and result.", ("cache", "result")
+)
+auth_cache_entries = registry.gauge(
+    "auth_cache_entries", "Authentication cache size by cache.", ("cache",)
+)
+
+
+def collect_auth_cache() -> None:
+    for name, stats in auth_cache.snapshot().items():
+        auth_cache_entries.labels(name).set(stats["size"])
+        auth_cache_requests.labels(name, "hit").set(stats["hits"])
+        auth_cache_requests.labels(name, "miss").set(stats["misses"])
+        if "negative_size" in stats:
+            auth_cache_entries.labels(f"{name}_negative").set(stats["negative_size"])
+            auth_cache_requests.labels(f"{name}_negative", "hit").set(stats["negative_hits"])
+
+
+for _collector in (collect_pool, collect_compression, collect_password_hasher, collect_auth_cache):
+    registry.add_collector(_collector)
+
+
+# ----------------------------------------------------------------------
+# مسیر /metrics و نوشتن دوره‌ای مقادیر در حالت چندپردازه‌ای
+# ----------------------------------------------------------------------
+router = APIRouter()
+
+
+def _merge_process_files(directory: str, families: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    registry.write(directory, families)
+    return merge_directory(directory)
+
+
+@router.get("/metrics", include_in_schema=False)
+async def read_metrics() -> Response:
+    """
+    متریک‌ها در قالب متنی Prometheus. در اجرای چندپردازه‌ای مجموع همه Workerها
+    برگردانده می‌شود (مقادیر سایر Workerها حداکثر METRICS_FLUSH_INTERVAL ثانیه قدیمی هستند).
+    """
+    families = registry.collect()
+    directory: Optional[str] = settings.METRICS_MULTIPROC_DIR
+    if directory:
+        families = await run_in_threadpool(_merge_process_files, directory, families)
+    return Response(exposition(families), media_type=CONTENT_TYPE)
+
+
+async def run_metrics_flusher(directory: str, interval: float) -> None:
+    """
+    حلقه پس‌زمینه‌ای که هر `interval` ثانیه مقادیر این Worker را در فایلش می‌نویسد.
+    """
+    try:
+        while True:
+            await asyncio.sleep(interval)
+            await run_in_threadpool(registry.write, directory, registry.collect())
+    finally:
+        # نوشتن آخرین مقادیر هنگام خاموشی تا شمارنده‌های این Worker از دست نروند
+        registry.write(directory, registry.collect())
@@ -0,0 +1,294 @@
+import asyncio
+import os
+import random
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from backend.core.config import settings
+
+# ----------------------------------------------------------------------
+# پروفایلر نمونه‌بردار (Sampling Profiler) برای درخواست‌های کند
+# ----------------------------------------------------------------------
+# یک رشته پس‌زمینه هر چند میلی‌ثانیه پشته درخواست‌های در حال اجرا را ثبت می‌کند:
+# - [cpu]: درخواستی که همان لحظه روی event loop در حال اجراست (پشته واقعی رشته)
+# - [wait]: درخواست‌های معلق؛ زنجیره await کوروتین‌ها نشان می‌دهد منتظر چه
+#   چیزی هستند (دیتابیس، مدل بالادستی، استخر bcrypt و ...)
+# نمونه‌های یک درخواست فقط اگر کندتر از آستانه باشد (یا به صورت تصادفی برای
+# درصدی از درخواست‌ها) نگه داشته و به شکل Collapsed Stack (قابل استفاده در
+# flamegraph.pl یا speedscope) تجمیع می‌شوند.
+
+MAX_DEPTH = 64
+OTHER_STACK = "[other]"
+# نام خواناتر انتهای زنجیره await
+_AWAITED_NAMES = {"FutureIter": "Future", "_GatheringFuture": "gather"}
+
+
+class _Request:
+    """نمونه‌های ثبت‌شده یک درخواست در حال اجرا."""
+
+    __slots__ = ("task", "samples")
+
+    def __init__(self, task: "asyncio.Task[Any]"):
+        self.task = task
+        # (حالت، فریم‌ها از ریشه به برگ)
+        self.samples: List[Tuple[str, Tuple[str, ...]]] = []
+
+
+class SamplingProfiler:
+    """
+    نمونه‌بردار پشته درخواست‌ها و تجمیع آن‌ها به صورت Collapsed Stack.
+
+    :param interval: فاصله نمونه‌برداری (ثانیه)
+    :param sample_rate: کسری از همه درخواست‌ها که صرف‌نظر از زمانشان نگه داشته می‌شوند
+    :param slow_threshold: درخواست‌های کندتر از این مقدار (ثانیه) همیشه نگه داشته می‌شوند (0 یعنی غیرفعال)
+    :param max_stacks: حداکثر تعداد پشته‌های یکتا؛ پشته‌های بیشتر در [other] جمع می‌شوند
+    """
+
+    def __init__(self, interval: float, sample_rate: float, slow_threshold: float, max_stacks: int):
+        self.interval = interval
+        self.sample_rate = sample_rate
+        self.slow_threshold = slow_threshold
+        self.max_stacks = max_stacks
+        self.stacks: Dict[str, int] = {}
+        self.requests_profiled = 0
+        self.samples = 0
+        self.reset_at = time.time()
+        self._active: Dict[int, _Request] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id = 0
+        # کد -> نام فریم (ساخت رشته فقط یک بار برای هر تابع)
+        self._names: Dict[Any, str] = {}
+        # کد __call__ میان‌افزار: فریم‌های بالاتر از آن (سرور ASGI) حذف می‌شوند
+        self._boundary: Any = None
+
+    # ------------------- چرخه عمر درخواست -------------------
+    def begin(self, task: "asyncio.Task[Any]") -> _Request:
+        if self._thread is None:
+            self._start()
+        request = _Request(task)
+        with self._lock:
+            self._active[id(task)] = request
+        self._wake.set()
+        return request
+
+    def end(self, request: _Request, root: str, elapsed: float) -> None:
+        with self._lock:
+            self._active.pop(id(request.task), None)
+        keep = (self.slow_threshold and elapsed >= self.slow_threshold) or random.random() < self.sample_rate
+        if not keep or not request.samples:
+            return
+        self.requests_profiled += 1
+        self.samples += len(request.samples)
+        for state, frames in request.samples:
+            key = ";".join((root, state) + frames)
+            if key not in self.stacks and len(self.stacks) >= self.max_stacks:
+                key = f"{root};{OTHER_STACK}"
+            self.stacks[key] = self.stacks.get(key, 0) + 1
+
+    # ------------------- رشته نمونه‌بردار -------------------
+    def _start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stopped:
+            if not self._active:
+                # بدون درخواست فعال، رشته تا شروع درخواست بعدی خواب است
+                self._wake.wait()
+                self._wake.clear()
+                continue
+            self._sample()
+            time.sleep(self.interval)
+
+    def _sample(self) -> None:
+        running = asyncio.current_task(self._loop)
+        frame = sys._current_frames().get(self._loop_thread_id)
+        with self._lock:
+            requests = list(self._active.values())
+        for request in requests:
+            if request.task is running and frame is not None:
+                request.samples.append(("[cpu]", self._frame_stack(frame)))
+            else:
+                request.samples.append(("[wait]", self._await_stack(request.task)))
+
+    # ------------------- استخراج پشته -------------------
+    def _name(self, code: Any) -> str:
+        name = self._names.get(code)
+        if name is None:
+            name = self._names[code] = f"{_short_path(code.co_filename)}:{code.co_name}"
+        return name
+
+    def _frame_stack(self, frame: Any) -> Tuple[str, ...]:
+        codes = []
+        while frame is not None and len(codes) < MAX_DEPTH * 4:
+            if frame.f_code is self._boundary:
+                break
+            codes.append(frame.f_code)
+            frame = frame.f_back
+        return tuple(self._name(code) for code in reversed(codes[:MAX_DEPTH]))
+
+    def _await_stack(self, task: "asyncio.Task[Any]") -> Tuple[str, ...]:
+        names: List[str] = []
+        inside = self._boundary is None
+        awaitable: Any = task.get_coro()
+        while awaitable is not None and len(names) < MAX_DEPTH:
+            frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "gi_frame", None)
+            if frame is None:
+                if hasattr(awaitable, "cr_code") or hasattr(awaitable, "gi_code"):
+                    break
+                # انتهای زنجیره: Future یا شیء awaitable دیگر
+                kind = type(awaitable).__name__
+                names.append(f"[{_AWAITED_NAMES.get(kind, kind)}]")
+                break
+            if inside:
+                names.append(self._name(frame.f_code))
+            elif frame.f_code is self._boundary:
+                inside = True
+            awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None)
+        return tuple(names)
+
+    # ------------------- خروجی -------------------
+    def collapsed(self) -> str:
+        """پشته‌ها در قالب «frame;frame;... count» برای flamegraph.pl یا speedscope."""
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.stacks.items()))
+
+    def reset(self) -> None:
+        self.stacks = {}
+        self.requests_profiled = 0
+        self.samples = 0
+        self.reset_at = time.time()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "interval_ms": self.interval * 1000,
+            "sample_rate": self.sample_rate,
+            "slow_threshold_ms": self.slow_threshold * 1000,
+            "active_requests": len(self._active),
+            "requests_profiled": self.requests_profiled,
+            "samples": self.samples,
+            "unique_stacks": len(self.stacks),
+        }
+
+
+profiler = SamplingProfiler(
+    interval=settings.PROFILING_INTERVAL_MS / 1000,
+    sample_rate=settings.PROFILING_SAMPLE_RATE,
+    slow_threshold=settings.PROFILING_SLOW_THRESHOLD_MS / 1000,
+    max_stacks=settings.PROFILING_MAX_STACKS,
+)
+
+
+def _short_path(filename: str) -> str:
+    """مسیر کوتاه فایل: بعد از site-packages یا دو جزء آخر مسیر."""
+    marker = "site-packages" + os.sep
+    index = filename.rfind(marker)
+    if index >= 0:
+        return filename[index + len(marker):]
+    parts = filename.rsplit(os.sep, 2)
+    return os.sep.join(parts[-2:])
+
+
+# ----------------------------------------------------------------------
+# ادغام پروفایل Workerها
+# ----------------------------------------------------------------------
+RESET_MARKER = "reset"
+
+
+def write_profile(directory: str, profiler: SamplingProfiler) -> None:
+    """
+    نوشتن پروفایل این Worker در {pid}.folded (جایگزینی اتمی فایل). اگر پس از
+    آخرین reset این Worker، پروفایل از مسیر مدیریتی (در هر Worker) پاک شده
+    باشد، ابتدا پروفایل این Worker هم پاک می‌شود.
+    """
+    try:
+        if os.path.getmtime(os.path.join(directory, RESET_MARKER)) > profiler.reset_at:
+            profiler.reset()
+    except OSError:
+        pass
+    path = os.path.join(directory, f"{os.getpid()}.folded")
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as fh:
+        fh.write(profiler.collapsed())
+    os.replace(tmp, path)
+
+
+def merge_profiles(directory: str) -> str:
+    """جمع پشته‌های همه فایل‌های .folded یک پوشه."""
+    stacks: Dict[str, int] = {}
+    for entry in os.scandir(directory):
+        if not entry.name.endswith(".folded"):
+            continue
+        with open(entry.path) as fh:
+            for line in fh:
+                stack, _, count = line.rstrip("\n").rpartition(" ")
+                if stack and count.isdigit():
+                    stacks[stack] = stacks.get(stack, 0) + int(count)
+    return "".join(f"{stack} {count}\n" for stack, count in sorted(stacks.items()))
+
+
+def clear_profiles(directory: str) -> None:
+    """حذف پروفایل‌های همه Workerها؛ سایر Workerها با دیدن RESET_MARKER پروفایلشان را پاک می‌کنند."""
+    with open(os.path.join(directory, RESET_MARKER), "w") as fh:
+        fh.write(str(time.time()))
+    for entry in os.scandir(directory):
+        if entry.name.endswith(".folded"):
+            os.remove(entry.path)
+
+
+async def run_profile_flusher(directory: str, profiler: SamplingProfiler, interval: float) -> None:
+    """
+    حلقه پس‌زمینه‌ای که هر `interval` ثانیه پروفایل این Worker را در فایلش می‌نویسد.
+    """
+    try:
+        while True:
+            await asyncio.sleep(interval)
+            write_profile(directory, profiler)
+    finally:
+        write_profile(directory, profiler)
+
+
+# ----------------------------------------------------------------------
+# میان‌افزار ASGI
+# ----------------------------------------------------------------------
+class ProfilingMiddleware:
+    """
+    میان‌افزار پروفایل درخواست‌ها؛ فقط در صورت فعال بودن PROFILING_ENABLED
+    به برنامه اضافه می‌شود، پس در حالت عادی هیچ هزینه‌ای ندارد.
+    ریشه هر پشته «متد الگوی‌مسیر» است تا flamegraph بر اساس مسیر تفکیک شود.
+    """
+
+    def __init__(self, app: ASGIApp, *, profiler: SamplingProfiler = profiler):
+        self.app = app
+        self.profiler = profiler
+        profiler._boundary = self.__call__.__func__.__code__
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request = self.profiler.begin(asyncio.current_task())
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            route = scope.get("route")
+            root = f"{scope['method']} {route.path if route is not None else '<unrouted>'}"
+            self.profiler.end(request, root, time.perf_counter() - started)
@@ -0,0 +1,277 @@
+import json
+import math
+import re
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Protocol, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from backend.core.auth_cache import api_token_cache, token_cache
+
+# ----------------------------------------------------------------------
+# محدودسازی نرخ درخواست‌ها با سطل توکن (Token Bucket) برای هر کاربر/کلید/IP
+# ----------------------------------------------------------------------
+# هر گروه مسیر (بر اساس طولانی‌ترین پیشوند منطبق) قانون جداگانه‌ای دارد و هر
+# شناسه (کاربر تأییدشده، کلید API یا IP) در هر گروه سطل جداگانه دارد.
+# حالت سطل فقط چند عدد است (توکن باقی‌مانده و زمان آخرین به‌روزرسانی) و شارژ
+# مجدد به صورت تنبل هنگام هر درخواست محاسبه می‌شود؛ بنابراین هر بررسی O(1) است.
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+_RULE_PATTERN = re.compile(r"^\s*(\d+)\s*/\s*(\d*)\s*(second|minute|hour|day)s?\s*$")
+
+
+@dataclass(frozen=True)
+class RateLimitRule:
+    """قانون یک گروه مسیر: ظرفیت سطل (burst) و تعداد توکن در هر بازه."""
+    group: str
+    capacity: int
+    window: float
+
+    @property
+    def rate(self) -> float:
+        """سرعت شارژ سطل (توکن در ثانیه)."""
+        return self.capacity / self.window
+
+    @classmethod
+    def parse(cls, group: str, spec: str) -> "RateLimitRule":
+        """
+        تبدیل رشته‌ای مانند "100/minute" یا "20/10second" به قانون.
+        """
+        match = _RULE_PATTERN.match(spec)
+        if not match:
+            raise ValueError(f"Invalid rate limit rule for {group!r}: {spec!r}")
+        count, multiplier, period = match.groups()
+        return cls(group=group, capacity=int(count), window=PERIODS[period] * int(multiplier or 1))
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    allowed: bool
+    remaining: int
+    # ثانیه تا پر شدن کامل سطل
+    reset_after: float
+    # ثانیه تا در دسترس بودن یک توکن (فقط برای درخواست رد شده)
+    retry_after: float
+
+
+class RateLimitStore(Protocol):
+    """فضای ذخیره حالت سطل‌ها؛ درون‌پردازه‌ای یا مشترک بین Workerها."""
+
+    async def consume(self, key: str, rule: RateLimitRule, cost: int = 1) -> RateLimitResult:
+        ...
+
+
+def _bucket_result(tokens: float, allowed: bool, rule: RateLimitRule, cost: int) -> RateLimitResult:
+    return RateLimitResult(
+        allowed=allowed,
+        remaining=int(tokens),
+        reset_after=(rule.capacity - tokens) / rule.rate,
+        retry_after=0.0 if allowed else (cost - tokens) / rule.rate,
+    )
+
+
+# ------------------- فضای ذخیره درون‌پردازه‌ای (Sharded) -------------------
+class MemoryRateLimitStore:
+    """
+    سطل‌ها در چند شارد (دیکشنری) نگه‌داری می‌شوند. همه دسترسی‌ها از event loop
+    و بدون نقطه await انجام می‌شوند، پس هیچ قفلی لازم نیست.
+
+    اگر اندازه یک شارد از سقفش بیشتر شود، سطل‌های پر (معادل سطل ناموجود)
+    حذف می‌شوند و در صورت نیاز قدیمی‌ترین سطل‌ها کنار گذاشته می‌شوند.
+    """
+
+    def __init__(self, shards: int = 64, max_keys: int = 100_000):
+        self.shards: List[Dict[str, List[float]]] = [{} for _ in range(max(shards, 1))]
+        self.max_keys_per_shard = max(max_keys // len(self.shards), 1)
+
+    async def consume(self, key: str, rule: RateLimitRule, cost: int = 1) -> RateLimitResult:
+        return self.consume_now(key, rule, cost, time.monotonic())
+
+    def consume_now(self, key: str, rule: RateLimitRule, cost: int, now: float) -> RateLimitResult:
+        shard = self.shards[hash(key) % len(self.shards)]
+        bucket = shard.get(key)
+        if bucket is None:
+            if len(shard) >= self.max_keys_per_shard:
+                self._evict(shard, now)
+            # [توکن، زمان آخرین به‌روزرسانی، سرعت، ظرفیت]؛ سرعت و ظرفیت برای حذف سطل‌های پر
+            bucket = shard[key] = [float(rule.capacity), now, rule.rate, float(rule.capacity)]
+
+        tokens = min(float(rule.capacity), bucket[0] + (now - bucket[1]) * rule.rate)
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        bucket[0], bucket[1] = tokens, now
+        return _bucket_result(tokens, allowed, rule, cost)
+
+    def _evict(self, shard: Dict[str, List[float]], now: float) -> None:
+        full = [k for k, (tokens, last, rate, capacity) in shard.items() if tokens + (now - last) * rate >= capacity]
+        for k in full:
+            del shard[k]
+        while len(shard) >= self.max_keys_per_shard:
+            del shard[next(iter(shard))]
+
+
+# ------------------- فضای ذخیره مشترک (Redis) -------------------
+# اجرای اتمی سطل توکن در Redis؛ زمان از ساعت خود Redis گرفته می‌شود تا اختلاف
+# ساعت Workerها اثری نداشته باشد.
+_REDIS_TOKEN_BUCKET = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + (now - ts) * rate)
+local allowed = 0
+if tokens >= cost then
+  tokens = tokens - cost
+  allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+
+class RedisRateLimitStore:
+    """
+    فضای ذخیره مشترک برای استقرار چند Worker/چند نمونه (نیازمند بسته redis).
+    """
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        import redis.asyncio as redis
+
+        self.client = redis.from_url(url)
+        self.prefix = prefix
+        self._script = self.client.register_script(_REDIS_TOKEN_BUCKET)
+
+    async def consume(self, key: str, rule: RateLimitRule, cost: int = 1) -> RateLimitResult:
+        allowed, tokens = await self._script(
+            keys=[self.prefix + key], args=[rule.capacity, rule.rate, cost]
+        )
+        return _bucket_result(float(tokens), bool(allowed), rule, cost)
+
+
+def build_store(url: Optional[str], shards: int, max_keys: int) -> RateLimitStore:
+    """انتخاب فضای ذخیره: Redis در صورت تنظیم آدرس، وگرنه درون‌پردازه‌ای."""
+    if url:
+        return RedisRateLimitStore(url)
+    return MemoryRateLimitStore(shards=shards, max_keys=max_keys)
+
+
+# ------------------- شناسایی درخواست‌دهنده -------------------
+def authenticated_user_id(scope: Scope) -> Optional[int]:
+    """
+    شناسه کاربر درخواست اگر توکن Bearer یا کلید API آن قبلاً تأیید شده و در کش
+    باشد (بدون رمزگشایی توکن یا کوئری)، وگرنه None.
+    """
+    headers = Headers(scope=scope)
+    authorization = headers.get("authorization", "")
+    if authorization[:7].lower() == "bearer ":
+        user_id = token_cache.peek(authorization[7:].strip())
+        if user_id is not None:
+            return user_id
+    api_key = headers.get("x-api-key")
+    if api_key:
+        return api_token_cache.peek(api_key)
+    return None
+
+
+def principal_key(scope: Scope, trust_forwarded: bool = False) -> str:
+    """
+    کلید سطل درخواست: کاربر (اگر توکن Bearer یا کلید API قبلاً تأیید شده باشد)
+    یا آدرس IP. توکن‌ها و کلیدهای تأییدنشده بر اساس IP محدود می‌شوند تا تولید
+    مقادیر جعلی سطل تازه‌ای نسازد.
+    """
+    user_id = authenticated_user_id(scope)
+    if user_id is not None:
+        return f"user:{user_id}"
+    headers = Headers(scope=scope)
+    if trust_forwarded:
+        forwarded = headers.get("x-forwarded-for")
+        if forwarded:
+            return "ip:" + forwarded.split(",")[0].strip()
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "unknown")
+
+
+# ------------------- میان‌افزار ASGI -------------------
+class RateLimitMiddleware:
+    """
+    میان‌افزار محدودسازی نرخ. درخواست‌های مجاز هدرهای RateLimit-* و
+    درخواست‌های رد شده پاسخ 429 همراه با Retry-After دریافت می‌کنند.
+    مسیرهایی که با هیچ قانونی منطبق نیستند محدود نمی‌شوند.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        rules: Dict[str, str],
+        store: RateLimitStore,
+        trust_forwarded: bool = False,
+    ):
+        self.app = app
+        self.store = store
+        self.trust_forwarded = trust_forwarded
+        # طولانی‌ترین پیشوند ابتدا بررسی می‌شود
+        self.rules = sorted(
+            (RateLimitRule.parse(prefix, spec) for prefix, spec in rules.items()),
+            key=lambda rule: len(rule.group),
+            reverse=True,
+        )
+        self.rejected = 0
+
+    def match(self, path: str) -> Optional[RateLimitRule]:
+        for rule in self.rules:
+            if path == rule.group or path.startswith(rule.group.rstrip("/") + "/"):
+                return rule
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        rule = self.match(scope["path"]) if scope["type"] == "http" else None
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        key = f"{rule.group}|{principal_key(scope, self.trust_forwarded)}"
+        result = await self.store.consume(key, rule)
+        headers = self._headers(rule, result)
+
+        if not result.allowed:
+            self.rejected += 1
+            headers.append((b"retry-after", str(max(math.ceil(result.retry_after), 1)).encode()))
+            body = json.dumps({"detail": "Rate limit exceeded"}).encode()
+            await send({
+                "type": "http.response.start",
+                "status": 429,
+                "headers": headers + [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                response_headers = MutableHeaders(raw=message["headers"])
+                for name, value in headers:
+                    response_headers.append(name.decode(), value.decode())
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+    @staticmethod
+    def _headers(rule: RateLimitRule, result: RateLimitResult) -> List[Tuple[bytes, bytes]]:
+        """هدرهای استاندارد پیش‌نویس IETF برای RateLimit."""
+        return [
+            (b"ratelimit-limit", str(rule.capacity).encode()),
+            (b"ratelimit-remaining", str(result.remaining).encode()),
+            (b"ratelimit-reset", str(math.ceil(result.reset_after)).encode()),
+            (b"ratelimit-policy", f"{rule.capacity};w={int(rule.window)}".encode()),
+        ]
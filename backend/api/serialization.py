@@ -0,0 +1,77 @@
+import asyncio
+import functools
+from typing import Any, Callable, Optional
+
+from fastapi import Response
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.routing import APIRoute
+from pydantic import TypeAdapter
+
+from backend.core.config import settings
+
+# ----------------------------------------------------------------------
+# مسیر سریع سریال‌سازی پاسخ‌ها (Fast Serialization Path)
+# ----------------------------------------------------------------------
+# مسیر پیش‌فرض FastAPI برای هر پاسخ: اعتبارسنجی response_model (from_attributes)
+# ← jsonable_encoder ← json استاندارد. این مسیر سریع فقط یک بار با TypeAdapter
+# اعتبارسنجی می‌کند و خروجی را مستقیماً با pydantic-core (Rust) به بایت‌های JSON
+# تبدیل می‌کند.
+
+
+@functools.lru_cache(maxsize=None)
+def get_type_adapter(tp: Any) -> TypeAdapter:
+    """TypeAdapter کش‌شده برای هر نوع پاسخ (ساخت آن پرهزینه است)."""
+    return TypeAdapter(tp)
+
+
+def render_json(tp: Any, content: Any) -> bytes:
+    """اعتبارسنجی محتوا (مثلاً اشیای ORM) بر اساس نوع پاسخ و تبدیل مستقیم به JSON."""
+    adapter = get_type_adapter(tp)
+    return adapter.dump_json(adapter.validate_python(content, from_attributes=True))
+
+
+class FastSerializationRoute(APIRoute):
+    """
+    کلاس Route که در صورت فعال بودن FAST_SERIALIZATION، خروجی Endpointهای
+    دارای response_model را از مسیر سریع سریال‌سازی عبور می‌دهد.
+
+    هدرها و status_code تنظیم شده روی پارامتر تزریقی Response (مثلاً ETag)
+    به پاسخ نهایی منتقل می‌شوند. Endpointهایی که خودشان Response برمی‌گردانند
+    (مثلاً 304) دست‌نخورده باقی می‌مانند.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        response_model = kwargs.get("response_model")
+        if (
+            settings.FAST_SERIALIZATION
+            and response_model is not None
+            and not isinstance(response_model, DefaultPlaceholder)
+            and asyncio.iscoroutinefunction(endpoint)
+        ):
+            endpoint = self._wrap_endpoint(endpoint, response_model)
+        super().__init__(path, endpoint, **kwargs)
+
+    def _wrap_endpoint(self, endpoint: Callable[..., Any], response_model: Any) -> Callable[..., Any]:
+        # functools.wraps امضای اصلی را حفظ می‌کند تا FastAPI وابستگی‌ها را درست حل کند
+        @functools.wraps(endpoint)
+        async def fast_endpoint(*args: Any, **kwargs: Any) -> Any:
+            result = await endpoint(*args, **kwargs)
+            if isinstance(result, Response):
+                return result
+
+            sub_response: Optional[Response] = next(
+                (value for value in kwargs.values() if isinstance(value, Response)), None
+            )
+            status_code = (sub_response and sub_response.status_code) or self.status_code or 200
+            response = Response(
+                content=render_json(response_model, result),
+                status_code=status_code,
+                media_type="application/json",
+            )
+            if sub_response is not None:
+                for name, value in sub_response.headers.items():
+                    if name != "content-length":
+                        response.headers[name] = value
+            return response
+
+        return fast_endpoint
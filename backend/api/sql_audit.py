@@ -0,0 +1,31 @@
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from backend.db.instrumentation import RequestStatements, current_request_statements
+
+# ----------------------------------------------------------------------
+# تشخیص الگوی N+1: شمارش دستورات SQL هر درخواست
+# ----------------------------------------------------------------------
+
+
+class StatementAuditMiddleware:
+    """
+    برای هر درخواست HTTP یک شمارنده دستورات در ContextVar قرار می‌دهد (رویدادهای
+    Cursor آن را پر می‌کنند) و پس از پایان درخواست، دستوراتی را که بیش از
+    `threshold` بار تکرار شده‌اند به عنوان N+1 احتمالی ثبت می‌کند.
+    """
+
+    def __init__(self, app: ASGIApp, *, threshold: int):
+        self.app = app
+        self.threshold = threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request = RequestStatements(scope)
+        token = current_request_statements.set(request)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_request_statements.reset(token)
+            request.finish(self.threshold)
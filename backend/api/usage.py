@@ -0,0 +1,61 @@
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from backend.api.rate_limit import authenticated_user_id
+from backend.core.usage import ANONYMOUS_USER_ID, UsageContext, UsageMeter, current_usage, usage_meter
+
+# ----------------------------------------------------------------------
+# شمارش مصرف هر درخواست برای صورت‌حساب
+# ----------------------------------------------------------------------
+
+
+class UsageMiddleware:
+    """
+    برای هر درخواست یک UsageContext در ContextVar قرار می‌دهد و پس از پایان
+    درخواست، مصرف را برای کاربر (از احراز هویت همین درخواست، یا توکن
+    تأییدشده در کش) در شمارنده‌های درون‌حافظه‌ای ثبت می‌کند.
+
+    مسیرهای دارای مدل (/answer) کاربر را خودشان صریحاً مشخص می‌کنند و
+    فراخوانی‌های بی‌نام آن‌ها به نام ANONYMOUS_USER_ID شمرده می‌شوند؛ سایر
+    درخواست‌های بی‌نام و درخواست‌هایی که به مسیری نرسیدند شمرده نمی‌شوند.
+    """
+
+    def __init__(self, app: ASGIApp, *, meter: UsageMeter = usage_meter):
+        self.app = app
+        self.meter = meter
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        usage = UsageContext()
+        token = current_usage.set(usage)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            current_usage.reset(token)
+            route = scope.get("route")
+            user_id = usage.user_id if usage.user_id is not None else authenticated_user_id(scope)
+            if user_id is None and usage.model is not None:
+                user_id = ANONYMOUS_USER_ID
+            if route is not None and user_id is not None:
+                self.meter.record(
+                    user_id,
+                    usage.model or f"{scope['method']} {route.path}",
+                    errors=1 if usage.failed or status >= 500 else 0,
+                    prompt_chars=usage.prompt_chars,
+                    completion_chars=usage.completion_chars,
+                    latency_ms=round((time.perf_counter() - started) * 1000),
+                    upstream_ms=usage.upstream_ms,
+                )
@@ -0,0 +1,223 @@
+# مجموعه بنچمارک آفلاین برای اندپوینت‌های CRUD.
+#
+# برنامه FastAPI به صورت درون‌پردازه‌ای (ASGI transport) و بدون شبکه اجرا می‌شود و
+# وابستگی get_db به یک دیتابیس جداگانه (SQLite یا PostgreSQL موقت) بازنویسی می‌شود.
+# برای هر اندپوینت: درخواست بر ثانیه، صدک‌های تأخیر و تعداد دستورات SQL هر درخواست.
+#
+#     python -m backend.benchmarks.api_suite --users 50 --items-per-user 100 --save baseline.json
+#     python -m backend.benchmarks.api_suite --baseline baseline.json   # خروجی 1 در صورت پسرفت
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+
+from backend.benchmarks import bootstrap  # noqa: F401  (باید پیش از ایمپورت برنامه باشد)
+
+# همه درخواست‌ها از یک آدرس می‌آیند؛ بدون این، محدودیت نرخ پس از چند صد
+# درخواست پاسخ‌ها را به 429 تبدیل می‌کند و اندپوینت‌های بعدی اندازه‌گیری نمی‌شوند
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+import httpx
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.api import deps
+from backend.core.database import Base as CoreBase
+from backend.db import base as db_base  # noqa: F401  (ثبت همه مدل‌ها روی CoreBase)
+from backend.main import app
+
+# سناریو: تابعی که با (client, i) یک درخواست می‌سازد و پاسخ را برمی‌گرداند
+Scenario = Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]]
+
+
+class StatementCounter:
+    """شمارش دستورات SQL اجرا شده روی موتور بنچمارک."""
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args: Any) -> None:
+        self.count += 1
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def seed(client: httpx.AsyncClient, users: int, items_per_user: int) -> Dict[str, List[int]]:
+    """ایجاد داده اولیه از طریق خود API تا مسیر واقعی ایجاد رکورد پیموده شود."""
+    user_ids, item_ids = [], []
+    for u in range(users):
+        response = await client.post(
+            "/api/v1/users/",
+            json={"email": f"seed{u}@example.com", "password": "seed-password", "full_name": f"Seed {u}"},
+        )
+        response.raise_for_status()
+        user_ids.append(response.json()["id"])
+    for owner_id in user_ids:
+        for n in range(items_per_user):
+            response = await client.post(
+                "/api/v1/items/",
+                json={"title": f"item {n} of {owner_id}", "description": "seeded " * 8, "owner_id": owner_id},
+            )
+            response.raise_for_status()
+            item_ids.append(response.json()["id"])
+    return {"users": user_ids, "items": item_ids}
+
+
+def build_scenarios(ids: Dict[str, List[int]], rng: random.Random) -> Dict[str, Scenario]:
+    """سناریوهای بنچمارک، یکی برای هر اندپوینت."""
+    users, items = ids["users"], ids["items"]
+    return {
+        "read_items": lambda c, i: c.get("/api/v1/items/", params={"skip": rng.randrange(max(len(items) - 100, 1)), "limit": 100}),
+        "read_item_by_id": lambda c, i: c.get(f"/api/v1/items/{rng.choice(items)}"),
+        "create_item": lambda c, i: c.post("/api/v1/items/", json={"title": f"bench {i}", "description": "bench", "owner_id": rng.choice(users)}),
+        "update_item": lambda c, i: c.put(f"/api/v1/items/{rng.choice(items)}", json={"title": f"updated {i}"}),
+        "search_items": lambda c, i: c.get("/api/v1/items/search", params={"q": "seeded"}),
+        "read_users": lambda c, i: c.get("/api/v1/users/", params={"limit": 100}),
+        "read_user_by_id": lambda c, i: c.get(f"/api/v1/users/{rng.choice(users)}"),
+        "read_user_stats": lambda c, i: c.get(f"/api/v1/users/{rng.choice(users)}/stats"),
+        "update_user": lambda c, i: c.put(f"/api/v1/users/{rng.choice(users)}", json={"full_name": f"Bench {i}"}),
+    }
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    counter: StatementCounter,
+    requests: int,
+    concurrency: int,
+) -> Dict[str, float]:
+    """اجرای `requests` درخواست با همزمانی `concurrency` و جمع‌آوری آمار."""
+    latencies: List[float] = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> None:
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            response = await scenario(client, i)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    statements_before = counter.count
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+
+    ordered = sorted(latencies)
+    return {
+        "requests": requests,
+        "errors": errors,
+        "rps": requests / elapsed,
+        "p50_ms": statistics.median(ordered) * 1000,
+        "p90_ms": percentile(ordered, 0.90) * 1000,
+        "p99_ms": percentile(ordered, 0.99) * 1000,
+        "max_ms": ordered[-1] * 1000,
+        "sql_per_request": (counter.count - statements_before) / requests,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    مقایسه نتایج با خط پایه. افت rps یا افزایش p50/p99 بیش از `tolerance`
+    و هر افزایش در تعداد دستورات SQL به عنوان پسرفت گزارش می‌شود.
+    """
+    regressions = []
+    for name, result in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        if result["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: rps {base['rps']:.1f} -> {result['rps']:.1f}")
+        for key in ("p50_ms", "p99_ms"):
+            if result[key] > base[key] * (1 + tolerance):
+                regressions.append(f"{name}: {key} {base[key]:.2f} -> {result[key]:.2f}")
+        if result["sql_per_request"] > base["sql_per_request"] + 1e-9:
+            regressions.append(
+                f"{name}: sql/request {base['sql_per_request']:.2f} -> {result['sql_per_request']:.2f}"
+            )
+    return regressions
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description="Offline CRUD API benchmark suite")
+    parser.add_argument("--url", default="sqlite+aiosqlite:///./bench_api.db", help="throwaway database URL")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--items-per-user", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=500, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--only", nargs="*", help="run only these endpoints")
+    parser.add_argument("--save", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="compare against this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    args = parser.parse_args()
+
+    engine = create_async_engine(args.url)
+    async with engine.begin() as conn:
+        await conn.run_sync(CoreBase.metadata.drop_all)
+        await conn.run_sync(CoreBase.metadata.create_all)
+    counter = StatementCounter(engine)
+    session_maker = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def get_bench_db():
+        async with session_maker() as db:
+            yield db
+
+    app.dependency_overrides[deps.get_db] = get_bench_db
+
+    rng = random.Random(1234)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        ids = await seed(client, args.users, args.items_per_user)
+        scenarios = build_scenarios(ids, rng)
+        results = {}
+        for name, scenario in scenarios.items():
+            if args.only and name not in args.only:
+                continue
+            results[name] = await run_scenario(client, scenario, counter, args.requests, args.concurrency)
+            r = results[name]
+            print(
+                f"{name:18s} rps={r['rps']:8.1f}  p50={r['p50_ms']:7.2f}ms  p90={r['p90_ms']:7.2f}ms  "
+                f"p99={r['p99_ms']:7.2f}ms  sql/req={r['sql_per_request']:.2f}  errors={r['errors']}"
+            )
+    await engine.dispose()
+
+    report = {
+        "meta": {
+            "dialect": engine.dialect.name,
+            "users": args.users,
+            "items_per_user": args.items_per_user,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "python": platform.python_version(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    if args.save:
+        with open(args.save, "w") as fh:
+            json.dump(report, fh, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as fh:
+            regressions = compare(report, json.load(fh), args.tolerance)
+        for line in regressions:
+            print("REGRESSION", line)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,102 @@
+# بنچمارک تأخیر بررسی توکن API برای توکن‌های معتبر و نامعتبر:
+# سرد (کش‌ها خالی، رفت‌وبرگشت به دیتابیس) در برابر گرم (کش مثبت/منفی).
+#
+#     python -m backend.benchmarks.api_token_lookup --tokens 100000 --lookups 2000
+
+import argparse
+import asyncio
+import secrets
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.benchmarks.api_suite import percentile  # بوت‌استرپ تنظیمات
+from backend.core.auth_cache import api_token_cache, invalid_token_cache
+from backend.core.database import Base as CoreBase
+from backend.crud.api_token import api_token as crud_api_token, hash_token
+from backend.db.models import APIToken, User
+
+# فقط جداولی که بنچمارک پر می‌کند
+TABLES = [User.__table__, APIToken.__table__]
+
+
+async def seed(session_maker, count: int, user_id: int) -> List[str]:
+    """درج `count` توکن معتبر (به صورت هش‌شده) و برگرداندن توکن‌های خام."""
+    tokens = [secrets.token_urlsafe(32) for _ in range(count)]
+    expires = datetime.now(timezone.utc) + timedelta(days=30)
+    async with session_maker() as db:
+        db.add(User(id=user_id, email=f"tokens{user_id}@example.com", hashed_password="-"))
+        await db.flush()
+        for start in range(0, count, 5000):
+            await db.execute(insert(APIToken), [
+                {"token_hash": hash_token(t), "user_id": user_id, "expires_at": expires}
+                for t in tokens[start:start + 5000]
+            ])
+        await db.commit()
+    return tokens
+
+
+async def measure(
+    session_maker, tokens: List[str], expect_valid: bool, reset: Callable[[], None]
+) -> Dict[str, float]:
+    samples = []
+    async with session_maker() as db:
+        for token in tokens:
+            reset()
+            started = time.perf_counter()
+            user_id = await crud_api_token.authenticate(db, token=token)
+            samples.append(time.perf_counter() - started)
+            assert (user_id is not None) == expect_valid
+    ordered = sorted(samples)
+    return {
+        "p50_us": statistics.median(ordered) * 1e6,
+        "p99_us": percentile(ordered, 0.99) * 1e6,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="API token lookup benchmark")
+    parser.add_argument("--url", default="sqlite+aiosqlite:///./bench_tokens.db", help="throwaway database URL")
+    parser.add_argument("--tokens", type=int, default=100_000)
+    parser.add_argument("--lookups", type=int, default=2000)
+    args = parser.parse_args()
+
+    engine = create_async_engine(args.url)
+    async with engine.begin() as conn:
+        await conn.run_sync(CoreBase.metadata.drop_all, tables=TABLES)
+        await conn.run_sync(CoreBase.metadata.create_all, tables=TABLES)
+    session_maker = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    tokens = await seed(session_maker, args.tokens, user_id=1)
+    valid = tokens[: args.lookups]
+    invalid = [secrets.token_urlsafe(32) for _ in range(args.lookups)]
+
+    def clear_all() -> None:
+        api_token_cache.clear()
+        invalid_token_cache.clear()
+
+    def keep() -> None:
+        pass
+
+    cases = [
+        ("valid   cold", valid, True, clear_all),
+        ("valid   warm", valid, True, keep),
+        ("invalid cold", invalid, False, clear_all),
+        ("invalid warm", invalid, False, keep),
+    ]
+    for name, sample, expect_valid, reset in cases:
+        if reset is keep:
+            # یک دور بدون اندازه‌گیری تا کش‌ها پر شوند
+            await measure(session_maker, sample, expect_valid, keep)
+        r = await measure(session_maker, sample, expect_valid, reset)
+        print(f"{name}  p50={r['p50_us']:9.1f}us  p99={r['p99_us']:9.1f}us")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
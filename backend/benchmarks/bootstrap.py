@@ -0,0 +1,15 @@
+# مقادیر پیش‌فرض برای متغیرهای الزامی Settings تا ایمپورت برنامه در بنچمارک‌ها
+# بدون فایل .env ممکن باشد. باید پیش از هر ایمپورتی از backend ایمپورت شود.
+
+import os
+
+for _key, _value in {
+    "POSTGRES_SERVER": "localhost",
+    "POSTGRES_USER": "bench",
+    "POSTGRES_PASSWORD": "bench",
+    "POSTGRES_DB": "bench",
+    "SECRET_KEY": "benchmark-secret-key",
+    "FIRST_SUPERUSER_EMAIL": "admin@example.com",
+    "FIRST_SUPERUSER_PASSWORD": "benchmark-password",
+}.items():
+    os.environ.setdefault(_key, _value)
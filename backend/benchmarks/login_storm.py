@@ -0,0 +1,71 @@
+# بنچمارک هجوم ورود (Login Storm): تأخیر یک کار نامرتبط روی event loop در حالی که
+# چندین بررسی bcrypt همزمان اجرا می‌شوند؛ اجرای مستقیم در event loop در برابر استخر هش.
+#
+#     python -m backend.benchmarks.login_storm --logins 200 --rounds 12
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Awaitable, Callable, Dict, List
+
+from backend.benchmarks.api_suite import percentile  # بوت‌استرپ تنظیمات
+from backend.core import security
+
+
+async def probe_latency(stop: asyncio.Event, interval: float = 0.001) -> List[float]:
+    """
+    شبیه‌سازی یک درخواست نامرتبط: هر `interval` ثانیه بیدار می‌شود و تأخیر
+    اضافه تا اجرای واقعی را ثبت می‌کند (lag ناشی از مسدود شدن event loop).
+    """
+    lags = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - started - interval)
+    return lags
+
+
+async def storm(verify: Callable[[str, str], Awaitable[bool]], hashed: str, logins: int) -> Dict[str, float]:
+    stop = asyncio.Event()
+    probe = asyncio.create_task(probe_latency(stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(verify("correct horse battery staple", hashed) for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    lags = sorted(await probe)
+    return {
+        "logins_per_s": logins / elapsed,
+        "lag_p50_ms": statistics.median(lags) * 1000,
+        "lag_p99_ms": percentile(lags, 0.99) * 1000,
+        "lag_max_ms": lags[-1] * 1000,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="bcrypt login storm benchmark")
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=12)
+    args = parser.parse_args()
+
+    context = security.get_pwd_context().copy(bcrypt__rounds=args.rounds)
+    hashed = context.hash("correct horse battery staple")
+
+    async def inline(plain: str, digest: str) -> bool:
+        return context.verify(plain, digest)
+
+    async def pooled(plain: str, digest: str) -> bool:
+        return await security.password_hasher.run(context.verify, plain, digest)
+
+    for name, verify in (("inline", inline), ("pooled", pooled)):
+        r = await storm(verify, hashed, args.logins)
+        print(
+            f"{name:7s} logins/s={r['logins_per_s']:7.1f}  unrelated lag p50={r['lag_p50_ms']:7.2f}ms  "
+            f"p99={r['lag_p99_ms']:7.2f}ms  max={r['lag_max_ms']:7.2f}ms"
+        )
+    print(security.password_hasher.snapshot())
+    security.password_hasher.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,97 @@
+# بنچمارک مقیاس‌پذیری اجراکننده چندپردازه‌ای: درخواست بر ثانیه مسیر سلامت (/)
+# با 1، 2، 4، ... Worker و بازده نسبت به مقیاس خطی.
+#
+#     python -m backend.benchmarks.runner_scaling --workers 1 2 4 --duration 10
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import subprocess
+import sys
+import time
+from typing import List
+
+import httpx
+
+from backend.benchmarks import bootstrap  # noqa: F401  (مقادیر پیش‌فرض env برای سرور)
+
+
+async def _load(url: str, concurrency: int, duration: float) -> int:
+    done = 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits) as client:
+        async def loop() -> None:
+            nonlocal done
+            while time.perf_counter() < deadline:
+                response = await client.get(url)
+                if response.status_code == 200:
+                    done += 1
+
+        await asyncio.gather(*(loop() for _ in range(concurrency)))
+    return done
+
+
+def _load_process(url: str, concurrency: int, duration: float, results) -> None:
+    results.put(asyncio.run(_load(url, concurrency, duration)))
+
+
+def wait_ready(url: str, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"server at {url} did not become ready")
+
+
+def measure(workers: int, port: int, clients: int, concurrency: int, duration: float) -> float:
+    """راه‌اندازی سرور با `workers` Worker و اندازه‌گیری درخواست بر ثانیه."""
+    env = dict(os.environ, RATE_LIMIT_ENABLED="false", DB_WARMUP_ENABLED="false")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "backend.server", "--workers", str(workers),
+         "--port", str(port), "--host", "127.0.0.1", "--max-requests", "0"],
+        env=env,
+    )
+    url = f"http://127.0.0.1:{port}/"
+    try:
+        wait_ready(url)
+        results = multiprocessing.Queue()
+        loaders: List[multiprocessing.Process] = [
+            multiprocessing.Process(target=_load_process, args=(url, concurrency, duration, results))
+            for _ in range(clients)
+        ]
+        for p in loaders:
+            p.start()
+        total = sum(results.get() for _ in loaders)
+        for p in loaders:
+            p.join()
+        return total / duration
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Multi-process runner scaling benchmark")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--clients", type=int, default=4, help="load generator processes")
+    parser.add_argument("--concurrency", type=int, default=32, help="connections per load process")
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    baseline = None
+    for workers in args.workers:
+        rps = measure(workers, args.port, args.clients, args.concurrency, args.duration)
+        baseline = baseline or rps / workers
+        print(f"workers={workers:3d}  rps={rps:9.1f}  linear efficiency={rps / (baseline * workers):6.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# بنچمارک زمان پاسخ جستجوی معنایی (top-k روی ایندکس برداری mmap) با 100 هزار و
+# 1 میلیون آیتم. بردارها تصادفی و نرمال‌شده‌اند؛ زمان محاسبه بردار عبارت جستجو
+# جدا گزارش می‌شود. فایل‌های ایندکس در یک پوشه موقت ساخته و سپس حذف می‌شوند.
+#
+#     python -m backend.benchmarks.semantic_search --sizes 100000 1000000 --dim 256
+
+from backend.benchmarks import bootstrap  # noqa: F401
+
+import argparse
+import shutil
+import statistics
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from backend.core.embeddings import HashingEmbedder
+from backend.core.vector_index import VectorIndex
+
+WRITE_CHUNK = 100_000
+QUERIES = ["red apple pie", "engine repair manual", "کتاب آموزش برنامه نویسی", "cheap flights"]
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "p50": statistics.median(ordered) * 1000,
+        "p95": ordered[int(0.95 * (len(ordered) - 1))] * 1000,
+        "max": ordered[-1] * 1000,
+    }
+
+
+def measure(fn: Callable[[], object], repeat: int) -> Dict[str, float]:
+    fn()  # گرم کردن Page Cache
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return summarize(samples)
+
+
+def seed(index: VectorIndex, total: int, owners: int, rng: "np.random.Generator") -> None:
+    """نوشتن `total` بردار تصادفی نرمال‌شده در دسته‌های WRITE_CHUNK تایی."""
+    for start in range(0, total, WRITE_CHUNK):
+        count = min(WRITE_CHUNK, total - start)
+        vectors = rng.standard_normal((count, index.dim), dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        index.write(
+            list(range(start + 1, start + count + 1)),
+            rng.integers(1, owners + 1, count).tolist(),
+            vectors,
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Semantic search (vector top-k) latency benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--owners", type=int, default=1000, help="distinct owner_id values")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    embedder = HashingEmbedder(args.dim)
+    queries = [embedder.embed_query(query) for query in QUERIES]
+    embed = measure(lambda: embedder.embed_query(QUERIES[0]), args.repeat)
+    print("query embedding  " + "  ".join(f"{k}={v:.3f}ms" for k, v in embed.items()))
+
+    for size in args.sizes:
+        directory = tempfile.mkdtemp(prefix="bench_vectors_")
+        try:
+            index = VectorIndex(directory, "items", args.dim, embedder=embedder.name)
+            t0 = time.perf_counter()
+            seed(index, size, args.owners, rng)
+            print(
+                f"\n{size:,} vectors x {args.dim} dims: seeded in {time.perf_counter() - t0:.1f}s, "
+                f"matrix {index.snapshot()['matrix_bytes'] / 2**20:.0f} MiB"
+            )
+            counter = iter(range(10**9))
+            workloads = {
+                "top-k": lambda: index.search(queries[next(counter) % len(queries)], args.k),
+                "top-k owner": lambda: index.search(
+                    queries[next(counter) % len(queries)], args.k, owner_id=1 + next(counter) % args.owners
+                ),
+            }
+            for name, fn in workloads.items():
+                line = "  ".join(f"{k}={v:.2f}ms" for k, v in measure(fn, args.repeat).items())
+                print(f"  {name:12s} {line}")
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
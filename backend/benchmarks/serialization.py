@@ -0,0 +1,77 @@
+# میکروبنچمارک سریال‌سازی پاسخ: هزینه هر ردیف در مسیر پیش‌فرض FastAPI
+# (serialize_response + jsonable_encoder + JSONResponse) در برابر مسیر سریع
+# (TypeAdapter کش‌شده + dump_json) برای لیست آیتم‌ها.
+#
+#     python -m backend.benchmarks.serialization --rows 100 --repeat 200
+
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from backend.api.serialization import render_json
+from backend.schemas.item import ItemInDB
+
+
+def make_rows(count: int) -> List[Any]:
+    """ردیف‌های شبیه ORM (دسترسی با attribute) مانند خروجی crud_item.get_multi."""
+    now = datetime(2024, 1, 1)
+    return [
+        SimpleNamespace(
+            id=i,
+            owner_id=i % 50,
+            title=f"item {i}",
+            description="benchmark description " * 4,
+            created_at=now + timedelta(seconds=i),
+            updated_at=now + timedelta(seconds=i),
+        )
+        for i in range(count)
+    ]
+
+
+async def default_path(rows: List[Any]) -> bytes:
+    field = create_response_field(name="Response_read_items", type_=List[ItemInDB])
+    content = await serialize_response(field=field, response_content=rows)
+    return JSONResponse(content).body
+
+
+async def fast_path(rows: List[Any]) -> bytes:
+    return render_json(List[ItemInDB], rows)
+
+
+async def measure(fn: Callable[[List[Any]], Any], rows: List[Any], repeat: int) -> Dict[str, float]:
+    await fn(rows)  # گرم کردن کش‌ها
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn(rows)
+        samples.append(time.perf_counter() - start)
+    median = statistics.median(samples)
+    return {"median_ms": median * 1000, "per_row_us": median / len(rows) * 1e6}
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Response serialization micro-benchmark")
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    results = {
+        "default": await measure(default_path, rows, args.repeat),
+        "fast": await measure(fast_path, rows, args.repeat),
+    }
+    for name, r in results.items():
+        print(f"{name:8s} median={r['median_ms']:8.3f}ms  per_row={r['per_row_us']:7.2f}us")
+    print(f"speedup  x{results['default']['median_ms'] / results['fast']['median_ms']:.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,81 @@
+# بنچمارک زمان شروع (Cold Start): زمان ایمپورت backend.main، ساخت برنامه با
+# create_app و خلاصه گزارش `python -X importtime` (پرهزینه‌ترین ماژول‌ها).
+#
+#     python -m backend.benchmarks.startup --runs 5 --top 25
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from backend.benchmarks import bootstrap  # noqa: F401  (مقادیر پیش‌فرض env برای پردازه فرزند)
+
+# کد اجرا شده در پردازه تازه؛ زمان‌ها به میلی‌ثانیه چاپ می‌شوند
+PROBE = """
+import time
+t0 = time.perf_counter()
+import backend.main as main
+t1 = time.perf_counter()
+main.create_app()
+t2 = time.perf_counter()
+print(f"{(t1 - t0) * 1000:.3f} {(t2 - t1) * 1000:.3f}")
+"""
+
+
+def run_probe(importtime: bool) -> Tuple[float, float, str]:
+    """اجرای PROBE در یک مفسر تازه؛ خروجی stderr شامل گزارش importtime است."""
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", PROBE]
+    proc = subprocess.run(cmd, capture_output=True, text=True, env=os.environ.copy(), check=True)
+    import_ms, create_ms = (float(x) for x in proc.stdout.split()[-2:])
+    return import_ms, create_ms, proc.stderr
+
+
+def summarize_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """
+    تبدیل خطوط «import time: self [us] | cumulative | package» به فهرست
+    (ماژول، self، cumulative) به میکروثانیه.
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        rows.append((name, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def top_level_totals(rows: List[Tuple[str, int, int]]) -> Dict[str, int]:
+    """جمع زمان self به تفکیک بسته سطح بالا (مثلاً sqlalchemy، pydantic، backend)."""
+    totals: Dict[str, int] = defaultdict(int)
+    for name, self_us, _ in rows:
+        totals[name.split(".")[0]] += self_us
+    return totals
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Startup / import-time benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=25)
+    args = parser.parse_args()
+
+    samples = [run_probe(importtime=False)[:2] for _ in range(args.runs)]
+    print(f"import backend.main  median={statistics.median(s[0] for s in samples):8.1f}ms")
+    print(f"create_app()         median={statistics.median(s[1] for s in samples):8.1f}ms")
+
+    rows = summarize_importtime(run_probe(importtime=True)[2])
+    print(f"\nmodules imported: {len(rows)}   total self time: {sum(r[1] for r in rows) / 1000:.1f}ms")
+
+    print(f"\ntop {args.top} modules by cumulative time:")
+    for name, self_us, cumulative_us in sorted(rows, key=lambda r: r[2], reverse=True)[: args.top]:
+        print(f"  {cumulative_us / 1000:8.1f}ms  (self {self_us / 1000:6.1f}ms)  {name}")
+
+    print("\nself time by top-level package:")
+    for package, total in sorted(top_level_totals(rows).items(), key=lambda kv: kv[1], reverse=True)[: args.top]:
+        print(f"  {total / 1000:8.1f}ms  {package}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+# سناریوی مسیریابی بین ارائه‌دهنده‌های مدل با سرورهای جایگزین محلی (Stand-in)
+# برای Hugging Face، Gemini و مدل محلی سازگار با OpenAI. هر سرور قالب پاسخ
+# ارائه‌دهنده خودش را برمی‌گرداند و زمان پاسخ و خطای آن در هر مرحله تغییر می‌کند:
+#
+#   healthy        همه سالم (local سریع‌ترین و ارزان‌ترین)
+#   local-down     local با 503 پاسخ می‌دهد (Failover و کنار گذاشتن)
+#   local-back     local بهبود می‌یابد (بازگشت با درخواست‌های آزمایشی)
+#   gemini-slow    local کند و gemini کند؛ fastest باید به huggingface برود
+#
+#     python -m backend.benchmarks.upstream_routing --requests 300 --concurrency 8
+
+from backend.benchmarks import bootstrap  # noqa: F401
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from backend.core.routing import ProviderRouter
+from backend.core.upstream import GeminiClient, HuggingFaceClient, LocalModelClient, UpstreamError
+
+# (زمان پاسخ به ثانیه، خطا) هر سرور در هر مرحله
+SCENARIO: List[Tuple[str, Dict[str, Tuple[float, bool]]]] = [
+    ("healthy", {"huggingface": (0.12, False), "gemini": (0.06, False), "local": (0.03, False)}),
+    ("local-down", {"huggingface": (0.12, False), "gemini": (0.06, False), "local": (0.01, True)}),
+    ("local-back", {"huggingface": (0.12, False), "gemini": (0.06, False), "local": (0.03, False)}),
+    ("gemini-slow", {"huggingface": (0.12, False), "gemini": (0.40, False), "local": (0.25, False)}),
+]
+
+
+class StandInServer:
+    """سرور HTTP/1.1 حداقلی (keep-alive) که پاسخ یک ارائه‌دهنده را شبیه‌سازی می‌کند."""
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.latency = 0.05
+        self.failing = False
+        self.calls = 0
+        self.port = 0
+        self._server = None
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def _body(self) -> Dict:
+        text = f"answer from {self.kind}"
+        if self.kind == "huggingface":
+            return [{"generated_text": text}]
+        if self.kind == "gemini":
+            return {"candidates": [{"content": {"parts": [{"text": text}]}}]}
+        return {"choices": [{"message": {"role": "assistant", "content": text}}]}
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.decode().split("\r\n")[1:]:
+                    name, _, value = line.partition(":")
+                    if name.lower() == "content-length":
+                        length = int(value)
+                await reader.readexactly(length)
+                self.calls += 1
+                await asyncio.sleep(self.latency * random.uniform(0.8, 1.2))
+                if self.failing:
+                    status, body = "503 Service Unavailable", {"error": "overloaded"}
+                else:
+                    status, body = "200 OK", self._body()
+                payload = json.dumps(body).encode()
+                writer.write(
+                    f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(payload)}\r\n\r\n".encode() + payload
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def stop(self) -> None:
+        self._server.close()
+        await self._server.wait_closed()
+
+
+async def run_phase(router: ProviderRouter, requests: int, concurrency: int) -> Dict:
+    chosen: Counter = Counter()
+    latencies: List[float] = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        nonlocal errors
+        async with semaphore:
+            t0 = time.perf_counter()
+            try:
+                provider, _ = await router.generate("stand-in prompt", route="/answer")
+                chosen[provider.name] += 1
+            except UpstreamError:
+                errors += 1
+            latencies.append(time.perf_counter() - t0)
+
+    await asyncio.gather(*(one() for _ in range(requests)))
+    ordered = sorted(latencies)
+    return {
+        "chosen": dict(chosen),
+        "errors": errors,
+        "p50_ms": statistics.median(ordered) * 1000,
+        "p95_ms": ordered[int(0.95 * (len(ordered) - 1))] * 1000,
+    }
+
+
+async def run_policy(policy: str, servers: Dict[str, StandInServer], args: argparse.Namespace) -> None:
+    providers = [
+        HuggingFaceClient(f"{servers['huggingface'].url}/models/stand-in", None, 5.0, cost=1.0),
+        GeminiClient(servers["gemini"].url, "stand-in-key", "gemini-stand-in", 5.0, cost=2.0),
+        LocalModelClient(f"{servers['local'].url}/v1", "local-stand-in", 5.0, cost=0.0),
+    ]
+    router = ProviderRouter(
+        providers,
+        alpha=0.2,
+        eject_after=3,
+        error_threshold=0.5,
+        eject_seconds=args.eject_seconds,
+        probe_ratio=args.probe_ratio,
+        max_attempts=3,
+        default_policy=policy,
+        policies={},
+    )
+    print(f"\npolicy={policy}")
+    try:
+        for phase, behaviour in SCENARIO:
+            for name, (latency, failing) in behaviour.items():
+                servers[name].latency, servers[name].failing = latency, failing
+            result = await run_phase(router, args.requests, args.concurrency)
+            share = "  ".join(f"{name}={count}" for name, count in sorted(result["chosen"].items()))
+            states = "  ".join(
+                f"{name}:{info['state']}" for name, info in router.snapshot()["providers"].items()
+            )
+            print(
+                f"  {phase:12s} p50={result['p50_ms']:.0f}ms  p95={result['p95_ms']:.0f}ms  "
+                f"errors={result['errors']}  served: {share}  | {states}"
+            )
+            if phase == "local-down":
+                # فرصت پایان مدت کنار گذاشتن، تا مرحله بعد بازگشت با Probe را نشان دهد
+                await asyncio.sleep(args.eject_seconds)
+    finally:
+        await router.aclose()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Multi-provider routing scenario with local stand-in servers")
+    parser.add_argument("--requests", type=int, default=300, help="requests per phase")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--eject-seconds", type=float, default=1.0)
+    parser.add_argument("--probe-ratio", type=float, default=0.05)
+    args = parser.parse_args()
+
+    servers = {kind: StandInServer(kind) for kind in ("huggingface", "gemini", "local")}
+    for server in servers.values():
+        await server.start()
+    try:
+        for policy in ("fastest", "cheapest"):
+            await run_policy(policy, servers, args)
+    finally:
+        for server in servers.values():
+            await server.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
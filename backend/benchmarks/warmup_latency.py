@@ -0,0 +1,84 @@
+# بنچمارک تأخیر اولین 100 درخواست پس از شروع برنامه، با و بدون مرحله گرم‌کردن.
+#
+# اجرا (نیازمند دیتابیس PostgreSQL پیکربندی شده در .env):
+#     python -m backend.benchmarks.warmup_latency --requests 100
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Dict, List
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from backend.core.config import settings
+from backend.crud.crud_user import user as crud_user
+from backend.crud.item import item as crud_item
+from backend.db.session import build_engine
+from backend.db.warmup import collect_hot_statements, warm_up_engine
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """خلاصه آماری تأخیرها به میلی‌ثانیه."""
+    ordered = sorted(samples)
+
+    def pick(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    return {
+        "first": samples[0] * 1000,
+        "p50": statistics.median(ordered) * 1000,
+        "p95": pick(0.95) * 1000,
+        "p99": pick(0.99) * 1000,
+        "max": ordered[-1] * 1000,
+        "total": sum(ordered) * 1000,
+    }
+
+
+async def run(warm: bool, requests: int, concurrency: int) -> Dict[str, float]:
+    """
+    یک موتور تازه می‌سازد (مثل یک استقرار جدید) و `requests` درخواست CRUD
+    را با همزمانی `concurrency` اجرا می‌کند.
+    """
+    engine = build_engine()
+    session_maker = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    if warm:
+        await warm_up_engine(engine, collect_hot_statements(), settings.DB_POOL_MIN_CONNECTIONS)
+
+    # ترکیب درخواست‌ها مشابه ترافیک واقعی: خواندن تکی، فهرست و جستجوی ایمیل
+    calls = [
+        lambda db, i: crud_user.get(db, id=i),
+        lambda db, i: crud_item.get(db, id=i),
+        lambda db, i: crud_item.get_multi(db, skip=0, limit=100),
+        lambda db, i: crud_user.get_by_email(db, email=f"user{i}@example.com"),
+    ]
+    semaphore = asyncio.Semaphore(concurrency)
+    samples: List[float] = [0.0] * requests
+
+    async def one(i: int) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            async with session_maker() as db:
+                await calls[i % len(calls)](db, i)
+            samples[i] = time.perf_counter() - start
+
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    await engine.dispose()
+    return summarize(samples)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="First-N-requests latency with/without warm-up")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    for warm in (False, True):
+        result = await run(warm, args.requests, args.concurrency)
+        label = "with warm-up   " if warm else "without warm-up"
+        print(label, "  ".join(f"{k}={v:.2f}ms" for k, v in result.items()))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,209 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple, Type
+
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+
+from backend.core.config import settings
+
+# ----------------------------------------------------------------------
+# کش احراز هویت: توکن‌های تأییدشده و ردیف کاربر جاری (Principal)
+# ----------------------------------------------------------------------
+# هر دو کش درون‌پردازه‌ای هستند؛ در اجرای چندپردازه‌ای، ابطال در یک پردازه به
+# سایر پردازه‌ها نمی‌رسد و TTL کوتاه کش کاربر حداکثر تأخیر را محدود می‌کند.
+
+
+def token_key(token: str) -> str:
+    """کلید کش توکن: هش SHA-256 آن (خود توکن در حافظه نگه‌داری نمی‌شود)."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _drop_oldest(entries: "OrderedDict[Any, Any]", fraction: float) -> int:
+    """حذف کسری از قدیمی‌ترین ورودی‌ها (برای نگهبان حافظه)؛ تعداد حذف‌شده‌ها."""
+    count = int(len(entries) * fraction)
+    for _ in range(count):
+        entries.popitem(last=False)
+    return count
+
+
+class VerifiedTokenCache:
+    """
+    کش LRU محدود از توکن‌هایی که امضا و اعتبارشان یک بار بررسی شده است.
+    هر ورودی دقیقاً تا زمان exp توکن معتبر است؛ توکن‌های بدون exp کش نمی‌شوند.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        # token_key -> (user_id, exp به ثانیه یونیکس)
+        self._entries: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str) -> Optional[int]:
+        """شناسه کاربر توکن در صورت وجود در کش و منقضی نشدن."""
+        key = token_key(token)
+        entry = self._entries.get(key)
+        if entry is None or entry[1] <= time.time():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def peek(self, token: str) -> Optional[int]:
+        """مانند get اما بدون تغییر ترتیب LRU و آمار (برای میان‌افزارها)."""
+        entry = self._entries.get(token_key(token))
+        if entry is None or entry[1] <= time.time():
+            return None
+        return entry[0]
+
+    def put(self, token: str, user_id: int, exp: Optional[float]) -> None:
+        if exp is None or self.max_size <= 0:
+            return
+        key = token_key(token)
+        self._entries[key] = (user_id, exp)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def discard(self, token: str) -> None:
+        self._entries.pop(token_key(token), None)
+
+    def shrink(self, fraction: float) -> int:
+        return _drop_oldest(self._entries, fraction)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class NegativeCache:
+    """
+    کش محدود از هش توکن‌هایی که در دیتابیس یافت نشدند، تا تکرار یک توکن
+    نامعتبر بدون کوئری رد شود. یک توکن تازه صادرشده (تصادفی) عملاً هرگز قبلاً
+    در این کش قرار نگرفته است، پس این کش حتی بین چند Worker نیز امن است.
+    """
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        # هش توکن -> زمان انقضای ورودی (monotonic)
+        self._entries: "OrderedDict[str, float]" = OrderedDict()
+        self.hits = 0
+
+    def __contains__(self, key: str) -> bool:
+        deadline = self._entries.get(key)
+        if deadline is None:
+            return False
+        if deadline <= time.monotonic():
+            del self._entries[key]
+            return False
+        self.hits += 1
+        return True
+
+    def add(self, key: str) -> None:
+        if self.ttl <= 0 or self.max_size <= 0:
+            return
+        self._entries[key] = time.monotonic() + self.ttl
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def shrink(self, fraction: float) -> int:
+        return _drop_oldest(self._entries, fraction)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class PrincipalCache:
+    """
+    کش کوتاه‌مدت ردیف کاربر بر اساس شناسه. مقادیر ستون‌ها (و نه خود شیء ORM)
+    ذخیره می‌شوند و هنگام استفاده با merge(load=False) بدون کوئری به نشست
+    جاری متصل می‌شوند.
+    """
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        # user_id -> (مقادیر ستون‌ها، زمان انقضا به صورت monotonic)
+        self._entries: "OrderedDict[Any, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    async def get(self, db: AsyncSession, model: Type[Any], user_id: Any) -> Optional[Any]:
+        """نمونه متصل به نشست db از کاربر کش‌شده، یا None."""
+        entry = self._entries.get(user_id)
+        if entry is None or entry[1] <= time.monotonic():
+            if entry is not None:
+                del self._entries[user_id]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+
+        obj = model(**entry[0])
+        make_transient_to_detached(obj)
+        return await db.merge(obj, load=False)
+
+    def put(self, obj: Any) -> None:
+        if self.ttl <= 0 or self.max_size <= 0:
+            return
+        state = inspect(obj)
+        values = {attr.key: getattr(obj, attr.key) for attr in state.mapper.column_attrs}
+        user_id = state.identity[0]
+        self._entries[user_id] = (values, time.monotonic() + self.ttl)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: Any) -> None:
+        """حذف کاربر از کش؛ پس از هر تغییر یا حذف کاربر فراخوانی می‌شود."""
+        if self._entries.pop(user_id, None) is not None:
+            self.invalidations += 1
+
+    def shrink(self, fraction: float) -> int:
+        return _drop_oldest(self._entries, fraction)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+def snapshot() -> Dict[str, Any]:
+    """آمار هر دو کش برای مانیتورینگ."""
+    return {
+        "tokens": {
+            "size": len(token_cache._entries),
+            "hits": token_cache.hits,
+            "misses": token_cache.misses,
+        },
+        "principals": {
+            "size": len(principal_cache._entries),
+            "hits": principal_cache.hits,
+            "misses": principal_cache.misses,
+            "invalidations": principal_cache.invalidations,
+        },
+        "api_tokens": {
+            "size": len(api_token_cache._entries),
+            "hits": api_token_cache.hits,
+            "misses": api_token_cache.misses,
+            "negative_size": len(invalid_token_cache._entries),
+            "negative_hits": invalid_token_cache.hits,
+        },
+    }
+
+
+token_cache = VerifiedTokenCache(max_size=settings.AUTH_TOKEN_CACHE_SIZE)
+principal_cache = PrincipalCache(
+    ttl=settings.AUTH_PRINCIPAL_CACHE_TTL, max_size=settings.AUTH_PRINCIPAL_CACHE_SIZE
+)
+# توکن‌های API معتبر (تا حداکثر API_TOKEN_CACHE_TTL) و توکن‌های نامعتبر دیده‌شده
+api_token_cache = VerifiedTokenCache(max_size=settings.API_TOKEN_CACHE_SIZE)
+invalid_token_cache = NegativeCache(
+    ttl=settings.API_TOKEN_NEGATIVE_CACHE_TTL, max_size=settings.API_TOKEN_NEGATIVE_CACHE_SIZE
+)
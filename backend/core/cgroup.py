@@ -0,0 +1,88 @@
+import os
+from typing import Optional
+
+# ----------------------------------------------------------------------
+# خواندن محدودیت‌ها و مصرف منابع از cgroup (v2 با پشتیبانی v1) و /proc
+# ----------------------------------------------------------------------
+# این توابع در اجراکننده چندپردازه‌ای (backend/server.py) و نگهبان حافظه
+# (backend/core/memory.py) استفاده می‌شوند.
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path) as fh:
+            return fh.read().strip()
+    except OSError:
+        return None
+
+
+def cgroup_cpu_limit(root: str = CGROUP_ROOT) -> Optional[float]:
+    """
+    سهمیه CPU کانتینر (تعداد هسته، مثلاً 0.1 یا 2.0)؛ None یعنی بدون محدودیت.
+    cgroup v2: فایل cpu.max به شکل «quota period» یا «max period».
+    """
+    value = _read(os.path.join(root, "cpu.max"))
+    if value:
+        quota, _, period = value.partition(" ")
+        if quota != "max" and period:
+            return int(quota) / int(period)
+        return None
+    # cgroup v1
+    quota = _read(os.path.join(root, "cpu", "cpu.cfs_quota_us"))
+    period = _read(os.path.join(root, "cpu", "cpu.cfs_period_us"))
+    if quota and period and int(quota) > 0:
+        return int(quota) / int(period)
+    return None
+
+
+def cgroup_memory_limit(root: str = CGROUP_ROOT) -> Optional[int]:
+    """محدودیت حافظه کانتینر به بایت؛ None یعنی بدون محدودیت."""
+    value = _read(os.path.join(root, "memory.max"))
+    if value:
+        return None if value == "max" else int(value)
+    value = _read(os.path.join(root, "memory", "memory.limit_in_bytes"))
+    # v1 برای «بدون محدودیت» عدد بسیار بزرگی برمی‌گرداند
+    if value and int(value) < 1 << 60:
+        return int(value)
+    return None
+
+
+def available_cpus() -> int:
+    """تعداد هسته‌هایی که این پردازه اجازه اجرا روی آن‌ها را دارد."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def cgroup_memory_usage(root: str = CGROUP_ROOT) -> Optional[int]:
+    """
+    مصرف حافظه کانتینر به بایت بدون کش فایل غیرفعال (همان معیاری که OOM killer
+    و `kubectl top` به آن نگاه می‌کنند)؛ None یعنی cgroup در دسترس نیست.
+    """
+    value = _read(os.path.join(root, "memory.current"))
+    stat_path = os.path.join(root, "memory.stat")
+    inactive_key = "inactive_file"
+    if value is None:
+        # cgroup v1
+        value = _read(os.path.join(root, "memory", "memory.usage_in_bytes"))
+        stat_path = os.path.join(root, "memory", "memory.stat")
+        inactive_key = "total_inactive_file"
+    if value is None:
+        return None
+    usage = int(value)
+    for line in (_read(stat_path) or "").splitlines():
+        key, _, amount = line.partition(" ")
+        if key == inactive_key:
+            return max(usage - int(amount), 0)
+    return usage
+
+
+def current_rss(pid: Optional[int] = None) -> int:
+    """RSS پردازه جاری (یا پردازه pid) به بایت (از /proc/<pid>/statm)."""
+    statm = _read(f"/proc/{pid or 'self'}/statm")
+    if not statm:
+        return 0
+    return int(statm.split()[1]) * os.sysconf("SC_PAGE_SIZE")
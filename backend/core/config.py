@@ -1,4 +1,4 @@
-from typing import List, Optional, Union
+from typing import Dict, List, Optional, Union
 
 # از pydantic-settings برای مدیریت ایمن تنظیمات استفاده می‌کنیم.
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -10,6 +10,9 @@ class Settings(BaseSettings):
     کلاس تنظیمات اصلی برنامه که مقادیر را از متغیرهای محیطی یا فایل .env می‌خواند.
     """
 
+    # پیشوند مسیرهای نسخه 1 API
+    API_V1_STR: str = "/api/v1"
+
     # ----------------------------------------------------
     # تنظیمات پایگاه داده (PostgreSQL)
     # ----------------------------------------------------
@@ -24,6 +27,281 @@ class Settings(BaseSettings):
         # توجه: از "postgresql+asyncpg" برای درایور آسنکرون استفاده می‌شود.
         return f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_SERVER}/{self.POSTGRES_DB}"
 
+    # ----------------------------------------------------
+    # تنظیمات استخر اتصال (Connection Pool)
+    # ----------------------------------------------------
+    # تعداد اتصال‌های دائمی نگه‌داشته شده در استخر
+    DB_POOL_SIZE: int = 5
+    # حداکثر اتصال‌های اضافه (Overflow) فراتر از DB_POOL_SIZE در زمان اوج بار
+    DB_MAX_OVERFLOW: int = 10
+    # عمر حداکثری هر اتصال به ثانیه؛ پس از آن اتصال بازسازی می‌شود (-1 یعنی غیرفعال)
+    DB_POOL_RECYCLE: int = 1800
+    # حداکثر زمان انتظار (ثانیه) برای گرفتن اتصال از استخر قبل از خطای Timeout
+    DB_POOL_TIMEOUT: float = 30.0
+    # بررسی زنده بودن اتصال در هر Checkout (یک رفت‌وبرگشت اضافه برای هر درخواست)
+    DB_POOL_PRE_PING: bool = True
+    # اگر pre-ping خاموش باشد، اتصال‌های بیکار هر چند ثانیه یک‌بار در پس‌زمینه بررسی می‌شوند (0 یعنی غیرفعال)
+    DB_POOL_VALIDATION_INTERVAL: int = 60
+
+    # ----------------------------------------------------
+    # تنظیمات آمار دستورات SQL (جایگزین echo=True)
+    # ----------------------------------------------------
+    # حداکثر تعداد دستورات نرمال‌شده یکتا؛ بقیه در <other> جمع می‌شوند
+    SQL_STATS_MAX_STATEMENTS: int = 2000
+    # دستورات کندتر از این مقدار (میلی‌ثانیه) لاگ و در لاگ دستورات کند نگه داشته می‌شوند (0 یعنی غیرفعال)
+    SQL_SLOW_QUERY_MS: float = 200.0
+    SQL_SLOW_LOG_SIZE: int = 200
+    # پنهان کردن مقادیر پارامترها در لاگ دستورات کند (فقط نوع هر پارامتر)
+    SQL_SLOW_LOG_REDACT: bool = True
+    # اجرای یک دستور نرمال‌شده بیش از این تعداد در یک درخواست به عنوان N+1 ثبت می‌شود (0 یعنی غیرفعال)
+    SQL_N_PLUS_ONE_THRESHOLD: int = 10
+
+    # ----------------------------------------------------
+    # تنظیمات کش دستورات و گرم‌کردن (Warm-up) در شروع برنامه
+    # ----------------------------------------------------
+    # اندازه کش دستورات کامپایل‌شده SQLAlchemy (query_cache_size)
+    DB_COMPILED_CACHE_SIZE: int = 500
+    # اندازه کش Prepared Statement درایور asyncpg برای هر اتصال (0 یعنی غیرفعال)
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 100
+    # فعال/غیرفعال کردن مرحله گرم‌کردن استخر و دستورات پرتکرار در lifespan
+    DB_WARMUP_ENABLED: bool = True
+    # حداقل تعداد اتصال‌هایی که هنگام شروع باز و آماده می‌شوند (حداکثر DB_POOL_SIZE)
+    DB_POOL_MIN_CONNECTIONS: int = 2
+
+    # ----------------------------------------------------
+    # تنظیمات تجمیع نوشتن‌ها (Group Commit)
+    # ----------------------------------------------------
+    # در صورت فعال بودن، create های همزمان یک مدل در یک INSERT و یک commit ثبت می‌شوند
+    DB_WRITE_COALESCING: bool = False
+    # طول پنجره جمع‌آوری درج‌ها به میلی‌ثانیه
+    DB_WRITE_COALESCING_WINDOW_MS: float = 2.0
+    # حداکثر تعداد ردیف هر دسته؛ با رسیدن به آن دسته فوراً ثبت می‌شود
+    DB_WRITE_COALESCING_MAX_BATCH: int = 256
+
+    # ----------------------------------------------------
+    # تنظیمات پارتیشن‌بندی زمانی جدول items (فقط PostgreSQL)
+    # ----------------------------------------------------
+    # تعداد پارتیشن‌های ماهانه‌ای که از قبل برای ماه‌های آینده ساخته می‌شوند
+    ITEMS_PARTITION_MONTHS_AHEAD: int = 3
+    # مدت نگه‌داری داده‌ها به ماه؛ پارتیشن‌های قدیمی‌تر بایگانی و حذف می‌شوند (0 یعنی بدون حذف)
+    ITEMS_RETENTION_MONTHS: int = 0
+    # مسیر محلی برای فایل‌های فشرده بایگانی پارتیشن‌های حذف شده
+    ITEMS_ARCHIVE_DIR: str = "./archive/items"
+    # فاصله اجرای کار نگه‌داری پارتیشن‌ها به ثانیه (0 یعنی غیرفعال)
+    ITEMS_PARTITION_MAINTENANCE_INTERVAL: int = 3600
+    # فاصله بازسازی شمارنده‌های آیتم هر مالک از روی items (ثانیه، 0 یعنی غیرفعال)؛
+    # در حین بازسازی، ایجاد و حذف آیتم‌ها منتظر می‌مانند
+    ITEM_STATS_REPAIR_INTERVAL: int = 86400
+
+    # ----------------------------------------------------
+    # تنظیمات جستجوی معنایی آیتم‌ها (Embedding و ایندکس برداری)
+    # ----------------------------------------------------
+    EMBEDDINGS_ENABLED: bool = True
+    # پوشه فایل‌های ایندکس برداری (ماتریس float32 و نگاشت شناسه‌ها)؛ بین Workerها مشترک است
+    EMBEDDINGS_DIR: str = "./data/embeddings"
+    # ابعاد بردارها؛ با تغییر آن ایندکس از نو ساخته می‌شود
+    EMBEDDINGS_DIM: int = 256
+    # محاسبه بردارها در دسته‌های حداکثر این تعداد آیتم، با رسیدن به آن یا هر EMBEDDINGS_FLUSH_INTERVAL ثانیه
+    EMBEDDINGS_BATCH_SIZE: int = 256
+    EMBEDDINGS_FLUSH_INTERVAL: float = 1.0
+    # حداکثر آیتم‌های در انتظار محاسبه بردار؛ با پر بودن صف، تغییرات جدید دور ریخته و شمرده می‌شوند
+    EMBEDDINGS_QUEUE_SIZE: int = 100_000
+    # محاسبه بردار آیتم‌های جدیدتر از آخرین آیتم ایندکس‌شده در شروع برنامه
+    EMBEDDINGS_BACKFILL: bool = True
+
+    # ----------------------------------------------------
+    # تنظیمات سریال‌سازی پاسخ‌ها
+    # ----------------------------------------------------
+    # مسیر سریع: اعتبارسنجی یک‌باره با TypeAdapter و نوشتن مستقیم JSON به بایت
+    # (بدون jsonable_encoder و json استاندارد) برای روترهای CRUD
+    FAST_SERIALIZATION: bool = False
+
+    # ----------------------------------------------------
+    # تنظیمات فشرده‌سازی پاسخ‌ها (gzip / br / zstd)
+    # ----------------------------------------------------
+    COMPRESSION_ENABLED: bool = True
+    # پاسخ‌های کوچک‌تر از این اندازه (بایت) فشرده نمی‌شوند
+    COMPRESSION_MIN_SIZE: int = 1024
+    # سطح پیش‌فرض هر الگوریتم (قابل بازنویسی برای هر مسیر با دکوریتور compression)
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_LEVEL: int = 4
+    COMPRESSION_ZSTD_LEVEL: int = 3
+
+    # ----------------------------------------------------
+    # تنظیمات محدودسازی نرخ درخواست‌ها (Rate Limiting)
+    # ----------------------------------------------------
+    RATE_LIMIT_ENABLED: bool = True
+    # قانون هر گروه مسیر (طولانی‌ترین پیشوند منطبق)، به شکل "تعداد/بازه"؛ مثلاً "100/minute"
+    RATE_LIMIT_RULES: Dict[str, str] = {
+        "/answer": "20/minute",
+        "/api/v1/admin": "60/minute",
+        "/api/v1": "300/minute",
+    }
+    # آدرس Redis برای اشتراک سطل‌ها بین Workerها؛ خالی یعنی حافظه درون‌پردازه‌ای
+    RATE_LIMIT_STORE_URL: Optional[str] = None
+    RATE_LIMIT_SHARDS: int = 64
+    RATE_LIMIT_MAX_KEYS: int = 100_000
+    # فقط پشت پراکسی مطمئن فعال شود (استفاده از X-Forwarded-For به جای IP اتصال)
+    RATE_LIMIT_TRUST_FORWARDED: bool = False
+
+    # ----------------------------------------------------
+    # تنظیمات مهلت درخواست‌ها (Deadline)
+    # ----------------------------------------------------
+    # لغو کار درخواست (دیتابیس و مدل بالادستی) با پایان مهلت یا قطع اتصال کلاینت
+    REQUEST_DEADLINE_ENABLED: bool = True
+    # سرآیندی که کلاینت با آن مهلت خود را اعلام می‌کند (ثانیه، یا میلی‌ثانیه با پسوند ms)
+    REQUEST_TIMEOUT_HEADER: str = "X-Request-Timeout"
+    # مهلت پیش‌فرض (ثانیه) و سقف مهلت درخواستی کلاینت
+    REQUEST_TIMEOUT_DEFAULT: float = 30.0
+    REQUEST_TIMEOUT_MAX: float = 300.0
+    # مهلت پیش‌فرض هر گروه مسیر (طولانی‌ترین پیشوند منطبق)
+    REQUEST_TIMEOUT_ROUTES: Dict[str, float] = {
+        "/answer": 60.0,
+        "/api/v1/admin": 300.0,
+    }
+    # تنظیم statement_timeout نشست‌های get_db برابر زمان باقی‌مانده مهلت (فقط PostgreSQL)
+    DB_DEADLINE_STATEMENT_TIMEOUT: bool = True
+
+    # ----------------------------------------------------
+    # تنظیمات شمارش مصرف (Usage Metering)
+    # ----------------------------------------------------
+    USAGE_METERING_ENABLED: bool = True
+    # فاصله نوشتن شمارنده‌های هر Worker در usage_minute (ثانیه)
+    USAGE_FLUSH_INTERVAL: float = 15.0
+    # فاصله فشرده‌سازی دقیقه به ساعت و ساعت به روز (ثانیه، 0 یعنی غیرفعال؛ فقط PostgreSQL)
+    USAGE_COMPACTION_INTERVAL: float = 300.0
+    # مدت نگه‌داری ردیف‌های ساعتی پیش از انتقال به جدول روزانه (روز)
+    USAGE_HOURLY_RETENTION_DAYS: int = 7
+
+    # ----------------------------------------------------
+    # تنظیمات متریک‌ها (Prometheus)
+    # ----------------------------------------------------
+    METRICS_ENABLED: bool = True
+    # پوشه مشترک فایل‌های متریک هر Worker در اجرای چندپردازه‌ای؛ خالی یعنی فقط همین پردازه
+    # (backend/server.py در صورت خالی بودن، پوشه‌ای موقت می‌سازد)
+    METRICS_MULTIPROC_DIR: Optional[str] = None
+    # فاصله نوشتن مقادیر هر Worker در فایلش (ثانیه)
+    METRICS_FLUSH_INTERVAL: float = 5.0
+
+    # ----------------------------------------------------
+    # تنظیمات پروفایلر نمونه‌بردار درخواست‌ها
+    # ----------------------------------------------------
+    # میان‌افزار پروفایل فقط در صورت فعال بودن اضافه می‌شود (در حالت عادی بدون هزینه)
+    PROFILING_ENABLED: bool = False
+    # فاصله نمونه‌برداری پشته‌ها (میلی‌ثانیه)
+    PROFILING_INTERVAL_MS: float = 5.0
+    # درخواست‌های کندتر از این آستانه همیشه ثبت می‌شوند (0 یعنی غیرفعال)
+    PROFILING_SLOW_THRESHOLD_MS: float = 500.0
+    # کسری از همه درخواست‌ها که صرف‌نظر از زمانشان ثبت می‌شوند (مثلاً 0.01)
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_MAX_STACKS: int = 20000
+    # پوشه مشترک پروفایل Workerها در اجرای چندپردازه‌ای؛ خالی یعنی فقط همین پردازه
+    PROFILING_DIR: Optional[str] = None
+    PROFILING_FLUSH_INTERVAL: float = 10.0
+
+    # ----------------------------------------------------
+    # تنظیمات مدل‌های هوش مصنوعی بالادستی (مسیر /answer)
+    # ----------------------------------------------------
+    HF_API_TOKEN: Optional[str] = None
+    HF_MODEL_ENDPOINT: str = "https://api-inference.huggingface.co/models/distilgpt2"
+    # پارامترهای تولید متن (برای همه ارائه‌دهنده‌ها)
+    HF_MAX_NEW_TOKENS: int = 64
+    HF_TEMPERATURE: float = 0.8
+    # Gemini فقط با تنظیم کلید فعال می‌شود
+    GEMINI_API_KEY: Optional[str] = None
+    GEMINI_MODEL: str = "gemini-1.5-flash"
+    GEMINI_BASE_URL: str = "https://generativelanguage.googleapis.com/v1beta"
+    # آدرس پایه مدل محلی با API سازگار با OpenAI (مثلاً http://localhost:8080/v1)؛ خالی یعنی غیرفعال
+    LOCAL_MODEL_ENDPOINT: Optional[str] = None
+    LOCAL_MODEL_NAME: str = "local"
+    # حداکثر زمان هر فراخوانی مدل بالادستی (ثانیه)
+    UPSTREAM_TIMEOUT: float = 30.0
+
+    # ----------------------------------------------------
+    # تنظیمات مسیریابی بین ارائه‌دهنده‌های مدل (Hugging Face، Gemini، مدل محلی)
+    # ----------------------------------------------------
+    # ارائه‌دهنده‌های قابل استفاده؛ ترتیب، اولویت در نبود آمار است
+    UPSTREAM_PROVIDERS: List[str] = ["huggingface", "gemini", "local"]
+    # هزینه نسبی هر فراخوانی برای سیاست cheapest
+    UPSTREAM_PROVIDER_COSTS: Dict[str, float] = {"local": 0.0, "huggingface": 1.0, "gemini": 2.0}
+    # سیاست هر گروه مسیر (طولانی‌ترین پیشوند منطبق): fastest یا cheapest
+    UPSTREAM_ROUTING_DEFAULT_POLICY: str = "fastest"
+    UPSTREAM_ROUTING_POLICIES: Dict[str, str] = {"/answer": "fastest"}
+    # ضریب EWMA زمان پاسخ و نرخ خطا (بزرگ‌تر یعنی واکنش سریع‌تر به تغییرات)
+    UPSTREAM_EWMA_ALPHA: float = 0.2
+    # کنار گذاشتن ارائه‌دهنده پس از این تعداد خطای پیاپی یا با نرخ خطای بیشتر از آستانه
+    UPSTREAM_EJECT_AFTER_FAILURES: int = 3
+    UPSTREAM_ERROR_RATE_THRESHOLD: float = 0.5
+    # مدت کنار گذاشتن (ثانیه)؛ با هر آزمایش ناموفق دو برابر می‌شود (حداکثر 8 برابر)
+    UPSTREAM_EJECT_SECONDS: float = 30.0
+    # سهم درخواست‌هایی که برای آزمایش به ارائه‌دهنده بهبودیافته فرستاده می‌شوند
+    UPSTREAM_PROBE_RATIO: float = 0.05
+    # حداکثر ارائه‌دهنده‌هایی که برای یک درخواست امتحان می‌شوند (Failover)
+    UPSTREAM_MAX_ATTEMPTS: int = 3
+
+    # ----------------------------------------------------
+    # تنظیمات سابقه پاسخ‌های /answer (نوشتن با تأخیر)
+    # ----------------------------------------------------
+    ANSWER_HISTORY_ENABLED: bool = True
+    # حداکثر ردیف‌های در انتظار درج؛ با پر بودن بافر ردیف‌های جدید دور ریخته و شمرده می‌شوند
+    ANSWER_HISTORY_BUFFER_SIZE: int = 10000
+    # درج دسته با رسیدن به این تعداد ردیف یا هر ANSWER_HISTORY_FLUSH_INTERVAL ثانیه
+    ANSWER_HISTORY_BATCH_SIZE: int = 500
+    ANSWER_HISTORY_FLUSH_INTERVAL: float = 2.0
+
+    # ----------------------------------------------------
+    # تنظیمات هش رمز عبور (bcrypt)
+    # ----------------------------------------------------
+    # هزینه bcrypt (log2 تعداد دورها)؛ هش‌های با هزینه متفاوت هنگام ورود بازتولید می‌شوند
+    BCRYPT_ROUNDS: int = 12
+    # نوع استخر اجرای bcrypt خارج از event loop: "thread" یا "process"
+    PASSWORD_HASH_EXECUTOR: str = "thread"
+    PASSWORD_HASH_WORKERS: int = 2
+    # حداکثر کارهای در صف/در حال اجرا؛ درخواست‌های بیشتر تا آزاد شدن ظرفیت منتظر می‌مانند
+    PASSWORD_HASH_MAX_PENDING: int = 64
+
+    # ----------------------------------------------------
+    # تنظیمات اجراکننده چندپردازه‌ای (backend/server.py)
+    # ----------------------------------------------------
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    # تعداد Workerها؛ 0 یعنی محاسبه خودکار از سهمیه CPU و حافظه cgroup
+    SERVER_WORKERS: int = 0
+    # تخمین حافظه هر Worker (مگابایت) برای محدود کردن تعداد Workerها بر اساس memory.max
+    SERVER_WORKER_MEMORY_MB: int = 192
+    # بازتولید Worker پس از این تعداد درخواست (0 یعنی غیرفعال) با مقداری پراکندگی تصادفی
+    SERVER_MAX_REQUESTS: int = 10000
+    SERVER_MAX_REQUESTS_JITTER: int = 1000
+    # بازتولید Worker با عبور RSS از این حد (مگابایت)؛ 0 یعنی سهم هر Worker از memory.max
+    SERVER_MAX_RSS_MB: int = 0
+    # حداکثر زمان تخلیه درخواست‌های در حال اجرا هنگام خاموشی (ثانیه)
+    SERVER_GRACEFUL_TIMEOUT: int = 30
+    SERVER_BACKLOG: int = 2048
+
+    # ----------------------------------------------------
+    # تنظیمات نگهبان حافظه (Memory Watchdog)
+    # ----------------------------------------------------
+    MEMORY_WATCHDOG_ENABLED: bool = True
+    # فاصله بررسی مصرف حافظه (ثانیه)
+    MEMORY_WATCHDOG_INTERVAL: float = 2.0
+    # محدودیت حافظه (مگابایت)؛ 0 یعنی memory.max کانتینر (بدون cgroup نگهبان غیرفعال است)
+    MEMORY_LIMIT_MB: int = 0
+    # آستانه نرم: کوچک کردن کش‌ها و رد درخواست‌های سنگین جدید با 503
+    MEMORY_SOFT_LIMIT_RATIO: float = 0.80
+    # آستانه سخت: بازتولید آرام Worker (در اجرا با backend.server)
+    MEMORY_HARD_LIMIT_RATIO: float = 0.92
+    # کسری از ورودی‌های هر کش ثبت‌شده که با ورود به فشار حافظه حذف می‌شود
+    MEMORY_CACHE_SHRINK_FRACTION: float = 0.5
+    # مقدار سرآیند Retry-After پاسخ‌های 503 (ثانیه)
+    MEMORY_SHED_RETRY_AFTER: int = 5
+    # ردیابی تخصیص حافظه با tracemalloc (سربار محسوس؛ فقط برای عیب‌یابی)
+    MEMORY_TRACEMALLOC_ENABLED: bool = False
+    MEMORY_TRACEMALLOC_FRAMES: int = 1
+    # تعداد منابع تخصیص در هر عکس، فاصله عکس‌های دوره‌ای (ثانیه، 0 یعنی فقط هنگام فشار) و تعداد عکس‌های نگه‌داشته‌شده
+    MEMORY_TRACEMALLOC_TOP: int = 25
+    MEMORY_TRACEMALLOC_INTERVAL: float = 300.0
+    MEMORY_TRACEMALLOC_KEEP: int = 12
+
     # ----------------------------------------------------
     # تنظیمات امنیتی (JWT)
     # ----------------------------------------------------
@@ -34,6 +312,28 @@ class Settings(BaseSettings):
     # الگوریتم رمزگذاری JWT
     SECURITY_ALGORITHM: str = "HS256"
 
+    # ----------------------------------------------------
+    # تنظیمات کش احراز هویت (توکن‌های تأییدشده و کاربر جاری)
+    # ----------------------------------------------------
+    # حداکثر تعداد توکن‌های تأییدشده در کش (هر ورودی تا زمان exp توکن معتبر است)
+    AUTH_TOKEN_CACHE_SIZE: int = 10000
+    # مدت اعتبار ردیف کاربر در کش (ثانیه)؛ 0 یعنی غیرفعال
+    AUTH_PRINCIPAL_CACHE_TTL: float = 30.0
+    AUTH_PRINCIPAL_CACHE_SIZE: int = 10000
+
+    # ----------------------------------------------------
+    # تنظیمات توکن‌های API
+    # ----------------------------------------------------
+    # مدت نگه‌داری توکن معتبر در کش (ثانیه)؛ ابطال در سایر Workerها حداکثر با این تأخیر اعمال می‌شود
+    API_TOKEN_CACHE_TTL: float = 30.0
+    API_TOKEN_CACHE_SIZE: int = 10000
+    # مدت نگه‌داری هش توکن‌های نامعتبر (بدون کوئری رد می‌شوند)
+    API_TOKEN_NEGATIVE_CACHE_TTL: float = 300.0
+    API_TOKEN_NEGATIVE_CACHE_SIZE: int = 100_000
+    # فاصله اجرای حذف توکن‌های منقضی (ثانیه، 0 یعنی غیرفعال) و اندازه هر دسته حذف
+    API_TOKEN_SWEEP_INTERVAL: int = 600
+    API_TOKEN_SWEEP_BATCH_SIZE: int = 1000
+
     # ----------------------------------------------------
     # تنظیمات مدیر ارشد (Superuser)
     # ----------------------------------------------------
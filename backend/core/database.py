@@ -1,9 +1,9 @@
 from typing import AsyncGenerator
 
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
 
-from backend.core.config import settings
+from backend.db.session import get_engine
 
 # ------------------- ساختار اصلی مدل‌های دیتابیس -------------------
 class Base(DeclarativeBase):
@@ -15,18 +15,11 @@ class Base(DeclarativeBase):
 
 # ------------------- پیکربندی اتصال به دیتابیس -------------------
 
-# ساخت موتور اتصال غیرهمزمان (Async Engine)
-# از URI ساخته شده در config.py استفاده می‌کند.
-async_engine = create_async_engine(
-    url=str(settings.SQLALCHEMY_DATABASE_URI),
-    echo=True, # در محیط توسعه (Development)، کوئری‌های SQL را نمایش می‌دهد
-    future=True, # از سینتکس جدید SQLAlchemy 2.0 استفاده می‌کند
-)
-
-# تعریف سازنده سشن (Session Maker) برای ایجاد سشن‌های جدید
+# این ماژول موتور جداگانه‌ای نمی‌سازد: نشست‌ها روی همان موتور تنبل و
+# استخر اتصال مشترک backend/db/session.py ساخته می‌شوند، تا ایمپورت مدل‌ها
+# (که Base را از اینجا می‌گیرند) هیچ اتصالی ایجاد نکند.
 # expire_on_commit=False: از منقضی شدن آبجکت‌ها بعد از هر commit جلوگیری می‌کند.
 async_session_maker = sessionmaker(
-    bind=async_engine, 
     class_=AsyncSession, 
     expire_on_commit=False
 )
@@ -37,7 +30,7 @@ async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
     یک سشن دیتابیس غیرهمزمان جدید ایجاد می‌کند و آن را در اختیار
     Endopintهای FastAPI قرار می‌دهد (از طریق Dependency Injection).
     """
-    async with async_session_maker() as session:
+    async with async_session_maker(bind=get_engine()) as session:
         try:
             yield session
         except Exception:
@@ -0,0 +1,67 @@
+import math
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+# ----------------------------------------------------------------------
+# مهلت (Deadline) سراسری هر درخواست
+# ----------------------------------------------------------------------
+# میان‌افزار backend.api.deadline مهلت درخواست را در ContextVar قرار می‌دهد؛ کارهای
+# پایین‌دستی (نشست دیتابیس، فراخوانی مدل بالادستی) بودجه باقی‌مانده را از آن می‌خوانند
+# تا بیش از زمانی که کلاینت منتظر پاسخ است کار نکنند.
+
+
+class DeadlineExceeded(Exception):
+    """مهلت درخواست پیش از شروع یک کار پایین‌دستی به پایان رسیده است."""
+
+
+class Deadline:
+    """
+    :param timeout: بودجه کل درخواست (ثانیه) از لحظه ساخت
+    """
+
+    __slots__ = ("timeout", "expires_at")
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self.expires_at = time.monotonic() + timeout
+
+    def remaining(self) -> float:
+        """ثانیه‌های باقی‌مانده (منفی پس از انقضا)."""
+        return self.expires_at - time.monotonic()
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def clamp(self, timeout: Optional[float]) -> float:
+        """کوچک‌ترِ timeout و زمان باقی‌مانده؛ پس از انقضا DeadlineExceeded."""
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded()
+        return remaining if timeout is None else min(timeout, remaining)
+
+    def remaining_ms(self) -> int:
+        """زمان باقی‌مانده به میلی‌ثانیه (حداقل 1، چون 0 در statement_timeout یعنی بدون محدودیت)."""
+        return max(math.ceil(self.remaining() * 1000), 1)
+
+
+current_deadline: ContextVar[Optional[Deadline]] = ContextVar("current_deadline", default=None)
+
+
+def parse_timeout(value: str) -> Optional[float]:
+    """
+    مقدار سرآیند مهلت: عدد ثانیه («2.5») یا میلی‌ثانیه با پسوند ms («2500ms»)؛
+    مقدار نامعتبر یا غیرمثبت None است.
+    """
+    value = value.strip().lower()
+    scale = 1.0
+    if value.endswith("ms"):
+        value, scale = value[:-2], 0.001
+    elif value.endswith("s"):
+        value = value[:-1]
+    try:
+        timeout = float(value) * scale
+    except ValueError:
+        return None
+    return timeout if 0 < timeout < math.inf else None
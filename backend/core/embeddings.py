@@ -0,0 +1,160 @@
+import asyncio
+import re
+import zlib
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from backend.core.config import settings
+from backend.core.lazy import lazy_import
+from backend.core.metrics import registry
+from backend.core.vector_index import VectorIndex
+
+np = lazy_import("numpy")
+
+embedding_queue_pending = registry.gauge(
+    "embedding_queue_pending_items", "Items waiting for their embedding to be computed."
+)
+embedding_queue_dropped = registry.counter(
+    "embedding_queue_dropped_total", "Item changes dropped because the embedding queue was full."
+)
+# ایندکس mmap بین Workerها مشترک است
+vector_index_vectors = registry.gauge(
+    "vector_index_vectors", "Live vectors in the item vector index.", multiprocess_mode="max"
+)
+
+# ----------------------------------------------------------------------
+# بردار متن آیتم‌ها (Embedding)
+# ----------------------------------------------------------------------
+_TOKEN_RE = re.compile(r"\w+")
+
+# (عنوان، توضیحات) یک آیتم
+Document = Tuple[str, Optional[str]]
+
+
+class HashingEmbedder:
+    """
+    Embedder قطعی و بدون مدل: کلمات و n-gramهای نویسه‌ای هر کلمه با CRC32 به
+    یکی از `dim` بُعد (با علامت تصادفی) نگاشت می‌شوند و بردار نرمال L2 می‌شود.
+
+    n-gramهای نویسه‌ای شکل‌های مختلف یک کلمه (جمع، پسوندها، غلط تایپی) را به
+    هم نزدیک می‌کنند. CRC32 برخلاف hash() پایتون در همه پردازه‌ها یکسان است،
+    پس بردارهای نوشته‌شده توسط Workerهای مختلف با هم سازگارند.
+    """
+
+    name = "hashing-v1"
+
+    def __init__(self, dim: int, *, ngram: int = 3, title_weight: float = 2.0):
+        self.dim = dim
+        self.ngram = ngram
+        self.title_weight = title_weight
+
+    def _features(self, text: str, weight: float, cols: List[int], vals: List[float]) -> None:
+        for token in _TOKEN_RE.findall(text.lower()):
+            self._add(token, weight, cols, vals)
+            padded = f"<{token}>"
+            for start in range(len(padded) - self.ngram + 1):
+                self._add(padded[start:start + self.ngram], 0.5 * weight, cols, vals)
+
+    def _add(self, feature: str, weight: float, cols: List[int], vals: List[float]) -> None:
+        digest = zlib.crc32(feature.encode())
+        cols.append(digest % self.dim)
+        vals.append(weight if digest & 0x80000000 else -weight)
+
+    def embed(self, documents: Sequence[Document]) -> Any:
+        """بردار نرمال‌شده دسته‌ای از اسناد؛ آرایه float32 با شکل (len(documents), dim)."""
+        rows: List[int] = []
+        cols: List[int] = []
+        vals: List[float] = []
+        for index, (title, description) in enumerate(documents):
+            start = len(cols)
+            self._features(title or "", self.title_weight, cols, vals)
+            if description:
+                self._features(description, 1.0, cols, vals)
+            rows.extend([index] * (len(cols) - start))
+        matrix = np.zeros((len(documents), self.dim), dtype=np.float32)
+        positions = (np.asarray(rows, dtype=np.intp), np.asarray(cols, dtype=np.intp))
+        np.add.at(matrix, positions, np.asarray(vals, dtype=np.float32))
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix
+
+    def embed_query(self, query: str) -> Any:
+        return self.embed([(query, None)])[0]
+
+
+# ----------------------------------------------------------------------
+# صف آیتم‌های در انتظار محاسبه بردار
+# ----------------------------------------------------------------------
+class EmbeddingQueue:
+    """
+    تغییرات آیتم‌ها (درج/به‌روزرسانی با متن آیتم، یا حذف با None) به تفکیک
+    شناسه؛ تغییر جدیدتر یک آیتم جایگزین تغییر قبلی آن می‌شود، پس هر آیتم در
+    هر دسته حداکثر یک بار محاسبه می‌شود. Task پس‌زمینه (backend/crud/item_embeddings.py)
+    صف را در دسته‌ها تخلیه می‌کند.
+    """
+
+    def __init__(self, *, max_size: int, batch_size: int):
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self._pending: Dict[int, Optional[Tuple[int, str, Optional[str]]]] = {}
+        self._wake = asyncio.Event()
+        self.dropped = 0
+
+    def upsert(self, id: int, owner_id: int, title: str, description: Optional[str]) -> bool:
+        """ثبت متن جدید یک آیتم بدون انتظار؛ False اگر صف پر بوده و تغییر دور ریخته شده باشد."""
+        if id not in self._pending and len(self._pending) >= self.max_size:
+            self.dropped += 1
+            embedding_queue_dropped.inc()
+            return False
+        self._pending[id] = (owner_id, title, description)
+        self._notify()
+        return True
+
+    def delete(self, id: int) -> None:
+        """ثبت حذف یک آیتم؛ حذف‌ها هیچ‌وقت دور ریخته نمی‌شوند تا آیتم حذف‌شده در نتایج نماند."""
+        self._pending[id] = None
+        self._notify()
+
+    def _notify(self) -> None:
+        if len(self._pending) >= self.batch_size:
+            self._wake.set()
+
+    def take(self, limit: int) -> Dict[int, Optional[Tuple[int, str, Optional[str]]]]:
+        """برداشتن حداکثر `limit` تغییر قدیمی‌تر از صف."""
+        batch = {}
+        for id in list(self._pending)[:limit]:
+            batch[id] = self._pending.pop(id)
+        return batch
+
+    def restore(self, batch: Dict[int, Optional[Tuple[int, str, Optional[str]]]]) -> None:
+        """بازگرداندن دسته‌ای که نوشتنش ناموفق بود، بدون بازنویسی تغییرات جدیدتر همان آیتم‌ها."""
+        for id, change in batch.items():
+            self._pending.setdefault(id, change)
+
+    async def wait(self, timeout: float) -> None:
+        """انتظار تا پر شدن یک دسته یا گذشت `timeout` ثانیه."""
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._wake.clear()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+
+item_embedder = HashingEmbedder(settings.EMBEDDINGS_DIM)
+item_vector_index = VectorIndex(
+    settings.EMBEDDINGS_DIR, "items", settings.EMBEDDINGS_DIM, embedder=item_embedder.name
+)
+item_embedding_queue = EmbeddingQueue(
+    max_size=settings.EMBEDDINGS_QUEUE_SIZE, batch_size=settings.EMBEDDINGS_BATCH_SIZE
+)
+
+
+def collect() -> None:
+    embedding_queue_pending.set(len(item_embedding_queue))
+    vector_index_vectors.set(item_vector_index.live_vectors())
+
+
+if settings.EMBEDDINGS_ENABLED:
+    registry.add_collector(collect)
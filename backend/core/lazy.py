@@ -0,0 +1,32 @@
+import importlib
+import importlib.util
+import sys
+from types import ModuleType
+
+# ----------------------------------------------------------------------
+# ایمپورت تنبل (Lazy Import) برای کتابخانه‌های سنگین
+# ----------------------------------------------------------------------
+# کتابخانه‌هایی مانند numpy، transformers یا SDK مدل‌ها ثانیه‌ها زمان ایمپورت
+# دارند. با lazy_import ماژول در سطح بالای فایل تعریف می‌شود اما بدنه آن فقط در
+# اولین دسترسی به یکی از ویژگی‌هایش (یعنی اولین درخواست مسیری که به آن نیاز
+# دارد) اجرا می‌شود و زمان شروع برنامه را افزایش نمی‌دهد.
+
+
+def lazy_import(name: str) -> ModuleType:
+    """
+    برگرداندن ماژولی که اجرای آن تا اولین دسترسی به یک ویژگی به تعویق می‌افتد.
+
+    اگر ماژول قبلاً ایمپورت شده باشد همان برگردانده می‌شود.
+    :raises ImportError: اگر ماژول نصب نشده باشد (بدون اجرای آن بررسی می‌شود).
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"No module named {name!r}")
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
@@ -0,0 +1,294 @@
+import asyncio
+import gc
+import logging
+import time
+import tracemalloc
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from backend.core.cgroup import cgroup_memory_limit, cgroup_memory_usage, current_rss
+from backend.core.config import settings
+from backend.core.metrics import registry
+
+logger = logging.getLogger("backend.memory")
+
+# ----------------------------------------------------------------------
+# نگهبان حافظه (Memory Watchdog) و کاهش بار (Load Shedding)
+# ----------------------------------------------------------------------
+# مصرف حافظه کانتینر (memory.current بدون کش فایل غیرفعال) هر چند ثانیه با
+# محدودیت cgroup مقایسه می‌شود؛ بدون cgroup، RSS همین پردازه با MEMORY_LIMIT_MB.
+# - آستانه نرم: کوچک کردن کش‌های ثبت‌شده، gc و رد درخواست‌های سنگین جدید با 503
+# - آستانه سخت: علاوه بر موارد بالا، درخواست بازتولید آرام Worker از backend.server
+
+LEVEL_OK = "ok"
+LEVEL_SOFT = "soft"
+LEVEL_HARD = "hard"
+_LEVEL_VALUES = {LEVEL_OK: 0, LEVEL_SOFT: 1, LEVEL_HARD: 2}
+
+# مقادیر کل Container که هر Worker جداگانه می‌خواند؛ جمع آن‌ها معنا ندارد
+memory_usage_bytes = registry.gauge(
+    "memory_usage_bytes", "Memory in use compared against the limit.", multiprocess_mode="max"
+)
+memory_limit_bytes = registry.gauge(
+    "memory_limit_bytes", "Memory limit used by the watchdog.", multiprocess_mode="max"
+)
+memory_pressure_level = registry.gauge(
+    "memory_pressure_level", "Watchdog level: 0 ok, 1 soft, 2 hard.", multiprocess_mode="max"
+)
+memory_shed_requests = registry.counter(
+    "memory_shed_requests_total", "Heavy requests rejected with 503 under memory pressure."
+)
+memory_cache_shrinks = registry.counter(
+    "memory_cache_shrink_entries_total", "Cache entries dropped by the memory watchdog.", ("cache",)
+)
+
+
+class MemoryWatchdog:
+    """
+    :param limit: محدودیت حافظه به بایت؛ None یعنی محدودیت cgroup (در صورت وجود)
+    :param soft_ratio: نسبت مصرف به محدودیت برای ورود به حالت soft
+    :param hard_ratio: نسبت مصرف به محدودیت برای ورود به حالت hard
+    :param hysteresis: خروج از هر حالت فقط پس از کاهش مصرف به این اندازه زیر آستانه
+    :param shrink_fraction: کسری از ورودی‌های هر کش که هنگام فشار حذف می‌شود
+    """
+
+    def __init__(
+        self,
+        limit: Optional[int],
+        soft_ratio: float,
+        hard_ratio: float,
+        hysteresis: float = 0.05,
+        shrink_fraction: float = 0.5,
+        shrink_interval: float = 30.0,
+    ):
+        self.configured_limit = limit
+        self.soft_ratio = soft_ratio
+        self.hard_ratio = hard_ratio
+        self.hysteresis = hysteresis
+        self.shrink_fraction = shrink_fraction
+        self.shrink_interval = shrink_interval
+        self.level = LEVEL_OK
+        self.usage = 0
+        self.limit: Optional[int] = None
+        self.shed = 0
+        self.transitions: Deque[Dict[str, Any]] = deque(maxlen=50)
+        self._caches: Dict[str, Callable[[float], int]] = {}
+        self._last_shrink = 0.0
+
+    # ------------------- کش‌ها -------------------
+    def register_cache(self, name: str, shrink: Callable[[float], int]) -> None:
+        """
+        ثبت یک کش قابل کوچک شدن؛ shrink(fraction) کسری از ورودی‌ها را حذف و
+        تعداد حذف‌شده‌ها را برمی‌گرداند.
+        """
+        self._caches[name] = shrink
+
+    def shrink_caches(self, fraction: float) -> Dict[str, int]:
+        freed = {}
+        for name, shrink in self._caches.items():
+            try:
+                freed[name] = shrink(fraction)
+            except Exception:  # یک کش معیوب نباید نگهبان را متوقف کند
+                logger.exception("shrinking cache %s failed", name)
+                continue
+            memory_cache_shrinks.labels(name).inc(freed[name])
+        gc.collect()
+        self._last_shrink = time.monotonic()
+        return freed
+
+    # ------------------- اندازه‌گیری -------------------
+    def measure(self) -> Tuple[int, Optional[int]]:
+        """(مصرف فعلی، محدودیت) به بایت."""
+        cgroup_limit = cgroup_memory_limit()
+        usage = cgroup_memory_usage() if cgroup_limit else None
+        limit = self.configured_limit or cgroup_limit
+        if usage is None:
+            usage = current_rss()
+        return usage, limit
+
+    def check(self) -> str:
+        """اندازه‌گیری، به‌روزرسانی حالت و اجرای اقدام‌های حالت جدید."""
+        self.usage, self.limit = self.measure()
+        if not self.limit:
+            return self.level
+        ratio = self.usage / self.limit
+
+        level = self.level
+        if ratio >= self.hard_ratio:
+            level = LEVEL_HARD
+        elif ratio >= self.soft_ratio:
+            # از hard فقط پس از کاهش کافی به soft برمی‌گردیم
+            if level != LEVEL_HARD or ratio < self.hard_ratio - self.hysteresis:
+                level = LEVEL_SOFT
+        elif ratio < self.soft_ratio - self.hysteresis:
+            level = LEVEL_OK
+        elif level == LEVEL_HARD:
+            level = LEVEL_SOFT
+
+        if level != self.level:
+            self._transition(level, ratio)
+        elif level != LEVEL_OK and time.monotonic() - self._last_shrink >= self.shrink_interval:
+            self.shrink_caches(self.shrink_fraction)
+        return self.level
+
+    def _transition(self, level: str, ratio: float) -> None:
+        previous, self.level = self.level, level
+        entry: Dict[str, Any] = {
+            "at": datetime.now(timezone.utc).isoformat(),
+            "from": previous,
+            "to": level,
+            "usage_mb": round(self.usage / 2**20, 1),
+            "limit_mb": round(self.limit / 2**20, 1) if self.limit else None,
+            "ratio": round(ratio, 3),
+        }
+        if _LEVEL_VALUES[level] > _LEVEL_VALUES[previous]:
+            entry["freed"] = self.shrink_caches(self.shrink_fraction)
+            # ثبت منابع تخصیص حافظه در لحظه ورود به فشار (در صورت فعال بودن tracemalloc)
+            if memory_profiler.enabled:
+                memory_profiler.request_snapshot(f"entered {level}")
+        self.transitions.append(entry)
+        log = logger.warning if level != LEVEL_OK else logger.info
+        log("memory pressure %s -> %s (%.0f%% of limit)", previous, level, ratio * 100)
+
+    @property
+    def shedding(self) -> bool:
+        return self.level != LEVEL_OK
+
+    def collect(self) -> None:
+        memory_usage_bytes.set(self.usage)
+        memory_limit_bytes.set(self.limit or 0)
+        memory_pressure_level.set(_LEVEL_VALUES[self.level])
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "level": self.level,
+            "usage_mb": round(self.usage / 2**20, 1),
+            "limit_mb": round(self.limit / 2**20, 1) if self.limit else None,
+            "rss_mb": round(current_rss() / 2**20, 1),
+            "soft_ratio": self.soft_ratio,
+            "hard_ratio": self.hard_ratio,
+            "shed_requests": self.shed,
+            "caches": sorted(self._caches),
+            "transitions": list(self.transitions),
+        }
+
+
+# ----------------------------------------------------------------------
+# عکس‌های دوره‌ای tracemalloc
+# ----------------------------------------------------------------------
+class MemoryProfiler:
+    """
+    عکس‌های دوره‌ای tracemalloc: N منبع بزرگ تخصیص حافظه (بر اساس خط کد) و
+    بیشترین رشد نسبت به عکس قبلی. فقط خلاصه‌ها نگه داشته می‌شوند، نه خود عکس‌ها.
+    """
+
+    def __init__(self, frames: int, top: int, keep: int):
+        self.frames = frames
+        self.top = top
+        self.snapshots: Deque[Dict[str, Any]] = deque(maxlen=keep)
+        self._previous: Optional[tracemalloc.Snapshot] = None
+        self._pending: Optional[str] = None
+
+    @property
+    def enabled(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+
+    def stop(self) -> None:
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._previous = None
+
+    def request_snapshot(self, reason: str) -> None:
+        """درخواست عکس در دور بعدی حلقه پس‌زمینه (خارج از مسیر درخواست‌ها)."""
+        self._pending = reason
+
+    def take(self, reason: str) -> Dict[str, Any]:
+        """گرفتن عکس و خلاصه آن؛ پرهزینه است و در رشته جداگانه اجرا می‌شود."""
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        ))
+        current, peak = tracemalloc.get_traced_memory()
+        summary: Dict[str, Any] = {
+            "at": datetime.now(timezone.utc).isoformat(),
+            "reason": reason,
+            "traced_mb": round(current / 2**20, 2),
+            "peak_mb": round(peak / 2**20, 2),
+            "top": [_stat(stat) for stat in snapshot.statistics("lineno")[: self.top]],
+        }
+        if self._previous is not None:
+            diff = snapshot.compare_to(self._previous, "lineno")
+            summary["growth"] = [_stat(stat) for stat in diff[: self.top] if stat.size_diff > 0]
+        self._previous = snapshot
+        self.snapshots.append(summary)
+        return summary
+
+    def report(self) -> str:
+        """گزارش متنی همه خلاصه‌های نگه‌داشته‌شده (برای دانلود)."""
+        lines: List[str] = []
+        for summary in self.snapshots:
+            lines.append(f"== {summary['at']} ({summary['reason']}) traced={summary['traced_mb']} MB peak={summary['peak_mb']} MB")
+            lines.append("-- top allocations")
+            lines.extend(_format_stat(stat) for stat in summary["top"])
+            if summary.get("growth"):
+                lines.append("-- growth since previous snapshot")
+                lines.extend(_format_stat(stat) for stat in summary["growth"])
+            lines.append("")
+        return "\n".join(lines) + "\n"
+
+
+def _stat(stat: Any) -> Dict[str, Any]:
+    frame = stat.traceback[0]
+    entry = {"location": f"{frame.filename}:{frame.lineno}", "size_kb": round(stat.size / 1024, 1), "count": stat.count}
+    if hasattr(stat, "size_diff"):
+        entry["size_diff_kb"] = round(stat.size_diff / 1024, 1)
+    return entry
+
+
+def _format_stat(stat: Dict[str, Any]) -> str:
+    diff = f" ({stat['size_diff_kb']:+.1f} KiB)" if "size_diff_kb" in stat else ""
+    return f"{stat['size_kb']:>10.1f} KiB {stat['count']:>8} blocks{diff}  {stat['location']}"
+
+
+memory_watchdog = MemoryWatchdog(
+    limit=settings.MEMORY_LIMIT_MB * 2**20 or None,
+    soft_ratio=settings.MEMORY_SOFT_LIMIT_RATIO,
+    hard_ratio=settings.MEMORY_HARD_LIMIT_RATIO,
+    shrink_fraction=settings.MEMORY_CACHE_SHRINK_FRACTION,
+)
+memory_profiler = MemoryProfiler(
+    frames=settings.MEMORY_TRACEMALLOC_FRAMES,
+    top=settings.MEMORY_TRACEMALLOC_TOP,
+    keep=settings.MEMORY_TRACEMALLOC_KEEP,
+)
+registry.add_collector(memory_watchdog.collect)
+
+
+async def run_memory_watchdog(interval: float, snapshot_interval: float) -> None:
+    """
+    حلقه پس‌زمینه نگهبان حافظه؛ عکس‌های tracemalloc (در صورت فعال بودن) هر
+    `snapshot_interval` ثانیه یا هنگام ورود به فشار در رشته جداگانه گرفته می‌شوند.
+    خطای یک دور ثبت می‌شود و حلقه ادامه می‌یابد.
+    """
+    next_snapshot = time.monotonic() + snapshot_interval
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            memory_watchdog.check()
+            if not memory_profiler.enabled:
+                continue
+            reason = memory_profiler._pending
+            if reason is None and snapshot_interval > 0 and time.monotonic() >= next_snapshot:
+                reason = "periodic"
+            if reason is not None:
+                memory_profiler._pending = None
+                next_snapshot = time.monotonic() + snapshot_interval
+                await asyncio.to_thread(memory_profiler.take, reason)
+        except Exception:
+            logger.exception("memory watchdog round failed")
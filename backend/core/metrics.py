@@ -0,0 +1,403 @@
+import bisect
+import fcntl
+import json
+import math
+import os
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# ----------------------------------------------------------------------
+# رجیستری سبک متریک‌ها با خروجی متنی Prometheus
+# ----------------------------------------------------------------------
+# ثبت هر مقدار فقط یک جمع روی یک فیلد پایتونی است: همه ثبت‌ها از event loop
+# انجام می‌شوند، پس قفلی لازم نیست. شیء هر ترکیب برچسب یک بار ساخته و در
+# دیکشنری نگه داشته می‌شود.
+#
+# حالت چندپردازه‌ای: اگر METRICS_MULTIPROC_DIR تنظیم شده باشد، هر پردازه
+# به صورت دوره‌ای (و هنگام هر Scrape) مقادیرش را در فایل {pid}.json می‌نویسد و
+# Worker پاسخ‌دهنده به /metrics همه فایل‌ها را جمع می‌زند. شمارنده‌ها و
+# هیستوگرام‌های Workerهای خاتمه‌یافته در فایل بایگانی ادغام می‌شوند تا مقادیر
+# کاهش نیابند؛ Gaugeها فقط از پردازه‌های زنده خوانده می‌شوند و نحوه ادغامشان
+# با multiprocess_mode هر Gauge تعیین می‌شود (مانند prometheus_client):
+#
+#   sum       جمع مقادیر Workerها (مثلاً درخواست‌های در حال اجرا)
+#   max       بیشینه؛ برای مقادیر مشترک کل Container که هر Worker جداگانه می‌خواند
+#   liveall   مقدار هر Worker جدا با برچسب pid (تخمین‌های محلی هر Worker)
+
+# مرزهای پیش‌فرض هیستوگرام زمان (ثانیه)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+ARCHIVE_FILE = "archive.json"
+LOCK_FILE = ".lock"
+
+GAUGE_MODES = ("sum", "max", "liveall")
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def set(self, value: float) -> None:
+        """فقط برای Collectorهایی که یک شمارنده تجمعی موجود را بازتاب می‌دهند."""
+        self.value = value
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        # یک خانه اضافه برای مقادیر بزرگ‌تر از آخرین مرز (+Inf)
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def set(self, counts: Sequence[int], total: float) -> None:
+        """بازتاب یک هیستوگرام موجود با همین مرزها (برای Collectorها)."""
+        self.counts = list(counts)
+        self.sum = total
+
+
+class Metric:
+    """پایه متریک‌ها: نام، توضیح، نام برچسب‌ها و اشیای هر ترکیب برچسب."""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+
+    def _new_child(self) -> Any:
+        raise NotImplementedError
+
+    def labels(self, *values: str) -> Any:
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            child = self._children[values] = self._new_child()
+        return child
+
+    def dump(self) -> Dict[str, Any]:
+        """نمایش قابل سریال‌سازی (JSON) برای ادغام بین پردازه‌ها."""
+        return {
+            "type": self.kind,
+            "help": self.documentation,
+            "labelnames": list(self.labelnames),
+            "samples": [[list(labels), child.value] for labels, child in self._children.items()],
+        }
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._children[()].value += amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        multiprocess_mode: str = "sum",
+    ):
+        if multiprocess_mode not in GAUGE_MODES:
+            raise ValueError(f"Unknown multiprocess_mode {multiprocess_mode!r} for gauge {name!r}")
+        self.multiprocess_mode = multiprocess_mode
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._children[()].value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._children[()].value -= amount
+
+    def set(self, value: float) -> None:
+        self._children[()].value = value
+
+    def dump(self) -> Dict[str, Any]:
+        return {**super().dump(), "mode": self.multiprocess_mode}
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.bounds = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.bounds)
+
+    def observe(self, value: float) -> None:
+        self._children[()].observe(value)
+
+    def dump(self) -> Dict[str, Any]:
+        return {
+            "type": self.kind,
+            "help": self.documentation,
+            "labelnames": list(self.labelnames),
+            "buckets": list(self.bounds),
+            "samples": [
+                [list(labels), child.counts, child.sum] for labels, child in self._children.items()
+            ],
+        }
+
+
+# ----------------------------------------------------------------------
+# رجیستری
+# ----------------------------------------------------------------------
+class MetricsRegistry:
+    """
+    مجموعه متریک‌های این پردازه. Collectorها توابعی هستند که درست قبل از هر
+    خروجی اجرا می‌شوند و مقادیر لحظه‌ای (مثلاً وضعیت استخر اتصال) را به‌روز می‌کنند.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+
+    def _get_or_create(self, cls: type, name: str, *args: Any, **kwargs: Any) -> Any:
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = cls(name, *args, **kwargs)
+        elif not isinstance(metric, cls):
+            raise ValueError(f"Metric {name!r} is already registered as {metric.kind}")
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        multiprocess_mode: str = "sum",
+    ) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames, multiprocess_mode=multiprocess_mode)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        self._collectors.append(collector)
+
+    def collect(self) -> Dict[str, Dict[str, Any]]:
+        """اجرای Collectorها و برگرداندن مقادیر همه متریک‌های این پردازه."""
+        for collector in self._collectors:
+            collector()
+        return {name: metric.dump() for name, metric in self._metrics.items()}
+
+    def write(self, directory: str, families: Optional[Dict[str, Dict[str, Any]]] = None) -> None:
+        """نوشتن مقادیر این پردازه در {pid}.json (جایگزینی اتمی فایل)."""
+        if families is None:
+            families = self.collect()
+        _write_json(os.path.join(directory, f"{os.getpid()}.json"), families)
+
+    def render(self, directory: Optional[str] = None) -> str:
+        """خروجی متنی Prometheus؛ در حالت چندپردازه‌ای مجموع همه Workerها."""
+        families = self.collect()
+        if directory:
+            self.write(directory, families)
+            families = merge_directory(directory)
+        return exposition(families)
+
+
+# ----------------------------------------------------------------------
+# ادغام فایل‌های پردازه‌ها
+# ----------------------------------------------------------------------
+def _write_json(path: str, data: Any) -> None:
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as fh:
+        json.dump(data, fh)
+    os.replace(tmp, path)
+
+
+def _read_json(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _label_pid(families: Dict[str, Dict[str, Any]], pid: str) -> Dict[str, Dict[str, Any]]:
+    """افزودن برچسب pid به نمونه‌های Gaugeهای liveall یک پردازه."""
+    labelled = dict(families)
+    for name, family in families.items():
+        if family["type"] == "gauge" and family.get("mode") == "liveall":
+            labelled[name] = {
+                **family,
+                "labelnames": family["labelnames"] + ["pid"],
+                "samples": [[labels + [pid], value] for labels, value in family["samples"]],
+            }
+    return labelled
+
+
+def _merge(into: Dict[str, Dict[str, Any]], families: Dict[str, Dict[str, Any]], gauges: bool) -> None:
+    """
+    ادغام مقادیر families با into (بر اساس نام متریک و برچسب‌ها): جمع، یا
+    بیشینه برای Gaugeهای max.
+    """
+    for name, family in families.items():
+        if family["type"] == "gauge" and not gauges:
+            continue
+        target = into.get(name)
+        if target is None:
+            target = into[name] = {**family, "samples": []}
+        samples = {tuple(sample[0]): sample for sample in target["samples"]}
+        for sample in family["samples"]:
+            existing = samples.get(tuple(sample[0]))
+            if existing is None:
+                copied = [sample[0], list(sample[1]), sample[2]] if family["type"] == "histogram" else list(sample)
+                target["samples"].append(copied)
+                samples[tuple(sample[0])] = copied
+            elif family["type"] == "histogram":
+                if len(existing[1]) == len(sample[1]):
+                    existing[1] = [a + b for a, b in zip(existing[1], sample[1])]
+                    existing[2] += sample[2]
+            elif family.get("mode") == "max":
+                existing[1] = max(existing[1], sample[1])
+            else:
+                existing[1] += sample[1]
+
+
+def merge_directory(directory: str) -> Dict[str, Dict[str, Any]]:
+    """
+    جمع مقادیر همه پردازه‌ها. فایل پردازه‌های خاتمه‌یافته (به جز Gaugeها) در
+    archive.json ادغام و سپس حذف می‌شود؛ یک قفل فایل از ادغام همزمان جلوگیری می‌کند.
+    """
+    archive_path = os.path.join(directory, ARCHIVE_FILE)
+    with open(os.path.join(directory, LOCK_FILE), "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        archive = _read_json(archive_path) or {}
+        merged: Dict[str, Dict[str, Any]] = {}
+        dead: List[str] = []
+        for entry in os.scandir(directory):
+            stem, ext = os.path.splitext(entry.name)
+            if ext != ".json" or not stem.isdigit():
+                continue
+            families = _read_json(entry.path)
+            if families is None:
+                continue
+            if _alive(int(stem)):
+                _merge(merged, _label_pid(families, stem), gauges=True)
+            else:
+                _merge(archive, families, gauges=False)
+                dead.append(entry.path)
+        if dead:
+            _write_json(archive_path, archive)
+            for path in dead:
+                os.remove(path)
+    _merge(merged, archive, gauges=False)
+    return merged
+
+
+def reset_directory(directory: str) -> None:
+    """پاک کردن فایل‌های اجرای قبلی؛ فقط پیش از شروع Workerها فراخوانی شود."""
+    os.makedirs(directory, exist_ok=True)
+    for entry in os.scandir(directory):
+        if entry.name.endswith(".json") or entry.name.endswith(".tmp"):
+            os.remove(entry.path)
+
+
+# ----------------------------------------------------------------------
+# قالب متنی Prometheus (نسخه 0.0.4)
+# ----------------------------------------------------------------------
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def exposition(families: Dict[str, Dict[str, Any]]) -> str:
+    lines: List[str] = []
+    for name in sorted(families):
+        family = families[name]
+        names = family["labelnames"]
+        lines.append(f"# HELP {name} {family['help']}")
+        lines.append(f"# TYPE {name} {family['type']}")
+        if family["type"] != "histogram":
+            for labels, value in family["samples"]:
+                lines.append(f"{name}{_format_labels(names, labels)} {_format_value(value)}")
+            continue
+        bounds = family["buckets"] + [float("inf")]
+        for labels, counts, total in family["samples"]:
+            running = 0
+            for bound, count in zip(bounds, counts):
+                running += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{name}_bucket{_format_labels(names, labels, le)} {running}")
+            lines.append(f"{name}_sum{_format_labels(names, labels)} {_format_value(total)}")
+            lines.append(f"{name}_count{_format_labels(names, labels)} {running}")
+    return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
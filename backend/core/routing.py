@@ -0,0 +1,303 @@
+import asyncio
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from backend.core.config import settings
+from backend.core.deadline import current_deadline
+from backend.core.metrics import registry
+from backend.core.upstream import UpstreamClient, UpstreamError, build_providers
+
+# آمار سلامت جدا در هر Worker نگه داشته می‌شود و با برچسب pid گزارش می‌شود
+upstream_latency_ewma = registry.gauge(
+    "upstream_provider_latency_ewma_seconds",
+    "EWMA of successful upstream call latency.",
+    ("provider",),
+    multiprocess_mode="liveall",
+)
+upstream_error_rate = registry.gauge(
+    "upstream_provider_error_rate",
+    "EWMA of the upstream call error rate.",
+    ("provider",),
+    multiprocess_mode="liveall",
+)
+upstream_ejected = registry.gauge(
+    "upstream_provider_ejected",
+    "1 while a provider is ejected from routing after failures.",
+    ("provider",),
+    multiprocess_mode="liveall",
+)
+upstream_failovers = registry.counter(
+    "upstream_failovers_total", "Requests moved to another provider after a failed call.", ("provider", "reason")
+)
+upstream_probes = registry.counter(
+    "upstream_probes_total", "Calls sent to a recovering provider to check its health.", ("provider",)
+)
+
+# ----------------------------------------------------------------------
+# مسیریابی درخواست‌ها بین ارائه‌دهنده‌های مدل با توجه به زمان پاسخ و خطا
+# ----------------------------------------------------------------------
+# برای هر ارائه‌دهنده میانگین متحرک نمایی (EWMA) زمان پاسخ و نرخ خطا نگه داشته
+# می‌شود (جدا در هر Worker). هر درخواست بر اساس سیاست گروه مسیرش به بهترین
+# ارائه‌دهنده سالم فرستاده می‌شود و با خطا به ارائه‌دهنده بعدی منتقل می‌شود
+# (Failover). ارائه‌دهنده‌ای که پیاپی خطا می‌دهد برای مدتی کنار گذاشته می‌شود و
+# پس از آن فقط سهم کوچکی از درخواست‌ها (Probe) را می‌گیرد تا بهبودش تأیید شود.
+
+POLICIES = ("fastest", "cheapest")
+# حداکثر ضریب دو برابر شدن مدت کنار گذاشتن پس از آزمایش‌های ناموفق
+MAX_EJECT_BACKOFF = 8
+# حداقل (1 - نرخ خطا) در تخمین زمان مورد انتظار، تا امتیاز بی‌نهایت نشود
+MIN_SUCCESS_RATE = 0.05
+
+
+class ProviderStats:
+    """آمار و وضعیت سلامت یک ارائه‌دهنده در این Worker."""
+
+    __slots__ = ("latency", "error_rate", "samples", "failures", "ejected_until", "backoff", "recovering", "probing")
+
+    def __init__(self) -> None:
+        # EWMA زمان پاسخ (ثانیه)؛ None یعنی هنوز فراخوانی موفقی ثبت نشده است
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.samples = 0
+        # خطاهای پیاپی
+        self.failures = 0
+        self.ejected_until = 0.0
+        self.backoff = 1
+        # کنار گذاشته شده و هنوز فراخوانی موفقی پس از آن نداشته است
+        self.recovering = False
+        # یک درخواست آزمایشی در حال اجراست
+        self.probing = False
+
+
+class ProviderRouter:
+    """
+    انتخاب ارائه‌دهنده هر درخواست و Failover بین ارائه‌دهنده‌ها.
+
+    سیاست fastest کمترین زمان مورد انتظار (EWMA زمان پاسخ تقسیم بر نرخ موفقیت)
+    و سیاست cheapest کمترین هزینه (و در هزینه برابر، سریع‌ترین) را ترجیح می‌دهد.
+    ارائه‌دهنده بدون آمار زمان مورد انتظار صفر دارد تا یک بار امتحان شود.
+    """
+
+    def __init__(
+        self,
+        providers: Sequence[UpstreamClient],
+        *,
+        alpha: float,
+        eject_after: int,
+        error_threshold: float,
+        eject_seconds: float,
+        probe_ratio: float,
+        max_attempts: int,
+        default_policy: str,
+        policies: Dict[str, str],
+        clock: Callable[[], float] = time.monotonic,
+        rng: Callable[[], float] = random.random,
+    ):
+        self.providers: Dict[str, UpstreamClient] = {provider.name: provider for provider in providers}
+        self.stats: Dict[str, ProviderStats] = {name: ProviderStats() for name in self.providers}
+        self.alpha = alpha
+        self.eject_after = eject_after
+        self.error_threshold = error_threshold
+        self.eject_seconds = eject_seconds
+        self.probe_ratio = probe_ratio
+        self.max_attempts = max_attempts
+        for policy in (default_policy, *policies.values()):
+            if policy not in POLICIES:
+                raise ValueError(f"Unknown upstream routing policy {policy!r}")
+        self.default_policy = default_policy
+        # طولانی‌ترین پیشوند اول
+        self.policies = sorted(policies.items(), key=lambda item: len(item[0]), reverse=True)
+        self.clock = clock
+        self.rng = rng
+
+    # ------------------- انتخاب ارائه‌دهنده -------------------
+    def policy_for(self, route: Optional[str]) -> str:
+        """سیاست گروه مسیر (طولانی‌ترین پیشوند منطبق) یا سیاست پیش‌فرض."""
+        if route is not None:
+            for prefix, policy in self.policies:
+                if route == prefix or route.startswith(prefix.rstrip("/") + "/"):
+                    return policy
+        return self.default_policy
+
+    def expected_latency(self, name: str) -> float:
+        stats = self.stats[name]
+        if stats.latency is None:
+            return 0.0
+        return stats.latency / max(1.0 - stats.error_rate, MIN_SUCCESS_RATE)
+
+    def plan(self, policy: str) -> List[Tuple[str, bool]]:
+        """
+        ترتیب ارائه‌دهنده‌هایی که برای یک درخواست امتحان می‌شوند، به شکل
+        (name, probe). ارائه‌دهنده بهبودیافته با احتمال probe_ratio (یا اگر
+        ارائه‌دهنده سالمی نباشد) اول و به عنوان Probe امتحان می‌شود و در غیر این
+        صورت فقط پس از ارائه‌دهنده‌های سالم و بدون علامت Probe (خطای آن مدت کنار
+        گذاشتن را دو برابر نمی‌کند)؛ ارائه‌دهنده‌های کنار گذاشته‌شده فقط وقتی
+        امتحان می‌شوند که گزینه دیگری نباشد.
+        """
+        now = self.clock()
+        if policy == "cheapest":
+            key = lambda name: (self.providers[name].cost, self.expected_latency(name))  # noqa: E731
+        else:
+            key = self.expected_latency
+        healthy, recovering, ejected = [], [], []
+        for name, stats in self.stats.items():
+            if stats.ejected_until > now:
+                ejected.append(name)
+            elif stats.recovering:
+                recovering.append(name)
+            else:
+                healthy.append(name)
+        healthy.sort(key=key)
+        # ارائه‌دهنده‌ای که زودتر کنار گذاشته شده، زودتر آزمایش می‌شود
+        recovering.sort(key=lambda name: self.stats[name].ejected_until)
+
+        order = [(name, False) for name in healthy]
+        fallbacks = recovering
+        probe = next((name for name in recovering if not self.stats[name].probing), None)
+        if probe is not None and (not healthy or self.rng() < self.probe_ratio):
+            order.insert(0, (probe, True))
+            fallbacks = [name for name in recovering if name != probe]
+        order.extend((name, False) for name in fallbacks)
+        if not order:
+            ejected.sort(key=lambda name: self.stats[name].ejected_until)
+            order = [(name, True) for name in ejected]
+        return order[: self.max_attempts]
+
+    # ------------------- ثبت نتیجه فراخوانی‌ها -------------------
+    def record(self, name: str, *, ok: bool, latency: float, probe: bool = False, timed_out: bool = False) -> None:
+        """
+        به‌روزرسانی EWMAها و وضعیت سلامت پس از یک فراخوانی. probe یعنی فراخوانی
+        پس از کنار گذاشتن ارائه‌دهنده شروع شده است؛ خطای فراخوانی‌هایی که پیش از آن
+        شروع شده بودند مدت کنار گذاشتن را افزایش نمی‌دهد.
+        """
+        stats = self.stats[name]
+        alpha = self.alpha
+        # زمان Timeoutها هم ثبت می‌شود تا ارائه‌دهنده کند در سیاست fastest عقب برود
+        if ok or timed_out:
+            stats.latency = latency if stats.latency is None else (1 - alpha) * stats.latency + alpha * latency
+        stats.error_rate = (1 - alpha) * stats.error_rate + alpha * (0.0 if ok else 1.0)
+        stats.samples += 1
+
+        if ok:
+            stats.failures = 0
+            if stats.recovering:
+                # بهبود تأیید شد: آمار خطا از نو شروع می‌شود
+                stats.recovering = False
+                stats.backoff = 1
+                stats.error_rate = 0.0
+                stats.samples = 0
+            return
+
+        if stats.recovering:
+            if probe:
+                # آزمایش ناموفق: کنار گذاشتن دوباره با مدت دو برابر
+                stats.backoff = min(stats.backoff * 2, MAX_EJECT_BACKOFF)
+                self._eject(stats)
+            return
+        stats.failures += 1
+        if stats.failures >= self.eject_after or (
+            stats.samples >= self.eject_after and stats.error_rate > self.error_threshold
+        ):
+            self._eject(stats)
+
+    def _eject(self, stats: ProviderStats) -> None:
+        stats.ejected_until = self.clock() + self.eject_seconds * stats.backoff
+        stats.recovering = True
+        stats.failures = 0
+
+    # ------------------- فراخوانی -------------------
+    async def generate(self, prompt: str, *, route: Optional[str] = None) -> Tuple[UpstreamClient, str]:
+        """
+        تولید پاسخ با بهترین ارائه‌دهنده و Failover به بعدی‌ها در صورت خطا.
+
+        :return: (ارائه‌دهنده پاسخ‌دهنده، پاسخ)
+        :raises UpstreamError: خطای آخرین ارائه‌دهنده امتحان‌شده، یا بلافاصله با پایان مهلت درخواست
+        """
+        order = self.plan(self.policy_for(route))
+        if not order:
+            raise UpstreamError("router", "no_provider", "No upstream model provider is configured", 503)
+
+        last_error: Optional[UpstreamError] = None
+        for attempt, (name, probe) in enumerate(order):
+            provider = self.providers[name]
+            stats = self.stats[name]
+            if probe:
+                upstream_probes.labels(name).inc()
+                stats.probing = True
+            started = self.clock()
+            try:
+                answer = await provider.generate(prompt)
+            except UpstreamError as exc:
+                deadline = current_deadline.get()
+                if exc.reason == "deadline" or (deadline is not None and deadline.expired):
+                    # زمانی برای ارائه‌دهنده دیگر نمانده و خطا ربطی به این ارائه‌دهنده ندارد
+                    raise
+                self.record(
+                    name, ok=False, latency=self.clock() - started, probe=probe, timed_out=exc.reason == "timeout"
+                )
+                last_error = exc
+                if attempt + 1 < len(order):
+                    upstream_failovers.labels(name, exc.reason).inc()
+                continue
+            finally:
+                if probe:
+                    stats.probing = False
+            self.record(name, ok=True, latency=self.clock() - started, probe=probe)
+            return provider, answer
+        raise last_error
+
+    def model_of(self, name: str) -> str:
+        """نام مدل یک ارائه‌دهنده (برای سابقه و مصرف درخواست‌های ناموفق)."""
+        provider = self.providers.get(name)
+        return provider.model if provider is not None else name
+
+    # ------------------- مانیتورینگ -------------------
+    def collect(self) -> None:
+        now = self.clock()
+        for name, stats in self.stats.items():
+            upstream_latency_ewma.labels(name).set(stats.latency or 0.0)
+            upstream_error_rate.labels(name).set(stats.error_rate)
+            upstream_ejected.labels(name).set(1 if stats.ejected_until > now else 0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = self.clock()
+        providers = {}
+        for name, stats in self.stats.items():
+            if stats.ejected_until > now:
+                state = "ejected"
+            elif stats.recovering:
+                state = "recovering"
+            else:
+                state = "healthy"
+            providers[name] = {
+                "model": self.providers[name].model,
+                "cost": self.providers[name].cost,
+                "state": state,
+                "latency_ms": round(stats.latency * 1000, 1) if stats.latency is not None else None,
+                "error_rate": round(stats.error_rate, 4),
+                "consecutive_failures": stats.failures,
+                "ejected_for_seconds": round(max(stats.ejected_until - now, 0.0), 1),
+            }
+        return {
+            "default_policy": self.default_policy,
+            "policies": dict(self.policies),
+            "providers": providers,
+        }
+
+    async def aclose(self) -> None:
+        await asyncio.gather(*(provider.aclose() for provider in self.providers.values()))
+
+
+upstream_router = ProviderRouter(
+    build_providers(),
+    alpha=settings.UPSTREAM_EWMA_ALPHA,
+    eject_after=settings.UPSTREAM_EJECT_AFTER_FAILURES,
+    error_threshold=settings.UPSTREAM_ERROR_RATE_THRESHOLD,
+    eject_seconds=settings.UPSTREAM_EJECT_SECONDS,
+    probe_ratio=settings.UPSTREAM_PROBE_RATIO,
+    max_attempts=settings.UPSTREAM_MAX_ATTEMPTS,
+    default_policy=settings.UPSTREAM_ROUTING_DEFAULT_POLICY,
+    policies=settings.UPSTREAM_ROUTING_POLICIES,
+)
+registry.add_collector(upstream_router.collect)
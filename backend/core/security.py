@@ -1,10 +1,17 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Any
-from passlib.context import CryptContext
-from jose import jwt
+from typing import Any, Callable, Dict, Optional, Tuple
 
 # ماژول تنظیمات را وارد می‌کنیم. این ماژول را در گام بعدی ایجاد خواهیم کرد.
 from backend.core.config import settings
+from backend.core.lazy import lazy_import
+
+# passlib و jose.jwt (به همراه backendهای رمزنگاری) فقط در اولین ورود، ثبت‌نام
+# یا بررسی توکن بارگذاری می‌شوند، نه هنگام شروع برنامه
+passlib_context = lazy_import("passlib.context")
+jwt = lazy_import("jose.jwt")
 
 # ----------------------------------------------------------------------
 # تنظیمات پسورد
@@ -12,15 +19,139 @@ from backend.core.config import settings
 
 # تعریف متد هشینگ برای پسوردها.
 # استفاده از bcrypt برای هش کردن پسوردها که امن و استاندارد است.
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# min/max برابر با هزینه فعلی باعث می‌شود هش‌های با هزینه دیگر needs_update شوند.
+# Context در اولین استفاده ساخته می‌شود تا passlib هنگام ایمپورت بارگذاری نشود.
+_pwd_context = None
+
+def get_pwd_context() -> Any:
+    """CryptContext مشترک bcrypt (ساخت تنبل در اولین فراخوانی)."""
+    global _pwd_context
+    if _pwd_context is None:
+        _pwd_context = passlib_context.CryptContext(
+            schemes=["bcrypt"],
+            deprecated="auto",
+            bcrypt__rounds=settings.BCRYPT_ROUNDS,
+            bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+            bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+        )
+    return _pwd_context
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """پسورد خام (plain_password) را با پسورد هش شده ذخیره شده در دیتابیس مقایسه می‌کند."""
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     """یک پسورد خام را هش می‌کند و برای ذخیره در دیتابیس آماده می‌سازد."""
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    بررسی پسورد و در صورت قدیمی بودن هش (مثلاً هزینه bcrypt متفاوت)، تولید هش جدید.
+    :return: (معتبر بودن، هش جدید یا None)
+    """
+    return get_pwd_context().verify_and_update(plain_password, hashed_password)
+
+# ----------------------------------------------------------------------
+# اجرای bcrypt خارج از event loop
+# ----------------------------------------------------------------------
+
+class PasswordHasher:
+    """
+    اجرای توابع bcrypt روی یک استخر Thread یا Process محدود، تا هر هش (ده‌ها
+    میلی‌ثانیه CPU) event loop و سایر درخواست‌ها را متوقف نکند.
+    bcrypt هنگام محاسبه GIL را آزاد می‌کند، بنابراین استخر Thread کافی است.
+
+    تعداد کارهای ارسالی به استخر با یک Semaphore محدود می‌شود؛ در زمان هجوم
+    درخواست‌های ورود، فراخواننده‌های اضافه منتظر می‌مانند و عمق صف قابل مشاهده است.
+    """
+
+    def __init__(self, *, kind: str, workers: int, max_pending: int):
+        self.kind = kind
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[Executor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        # آمار برای مانیتورینگ
+        self.calls = 0
+        self.pending = 0
+        self.max_pending_seen = 0
+        self.waiting = 0
+        self.total_seconds = 0.0
+
+    def _get_executor(self) -> Executor:
+        # ساخت تنبل (lazy) تا ایمپورت ماژول استخری راه‌اندازی نکند
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="password-hash"
+                )
+        return self._executor
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """اجرای fn(*args) روی استخر و انتظار برای نتیجه."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_pending)
+        started = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.pending += 1
+        self.max_pending_seen = max(self.max_pending_seen, self.pending)
+        try:
+            future = asyncio.get_running_loop().run_in_executor(self._get_executor(), fn, *args)
+        except BaseException:
+            self._done(started, None)
+            raise
+        # مجوز با پایان خود کار bcrypt آزاد می‌شود، نه با لغو فراخواننده (مهلت
+        # درخواست یا قطع اتصال)؛ در غیر این صورت max_pending کارهای در حال اجرا
+        # در استخر را محدود نمی‌کرد. shield مانع لغو Future کار در حال اجرا می‌شود.
+        future.add_done_callback(lambda done: self._done(started, done))
+        return await asyncio.shield(future)
+
+    def _done(self, started: float, future: Optional[asyncio.Future]) -> None:
+        if future is not None and not future.cancelled():
+            # خطای کار فراخواننده لغوشده بدون هشدار "never retrieved" کنار گذاشته می‌شود
+            future.exception()
+        self.pending -= 1
+        self._semaphore.release()
+        self.calls += 1
+        self.total_seconds += time.perf_counter() - started
+
+    def snapshot(self) -> Dict[str, Any]:
+        """وضعیت لحظه‌ای استخر: کارهای در صف (منتظر Worker) و منتظر ظرفیت."""
+        return {
+            "executor": self.kind,
+            "workers": self.workers,
+            "in_flight": min(self.pending, self.workers),
+            "queue_depth": max(self.pending - self.workers, 0) + self.waiting,
+            "max_pending": self.max_pending_seen,
+            "calls": self.calls,
+            "avg_ms": self.total_seconds * 1000 / self.calls if self.calls else 0.0,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    kind=settings.PASSWORD_HASH_EXECUTOR,
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
+
+async def hash_password(password: str) -> str:
+    """نسخه ناهمگام get_password_hash که روی استخر هش اجرا می‌شود."""
+    return await password_hasher.run(get_password_hash, password)
+
+async def verify_password_and_rehash(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """نسخه ناهمگام verify_and_update_password که روی استخر هش اجرا می‌شود."""
+    return await password_hasher.run(verify_and_update_password, plain_password, hashed_password)
 
 # ----------------------------------------------------------------------
 # توابع JWT (JSON Web Token)
@@ -52,7 +183,7 @@ def create_access_token(
     encoded_jwt = jwt.encode(
         to_encode, 
         settings.SECRET_KEY, 
-        algorithm=settings.ALGORITHM
+        algorithm=settings.SECURITY_ALGORITHM
     )
     
     return encoded_jwt
@@ -0,0 +1,292 @@
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from backend.core.config import settings
+from backend.core.deadline import DeadlineExceeded, current_deadline
+from backend.core.metrics import registry
+
+# ----------------------------------------------------------------------
+# فراخوانی مدل‌های هوش مصنوعی بالادستی (Upstream)
+# ----------------------------------------------------------------------
+# هر ارائه‌دهنده (Hugging Face، Gemini، مدل محلی سازگار با OpenAI) یک کلاینت
+# با رابط یکسان generate() است؛ انتخاب ارائه‌دهنده هر درخواست با
+# backend/core/routing.py است.
+# کلاینت httpx ناهمگام و ماندگار است (اتصال‌های keep-alive بین درخواست‌ها
+# بازاستفاده می‌شوند) و زمان، خطاها و فراخوانی‌های در حال اجرای هر ارائه‌دهنده
+# در متریک‌ها ثبت می‌شود. Timeout هر فراخوانی به زمان باقی‌مانده مهلت درخواست
+# محدود می‌شود و فراخوانی‌های لغوشده با outcome="cancelled" ثبت می‌شوند.
+
+UPSTREAM_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+upstream_duration = registry.histogram(
+    "upstream_request_duration_seconds",
+    "Upstream model call latency by provider and outcome.",
+    ("provider", "outcome"),
+    buckets=UPSTREAM_BUCKETS,
+)
+upstream_errors = registry.counter(
+    "upstream_errors_total", "Failed upstream model calls by provider and reason.", ("provider", "reason")
+)
+upstream_in_flight = registry.gauge(
+    "upstream_requests_in_flight", "Upstream model calls currently waiting for a response.", ("provider",)
+)
+
+
+class UpstreamError(Exception):
+    """
+    خطای فراخوانی مدل بالادستی.
+
+    :param reason: دسته خطا برای متریک‌ها (timeout، deadline، transport، http_<status>، bad_response)
+    :param status_code: کد وضعیتی که به کلاینت برگردانده می‌شود (502 یا 504)
+    """
+
+    def __init__(self, provider: str, reason: str, detail: str, status_code: int = 502):
+        super().__init__(detail)
+        self.provider = provider
+        self.reason = reason
+        self.detail = detail
+        self.status_code = status_code
+
+
+class UpstreamClient:
+    """
+    پایه کلاینت‌های مدل بالادستی: کلاینت httpx ماندگار، Timeout محدود به مهلت
+    درخواست، نگاشت خطاها به UpstreamError و متریک‌های هر فراخوانی.
+    زیرکلاس‌ها فقط _generate (ساخت درخواست و خواندن پاسخ) را پیاده‌سازی می‌کنند.
+
+    :param cost: هزینه نسبی هر فراخوانی برای سیاست مسیریابی cheapest
+    """
+
+    name = "upstream"
+
+    def __init__(self, endpoint: str, *, model: str, timeout: float, cost: float = 1.0):
+        self.endpoint = endpoint
+        self.model = model
+        self.timeout = timeout
+        self.cost = cost
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _headers(self) -> Dict[str, str]:
+        return {"Content-Type": "application/json"}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # کلاینت در اولین استفاده (داخل event loop هر Worker) ساخته می‌شود
+        if self._client is None:
+            self._client = httpx.AsyncClient(headers=self._headers(), timeout=self.timeout)
+        return self._client
+
+    async def generate(self, prompt: str) -> str:
+        """تولید پاسخ برای prompt؛ در صورت خطا UpstreamError."""
+        started = time.perf_counter()
+        outcome = "error"
+        in_flight = upstream_in_flight.labels(self.name)
+        in_flight.inc()
+        try:
+            answer = await self._generate(prompt)
+            outcome = "ok"
+            return answer
+        except UpstreamError as exc:
+            upstream_errors.labels(self.name, exc.reason).inc()
+            raise
+        except asyncio.CancelledError:
+            # مهلت درخواست تمام شد یا کلاینت اتصال را بست
+            outcome = "cancelled"
+            raise
+        finally:
+            in_flight.dec()
+            upstream_duration.labels(self.name, outcome).observe(time.perf_counter() - started)
+
+    def _timeout(self) -> float:
+        deadline = current_deadline.get()
+        if deadline is None:
+            return self.timeout
+        try:
+            return deadline.clamp(self.timeout)
+        except DeadlineExceeded:
+            raise UpstreamError(self.name, "deadline", "Request deadline exceeded", status_code=504)
+
+    async def _post_json(self, url: str, payload: Dict[str, Any]) -> Any:
+        """ارسال درخواست و برگرداندن بدنه JSON پاسخ؛ خطاهای شبکه و HTTP به UpstreamError."""
+        try:
+            response = await self.client.post(url, json=payload, timeout=self._timeout())
+        except httpx.TimeoutException:
+            raise UpstreamError(self.name, "timeout", "Upstream model timed out", status_code=504)
+        except httpx.TransportError as exc:
+            raise UpstreamError(self.name, "transport", f"Upstream model unreachable: {exc}")
+
+        if response.status_code >= 400:
+            raise UpstreamError(
+                self.name, f"http_{response.status_code}", self._error_detail(response)
+            )
+
+        try:
+            return response.json()
+        except ValueError:
+            raise UpstreamError(self.name, "bad_response", "Upstream model returned invalid JSON")
+
+    async def _generate(self, prompt: str) -> str:
+        raise NotImplementedError
+
+    def _error_detail(self, response: httpx.Response) -> str:
+        try:
+            message = response.json().get("error", response.text)
+            # Gemini و APIهای سازگار با OpenAI خطا را به شکل {"error": {"message": ...}} برمی‌گردانند
+            if isinstance(message, dict):
+                message = message.get("message", response.text)
+        except (ValueError, AttributeError):
+            message = response.text or "Service Unavailable"
+        return f"{response.status_code}: {message}"
+
+    def _bad_response(self, detail: str = "Unexpected response format from AI model") -> UpstreamError:
+        return UpstreamError(self.name, "bad_response", detail)
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class HuggingFaceClient(UpstreamClient):
+    """کلاینت Hugging Face Inference API برای مدل‌های تولید متن."""
+
+    name = "huggingface"
+
+    def __init__(self, endpoint: str, token: Optional[str], timeout: float, *, cost: float = 1.0):
+        # نام مدل آخرین جزء مسیر endpoint است
+        super().__init__(endpoint, model=endpoint.rstrip("/").rsplit("/", 1)[-1], timeout=timeout, cost=cost)
+        self.token = token
+
+    def _headers(self) -> Dict[str, str]:
+        headers = super()._headers()
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        return headers
+
+    def _payload(self, prompt: str) -> Dict[str, Any]:
+        return {
+            "inputs": prompt,
+            "parameters": {
+                "max_new_tokens": settings.HF_MAX_NEW_TOKENS,
+                "temperature": settings.HF_TEMPERATURE,
+                "return_full_text": False,
+            },
+        }
+
+    async def _generate(self, prompt: str) -> str:
+        data = await self._post_json(self.endpoint, self._payload(prompt))
+
+        # Hugging Face معمولاً لیستی شامل generated_text برمی‌گرداند
+        if data and isinstance(data, list) and isinstance(data[0], dict) and "generated_text" in data[0]:
+            return data[0]["generated_text"].strip()
+        if isinstance(data, dict) and "error" in data:
+            raise self._bad_response(f"AI Model Execution Error: {data['error']}")
+        raise self._bad_response()
+
+    def _error_detail(self, response: httpx.Response) -> str:
+        if response.status_code == 401:
+            return "401: Authentication Failed. Check HF_API_TOKEN validity."
+        if response.status_code == 404:
+            return "404: Model Not Found."
+        return super()._error_detail(response)
+
+
+class GeminiClient(UpstreamClient):
+    """
+    کلاینت Gemini از طریق REST API (generateContent). به جای SDK از همان
+    کلاینت httpx استفاده می‌شود تا Timeout مهلت، متریک‌ها و نگاشت خطاها با سایر
+    ارائه‌دهنده‌ها یکسان باشد.
+    """
+
+    name = "gemini"
+
+    def __init__(self, base_url: str, api_key: str, model: str, timeout: float, *, cost: float = 1.0):
+        super().__init__(
+            f"{base_url.rstrip('/')}/models/{model}:generateContent", model=model, timeout=timeout, cost=cost
+        )
+        self.api_key = api_key
+
+    def _headers(self) -> Dict[str, str]:
+        return {**super()._headers(), "x-goog-api-key": self.api_key}
+
+    async def _generate(self, prompt: str) -> str:
+        data = await self._post_json(
+            self.endpoint,
+            {
+                "contents": [{"role": "user", "parts": [{"text": prompt}]}],
+                "generationConfig": {
+                    "maxOutputTokens": settings.HF_MAX_NEW_TOKENS,
+                    "temperature": settings.HF_TEMPERATURE,
+                },
+            },
+        )
+        try:
+            parts = data["candidates"][0]["content"]["parts"]
+            return "".join(part.get("text", "") for part in parts).strip()
+        except (KeyError, IndexError, TypeError):
+            # پاسخ مسدودشده توسط فیلتر ایمنی هیچ candidate ندارد
+            raise self._bad_response()
+
+
+class LocalModelClient(UpstreamClient):
+    """
+    کلاینت مدل محلی با API سازگار با OpenAI (chat/completions)، مانند vLLM،
+    llama.cpp server یا Ollama.
+    """
+
+    name = "local"
+
+    def __init__(self, endpoint: str, model: str, timeout: float, *, cost: float = 1.0):
+        super().__init__(f"{endpoint.rstrip('/')}/chat/completions", model=model, timeout=timeout, cost=cost)
+
+    async def _generate(self, prompt: str) -> str:
+        data = await self._post_json(
+            self.endpoint,
+            {
+                "model": self.model,
+                "messages": [{"role": "user", "content": prompt}],
+                "max_tokens": settings.HF_MAX_NEW_TOKENS,
+                "temperature": settings.HF_TEMPERATURE,
+            },
+        )
+        try:
+            return data["choices"][0]["message"]["content"].strip()
+        except (KeyError, IndexError, TypeError, AttributeError):
+            raise self._bad_response()
+
+
+def build_providers() -> List[UpstreamClient]:
+    """
+    کلاینت ارائه‌دهنده‌های پیکربندی‌شده به ترتیب UPSTREAM_PROVIDERS؛ Gemini بدون
+    GEMINI_API_KEY و مدل محلی بدون LOCAL_MODEL_ENDPOINT کنار گذاشته می‌شوند.
+    """
+    costs = settings.UPSTREAM_PROVIDER_COSTS
+    providers: List[UpstreamClient] = []
+    for name in settings.UPSTREAM_PROVIDERS:
+        cost = costs.get(name, 1.0)
+        if name == HuggingFaceClient.name:
+            providers.append(
+                HuggingFaceClient(
+                    settings.HF_MODEL_ENDPOINT, settings.HF_API_TOKEN, settings.UPSTREAM_TIMEOUT, cost=cost
+                )
+            )
+        elif name == GeminiClient.name and settings.GEMINI_API_KEY:
+            providers.append(
+                GeminiClient(
+                    settings.GEMINI_BASE_URL,
+                    settings.GEMINI_API_KEY,
+                    settings.GEMINI_MODEL,
+                    settings.UPSTREAM_TIMEOUT,
+                    cost=cost,
+                )
+            )
+        elif name == LocalModelClient.name and settings.LOCAL_MODEL_ENDPOINT:
+            providers.append(
+                LocalModelClient(
+                    settings.LOCAL_MODEL_ENDPOINT, settings.LOCAL_MODEL_NAME, settings.UPSTREAM_TIMEOUT, cost=cost
+                )
+            )
+    return providers
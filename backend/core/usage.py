@@ -0,0 +1,88 @@
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+# ----------------------------------------------------------------------
+# شمارش مصرف (Usage Metering) برای صورت‌حساب
+# ----------------------------------------------------------------------
+# مسیر درخواست فقط چند شمارنده درون‌حافظه‌ای را برای کلید (کاربر، مدل، دقیقه)
+# افزایش می‌دهد؛ Task پس‌زمینه (backend/crud/usage.py) شمارنده‌ها را به صورت
+# دوره‌ای با UPSERT افزایشی در جدول usage_minute می‌نویسد.
+
+# ترتیب شمارنده‌ها در هر ردیف؛ هم‌نام ستون‌های جداول مصرف
+FIELDS = ("requests", "errors", "prompt_chars", "completion_chars", "latency_ms", "upstream_ms")
+UsageKey = Tuple[int, str, int]
+# شناسه ثبت مصرف فراخوانی‌های مدل (/answer) بدون احراز هویت
+ANONYMOUS_USER_ID = 0
+
+
+class UsageContext:
+    """
+    اطلاعات مصرف درخواست جاری؛ میان‌افزار آن را در ContextVar قرار می‌دهد و
+    احراز هویت (user_id) و مسیر /answer (مدل، طول متن‌ها) آن را تکمیل می‌کنند.
+    """
+
+    __slots__ = ("user_id", "model", "prompt_chars", "completion_chars", "upstream_ms", "failed")
+
+    def __init__(self) -> None:
+        self.user_id: Optional[int] = None
+        self.model: Optional[str] = None
+        self.prompt_chars = 0
+        self.completion_chars = 0
+        self.upstream_ms = 0
+        self.failed = False
+
+
+current_usage: ContextVar[Optional[UsageContext]] = ContextVar("current_usage", default=None)
+
+
+class UsageMeter:
+    """شمارنده‌های مصرف هر (کاربر، مدل، دقیقه) در این Worker از آخرین تخلیه."""
+
+    def __init__(self) -> None:
+        self._counters: Dict[UsageKey, List[int]] = {}
+        self.recorded = 0
+
+    def record(
+        self,
+        user_id: int,
+        model: str,
+        *,
+        errors: int = 0,
+        prompt_chars: int = 0,
+        completion_chars: int = 0,
+        latency_ms: int = 0,
+        upstream_ms: int = 0,
+    ) -> None:
+        key = (user_id, model, int(time.time()) // 60)
+        counters = self._counters.get(key)
+        if counters is None:
+            counters = self._counters[key] = [0, 0, 0, 0, 0, 0]
+        counters[0] += 1
+        counters[1] += errors
+        counters[2] += prompt_chars
+        counters[3] += completion_chars
+        counters[4] += latency_ms
+        counters[5] += upstream_ms
+        self.recorded += 1
+
+    def drain(self) -> Dict[UsageKey, List[int]]:
+        """برداشتن همه شمارنده‌ها (شمارش از صفر ادامه می‌یابد)."""
+        counters, self._counters = self._counters, {}
+        return counters
+
+    def restore(self, counters: Dict[UsageKey, List[int]]) -> None:
+        """بازگرداندن شمارنده‌های تخلیه‌شده‌ای که نوشتنشان ناموفق بود."""
+        for key, values in counters.items():
+            current = self._counters.get(key)
+            if current is None:
+                self._counters[key] = values
+            else:
+                for index, value in enumerate(values):
+                    current[index] += value
+
+    def __len__(self) -> int:
+        return len(self._counters)
+
+
+usage_meter = UsageMeter()
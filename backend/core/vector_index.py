@@ -0,0 +1,232 @@
+import fcntl
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from backend.core.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+# ----------------------------------------------------------------------
+# ایندکس برداری فشرده روی فایل (Memory-Mapped)
+# ----------------------------------------------------------------------
+# بردارها در یک ماتریس float32 خام ({name}.f32، سطر به سطر) و شناسه و مالک هر
+# سطر در یک آرایه int64 با شکل (n, 2) ({name}.ids.npy) نگه داشته می‌شوند. هر
+# پردازه ماتریس را با mmap فقط‌خواندنی باز می‌کند، پس صفحات آن در Page Cache
+# بین همه Workerها مشترک است و حافظه RSS هر Worker را افزایش نمی‌دهد.
+#
+# نوشتن (از هر Worker) با قفل فایل سریالی می‌شود: ابتدا سطرهای ماتریس نوشته
+# می‌شوند و سپس فایل شناسه‌ها به صورت اتمیک (os.replace) جایگزین می‌شود؛
+# خواننده‌ها با تغییر فایل شناسه‌ها نمای خود را دوباره باز می‌کنند.
+
+MIN_CAPACITY = 1024
+TOMBSTONE = -1
+
+
+class VectorIndex:
+    """
+    ایندکس top-k با ضرب داخلی (بردارهای نرمال‌شده، یعنی شباهت کسینوسی).
+
+    آیتم حذف‌شده با شناسه TOMBSTONE علامت می‌خورد و سطر آن برای درج‌های بعدی
+    دوباره استفاده می‌شود؛ به‌روزرسانی یک آیتم سطر خودش را بازنویسی می‌کند.
+    """
+
+    def __init__(self, directory: str, name: str, dim: int, *, embedder: str):
+        self.directory = directory
+        self.dim = dim
+        self.embedder = embedder
+        self.matrix_path = os.path.join(directory, f"{name}.f32")
+        self.ids_path = os.path.join(directory, f"{name}.ids.npy")
+        self.meta_path = os.path.join(directory, f"{name}.meta.json")
+        self.lock_path = os.path.join(directory, f"{name}.lock")
+        self._opened = False
+        # قفل نویسنده‌های همین پردازه (قفل فایل بین پردازه‌هاست)
+        self._write_lock = threading.Lock()
+        self._view_lock = threading.Lock()
+        # نمای خواننده: (نسخه فایل شناسه‌ها، شناسه‌ها، مالک‌ها، ماتریس)
+        self._view: Optional[Tuple[Any, Any, Any, Any]] = None
+        # نگاشت شناسه به سطر و سطرهای آزاد؛ فقط برای نویسنده و معتبر برای _rows_version
+        self._rows: Dict[int, int] = {}
+        self._free: List[int] = []
+        self._rows_version: Any = None
+        # آمار برای مانیتورینگ
+        self.written = 0
+        self.deleted = 0
+
+    # ------------------- فایل‌ها -------------------
+    def open(self) -> None:
+        """
+        ساخت پوشه و بررسی سازگاری فایل‌ها با ابعاد و Embedder فعلی؛ در صورت
+        ناسازگاری، ایندکس خالی می‌شود تا دوباره ساخته شود.
+        """
+        if self._opened:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        meta = {"dim": self.dim, "embedder": self.embedder}
+        with open(self.lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                with open(self.meta_path) as f:
+                    current = json.load(f)
+            except (OSError, ValueError):
+                current = None
+            if current != meta:
+                for path in (self.ids_path, self.matrix_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+                with open(self.meta_path, "w") as f:
+                    json.dump(meta, f)
+        self._opened = True
+
+    def _version(self) -> Any:
+        try:
+            st = os.stat(self.ids_path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _load_table(self) -> Any:
+        try:
+            return np.load(self.ids_path)
+        except FileNotFoundError:
+            return np.empty((0, 2), dtype=np.int64)
+
+    def view(self) -> Tuple[Any, Any, Any]:
+        """(شناسه‌ها، مالک‌ها، ماتریس) آخرین نسخه منتشرشده ایندکس."""
+        self.open()
+        version = self._version()
+        view = self._view
+        if view is None or view[0] != version:
+            with self._view_lock:
+                view = self._view
+                if view is None or view[0] != version:
+                    table = self._load_table()
+                    count = len(table)
+                    if count:
+                        matrix = np.memmap(self.matrix_path, dtype=np.float32, mode="r", shape=(count, self.dim))
+                    else:
+                        matrix = np.empty((0, self.dim), dtype=np.float32)
+                    view = self._view = (version, table[:, 0], table[:, 1], matrix)
+        return view[1], view[2], view[3]
+
+    # ------------------- نوشتن -------------------
+    def write(
+        self,
+        ids: Sequence[int],
+        owners: Sequence[int],
+        vectors: Optional[Any],
+        deletes: Sequence[int] = (),
+    ) -> None:
+        """
+        درج/بازنویسی بردار آیتم‌ها و علامت‌گذاری آیتم‌های حذف‌شده (مسدودکننده؛
+        در Thread اجرا شود). vectors آرایه‌ای با شکل (len(ids), dim) است.
+        """
+        self.open()
+        with self._write_lock, open(self.lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            table = self._load_table()
+            if self._rows_version != self._version():
+                # Worker دیگری ایندکس را تغییر داده است
+                self._rows = {int(id): row for row, id in enumerate(table[:, 0]) if id != TOMBSTONE}
+                self._free = np.flatnonzero(table[:, 0] == TOMBSTONE).tolist()
+
+            for id in deletes:
+                row = self._rows.pop(id, None)
+                if row is not None:
+                    table[row] = TOMBSTONE
+                    self._free.append(row)
+                    self.deleted += 1
+
+            targets: List[int] = []
+            appended = 0
+            for id in ids:
+                row = self._rows.get(id)
+                if row is None:
+                    if self._free:
+                        row = self._free.pop()
+                    else:
+                        row = len(table) + appended
+                        appended += 1
+                    self._rows[id] = row
+                targets.append(row)
+            if appended:
+                table = np.concatenate([table, np.full((appended, 2), TOMBSTONE, dtype=np.int64)])
+
+            if targets:
+                self._ensure_capacity(len(table))
+                matrix = np.memmap(self.matrix_path, dtype=np.float32, mode="r+", shape=(len(table), self.dim))
+                matrix[targets] = vectors
+                matrix.flush()
+                del matrix
+                table[targets, 0] = ids
+                table[targets, 1] = owners
+                self.written += len(targets)
+
+            # انتشار اتمیک نگاشت شناسه‌ها، پس از نوشتن سطرهای ماتریس
+            tmp_path = f"{self.ids_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.save(f, table)
+            os.replace(tmp_path, self.ids_path)
+            self._rows_version = self._version()
+
+    def _ensure_capacity(self, rows: int) -> None:
+        """بزرگ کردن فایل ماتریس (دوبرابر ظرفیت فعلی) تا حداقل `rows` سطر جا شود."""
+        row_bytes = self.dim * 4
+        size = os.path.getsize(self.matrix_path) if os.path.exists(self.matrix_path) else 0
+        if size >= rows * row_bytes:
+            return
+        capacity = max(rows, 2 * (size // row_bytes), MIN_CAPACITY)
+        with open(self.matrix_path, "ab") as f:
+            f.truncate(capacity * row_bytes)
+
+    # ------------------- جستجو -------------------
+    def search(self, query: Any, k: int, *, owner_id: Optional[int] = None) -> List[Tuple[int, float]]:
+        """
+        k شناسه با بیشترین شباهت به بردار query (مسدودکننده؛ در Thread اجرا شود).
+
+        با owner_id فقط سطرهای همان مالک امتیازدهی می‌شوند.
+        :return: لیست (id, score) به ترتیب نزولی امتیاز
+        """
+        ids, owners, matrix = self.view()
+        if owner_id is None:
+            rows = None
+            scores = matrix @ query
+            scores[ids == TOMBSTONE] = -np.inf
+        else:
+            rows = np.flatnonzero(owners == owner_id)
+            scores = matrix[rows] @ query
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(scores, -k)[-k:] if k < len(scores) else np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        top_rows = top if rows is None else rows[top]
+        return [
+            (int(ids[row]), float(scores[index]))
+            for index, row in zip(top, top_rows)
+            if scores[index] != -np.inf
+        ]
+
+    def max_id(self) -> int:
+        """بزرگ‌ترین شناسه ایندکس‌شده (0 برای ایندکس خالی)؛ نقطه شروع backfill."""
+        ids, _, _ = self.view()
+        return int(ids.max()) if len(ids) and ids.max() > 0 else 0
+
+    def live_vectors(self) -> int:
+        """تعداد بردارهای زنده در نمای فعلی، بدون بارگذاری دوباره (برای متریک‌ها)."""
+        view = self._view
+        return 0 if view is None else int((view[1] != TOMBSTONE).sum())
+
+    def snapshot(self) -> Dict[str, Any]:
+        ids, _, matrix = self.view()
+        live = int((ids != TOMBSTONE).sum())
+        return {
+            "vectors": live,
+            "free_rows": len(ids) - live,
+            "dim": self.dim,
+            "embedder": self.embedder,
+            "matrix_bytes": os.path.getsize(self.matrix_path) if os.path.exists(self.matrix_path) else 0,
+            "written": self.written,
+            "deleted": self.deleted,
+        }
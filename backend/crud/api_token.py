@@ -0,0 +1,136 @@
+import asyncio
+import hashlib
+import logging
+import secrets
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.core.auth_cache import api_token_cache, invalid_token_cache
+from backend.core.config import settings
+from backend.db.models import APIToken
+
+logger = logging.getLogger("backend.api_tokens")
+
+
+def hash_token(token: str) -> str:
+    """هش SHA-256 توکن؛ تنها شکلی از توکن که در دیتابیس ذخیره می‌شود."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+# -----------------------------------------------------------------
+# کلاس CRUD توکن‌های API
+# -----------------------------------------------------------------
+class CRUDAPIToken:
+    """
+    صدور، بررسی و ابطال توکن‌های API که به صورت هش‌شده ذخیره می‌شوند.
+
+    توکن‌های معتبر تا مدت کوتاهی در api_token_cache و هش توکن‌های نامعتبر در
+    invalid_token_cache نگه داشته می‌شوند، تا هیچ‌کدام در تکرار به دیتابیس نرسند.
+    """
+
+    def __init__(self, model=APIToken):
+        self.model = model
+
+    async def issue(
+        self, db: AsyncSession, *, user_id: int, expires_in: timedelta
+    ) -> Tuple[str, APIToken]:
+        """
+        صدور توکن جدید برای کاربر.
+
+        :return: (توکن خام که فقط همین یک بار در دسترس است، ردیف ذخیره‌شده)
+        """
+        token = secrets.token_urlsafe(32)
+        db_obj = self.model(
+            token_hash=hash_token(token),
+            user_id=user_id,
+            expires_at=datetime.now(timezone.utc) + expires_in,
+        )
+        db.add(db_obj)
+        await db.commit()
+        return token, db_obj
+
+    async def authenticate(self, db: AsyncSession, *, token: str) -> Optional[int]:
+        """
+        شناسه کاربر مالک یک توکن معتبر و منقضی‌نشده، یا None.
+        """
+        user_id = api_token_cache.get(token)
+        if user_id is not None:
+            return user_id
+
+        digest = hash_token(token)
+        if digest in invalid_token_cache:
+            return None
+
+        stmt = select(self.model.user_id, self.model.expires_at).where(
+            self.model.token_hash == digest,
+            self.model.expires_at > datetime.now(timezone.utc),
+        )
+        row = (await db.execute(stmt)).first()
+        if row is None:
+            invalid_token_cache.add(digest)
+            return None
+
+        # ورودی کش هرگز بیش از خود توکن یا API_TOKEN_CACHE_TTL معتبر نمی‌ماند
+        expires = min(row.expires_at.timestamp(), time.time() + settings.API_TOKEN_CACHE_TTL)
+        api_token_cache.put(token, row.user_id, expires)
+        return row.user_id
+
+    async def revoke(self, db: AsyncSession, *, token: str) -> bool:
+        """ابطال (حذف) یک توکن؛ کش همین پردازه بلافاصله پاک می‌شود."""
+        result = await db.execute(
+            delete(self.model).where(self.model.token_hash == hash_token(token))
+        )
+        await db.commit()
+        api_token_cache.discard(token)
+        return result.rowcount > 0
+
+    async def delete_expired(self, db: AsyncSession, *, batch_size: int = 1000) -> int:
+        """
+        حذف توکن‌های منقضی در دسته‌های محدود (با استفاده از ایندکس expires_at).
+        هر دسته تراکنش جداگانه دارد تا قفل‌ها و حجم WAL کوتاه بمانند.
+
+        :return: تعداد کل ردیف‌های حذف شده
+        """
+        now = datetime.now(timezone.utc)
+        expired = (
+            select(self.model.token_hash)
+            .where(self.model.expires_at < now)
+            .order_by(self.model.expires_at)
+            .limit(batch_size)
+        )
+        stmt = (
+            delete(self.model)
+            .where(self.model.token_hash.in_(expired))
+            .execution_options(synchronize_session=False)
+        )
+        total = 0
+        while True:
+            result = await db.execute(stmt)
+            await db.commit()
+            total += result.rowcount
+            if result.rowcount < batch_size:
+                return total
+            # بین دسته‌ها به سایر درخواست‌ها فرصت اجرا داده می‌شود
+            await asyncio.sleep(0)
+
+
+async def run_token_sweeper(session_maker, interval: float, batch_size: int) -> None:
+    """
+    حلقه پس‌زمینه‌ای که هر `interval` ثانیه توکن‌های منقضی را حذف می‌کند.
+    خطای یک دور ثبت می‌شود و حلقه ادامه می‌یابد.
+    """
+    while True:
+        try:
+            async with session_maker() as db:
+                await api_token.delete_expired(db, batch_size=batch_size)
+        except Exception:
+            logger.exception("expired API token sweep failed")
+        await asyncio.sleep(interval)
+
+
+# ایجاد نمونه‌ای از کلاس CRUDAPIToken برای استفاده در اندپوینت‌ها
+api_token = CRUDAPIToken(APIToken)
@@ -6,7 +6,9 @@ from sqlalchemy import delete, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from backend.core.config import settings
 from backend.db.base_class import Base # فرض می‌کنیم Base مدل SQLAlchemy از اینجا وارد می‌شود
+from backend.db.coalescer import write_coalescer
 
 # تعریف TypeVar برای ORM Model و Schemas
 ModelType = TypeVar("ModelType", bound=Base)
@@ -29,6 +31,20 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         """
         self.model = model
 
+    def hot_statements(self) -> List[Any]:
+        """
+        دستورات پرتکرار این کلاس برای گرم‌کردن کش در شروع برنامه (backend/db/warmup.py).
+
+        شکل این دستورات باید دقیقاً با دستورات متدهای get/get_multi یکسان باشد تا
+        کلید کش SQLAlchemy و متن Prepared Statement درایور یکی شود؛ مقادیر
+        به صورت پارامتر (bind) ارسال می‌شوند و اهمیتی ندارند.
+        """
+        return [
+            select(self.model).where(self.model.id == 0),
+            select(self.model).order_by(self.model.id).offset(0).limit(100),
+            select(self.model.id, *self.version_columns()).where(self.model.id == 0),
+        ]
+
     async def get(self, db: AsyncSession, id: Any) -> Optional[ModelType]:
         """
         واکشی یک رکورد بر اساس ID.
@@ -43,24 +59,84 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         """
         واکشی چندین رکورد.
         """
-        stmt = select(self.model).offset(skip).limit(limit)
+        # مرتب‌سازی بر اساس کلید اصلی تا صفحه‌بندی (و ETag صفحه) قطعی باشد
+        stmt = select(self.model).order_by(self.model.id).offset(skip).limit(limit)
         result = await db.execute(stmt)
         return result.scalars().all()
 
+    # ------------------- نسخه رکوردها (برای ETag) -------------------
+    def version_columns(self) -> List[Any]:
+        """
+        ستون‌ها/عبارت‌هایی که با تغییر نمایش رکورد تغییر می‌کنند.
+        پیش‌فرض: ستون updated_at مدل.
+        """
+        return [self.model.updated_at]
+
+    async def get_version(self, db: AsyncSession, *, id: Any) -> Optional[tuple]:
+        """
+        واکشی سبک نسخه یک رکورد (بدون ساخت شیء ORM) برای محاسبه ETag.
+
+        :return: تاپل (id, ...version_columns) یا None اگر رکورد وجود نداشته باشد.
+        """
+        stmt = select(self.model.id, *self.version_columns()).where(self.model.id == id)
+        row = (await db.execute(stmt)).first()
+        return tuple(row) if row is not None else None
+
+    async def get_multi_versions(
+        self, db: AsyncSession, *, skip: int = 0, limit: int = 100
+    ) -> List[tuple]:
+        """
+        نسخه ردیف‌های یک صفحه با همان ترتیب get_multi، برای ETag ضعیف لیست‌ها.
+        """
+        stmt = (
+            select(self.model.id, *self.version_columns())
+            .order_by(self.model.id)
+            .offset(skip)
+            .limit(limit)
+        )
+        return [tuple(row) for row in await db.execute(stmt)]
+
     async def create(self, db: AsyncSession, *, obj_in: CreateSchemaType) -> ModelType:
         """
         ایجاد یک رکورد جدید.
         """
         # تبدیل Pydantic Schema به دیکشنری
         obj_in_data = jsonable_encoder(obj_in, exclude_unset=True)
+        return await self.create_from_dict(db, obj_in_data=obj_in_data)
+
+    async def create_from_dict(
+        self, db: AsyncSession, *, obj_in_data: Dict[str, Any]
+    ) -> ModelType:
+        """
+        درج یک رکورد از روی دیکشنری ستون‌ها.
+
+        اگر DB_WRITE_COALESCING فعال باشد، درج از طریق WriteCoalescer همراه با
+        درج‌های همزمان دیگر در یک تراکنش مشترک انجام می‌شود (نشست db استفاده نمی‌شود).
+        این درج در نشست خود WriteCoalescer و مستقل از تراکنش فراخواننده commit
+        می‌شود: rollback بعدی نشست db آن را برنمی‌گرداند و statement_timeout مهلت
+        درخواست روی آن اعمال نمی‌شود. به همین دلیل اگر نشست db از قبل تراکنش باز
+        دارد (مثلاً پس از یک کوئری یا تغییر دیگر)، درج در همان تراکنش انجام می‌شود.
+        """
+        if settings.DB_WRITE_COALESCING and not db.in_transaction():
+            return await write_coalescer.insert(
+                self.model, obj_in_data, after_insert=self.after_create
+            )
+
         # ایجاد نمونه مدل SQLAlchemy
-        db_obj = self.model(**obj_in_data) 
-        
+        db_obj = self.model(**obj_in_data)
+
         db.add(db_obj)
+        await self.after_create(db, [db_obj])
         await db.commit()
         await db.refresh(db_obj)
         return db_obj
 
+    async def after_create(self, db: AsyncSession, db_objs: List[ModelType]) -> None:
+        """
+        نقطه توسعه برای کارهایی که باید در همان تراکنش درج رکوردها انجام شوند
+        (مثلاً به‌روزرسانی شمارنده‌ها). پیاده‌سازی پیش‌فرض کاری انجام نمی‌دهد.
+        """
+
     async def update(
         self,
         db: AsyncSession,
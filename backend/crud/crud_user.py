@@ -10,7 +10,8 @@ from backend.crud.base import CRUDBase
 
 # وارد کردن توابع امنیتی (که باید بعداً در فایل security.py تعریف شوند)
 # فرض می‌کنیم توابع زیر در یک ماژول امنیتی وجود دارند:
-from backend.core.security import get_password_hash, verify_password 
+from backend.core.auth_cache import principal_cache
+from backend.core.security import hash_password, verify_password_and_rehash
 
 
 class CRUDUser(CRUDBase[UserModel, UserCreate, UserUpdate]):
@@ -18,6 +19,14 @@ class CRUDUser(CRUDBase[UserModel, UserCreate, UserUpdate]):
     پیاده‌سازی CRUD اختصاصی برای مدل کاربر (User).
     """
     
+    def hot_statements(self) -> List[Any]:
+        """
+        دستورات پرتکرار کاربر، شامل جستجو بر اساس ایمیل (ورود و ثبت‌نام).
+        """
+        return super().hot_statements() + [
+            select(self.model).where(self.model.email == ""),
+        ]
+
     # ----------------- متدهای واکشی اختصاصی -----------------
 
     async def get_by_email(self, db: AsyncSession, *, email: str) -> Optional[UserModel]:
@@ -34,8 +43,8 @@ class CRUDUser(CRUDBase[UserModel, UserCreate, UserUpdate]):
         """
         ایجاد یک کاربر جدید با هش کردن رمز عبور.
         """
-        # هش کردن رمز عبور قبل از ذخیره در دیتابیس
-        hashed_password = get_password_hash(obj_in.password)
+        # هش کردن رمز عبور قبل از ذخیره در دیتابیس (روی استخر هش، خارج از event loop)
+        hashed_password = await hash_password(obj_in.password)
         
         # ساخت دیکشنری از داده‌های ورودی
         obj_in_data = obj_in.model_dump()
@@ -45,11 +54,7 @@ class CRUDUser(CRUDBase[UserModel, UserCreate, UserUpdate]):
         del obj_in_data["password"] 
         
         # ساخت و ذخیره مدل
-        db_obj = self.model(**obj_in_data)
-        db.add(db_obj)
-        await db.commit()
-        await db.refresh(db_obj)
-        return db_obj
+        return await self.create_from_dict(db, obj_in_data=obj_in_data)
 
     async def update(
         self,
@@ -70,7 +75,7 @@ class CRUDUser(CRUDBase[UserModel, UserCreate, UserUpdate]):
 
         # مدیریت رمز عبور: اگر رمز عبور جدیدی ارسال شده، آن را هش کن
         if "password" in update_data and update_data["password"]:
-            hashed_password = get_password_hash(update_data["password"])
+            hashed_password = await hash_password(update_data["password"])
             update_data["hashed_password"] = hashed_password
             del update_data["password"]
         elif "password" in update_data:
@@ -80,19 +85,37 @@ class CRUDUser(CRUDBase[UserModel, UserCreate, UserUpdate]):
         # فراخوانی متد update کلاس پایه
         # ما باید مطمئن شویم که فقط فیلدهای مورد نظر به‌روزرسانی شوند.
         # متد update در CRUDBase این کار را انجام می‌دهد.
-        return await super().update(db, db_obj=db_obj, obj_in=update_data)
+        db_obj = await super().update(db, db_obj=db_obj, obj_in=update_data)
+        # کاربر کش‌شده در get_current_user (مثلاً پس از غیرفعال شدن) دیگر معتبر نیست
+        principal_cache.invalidate(db_obj.id)
+        return db_obj
+
+    async def remove(self, db: AsyncSession, *, id: int) -> Optional[UserModel]:
+        """
+        حذف کاربر و ابطال نسخه کش‌شده آن.
+        """
+        obj = await super().remove(db, id=id)
+        principal_cache.invalidate(id)
+        return obj
 
 
     # ----------------- متد احراز هویت (Auth) -----------------
     
-    def authenticate(self, db_obj: UserModel, password: str) -> bool:
+    async def authenticate(self, db: AsyncSession, *, db_obj: UserModel, password: str) -> bool:
         """
         بررسی می‌کند که آیا رمز عبور ارائه شده با رمز عبور هش شده در دیتابیس مطابقت دارد یا خیر.
+        اگر هش ذخیره‌شده با هزینه bcrypt فعلی ساخته نشده باشد، با همین رمز بازتولید و ذخیره می‌شود.
         """
         if not db_obj:
             return False
-            
-        return verify_password(password, db_obj.hashed_password)
+
+        valid, new_hash = await verify_password_and_rehash(password, db_obj.hashed_password)
+        if valid and new_hash:
+            db_obj.hashed_password = new_hash
+            db.add(db_obj)
+            await db.commit()
+            principal_cache.invalidate(db_obj.id)
+        return valid
 
 
     # ----------------- متدهای نقش و مجوز (Authorization) -----------------
@@ -1,22 +1,171 @@
-from typing import List
+import asyncio
+import base64
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple, Union
 
-from sqlalchemy import select
+from sqlalchemy import select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 # وارد کردن اجزای مورد نیاز
-from backend.models.item import Item # مدل دیتابیسی
+from backend.models.item import Item, SEARCH_TEXT_CONFIG # مدل دیتابیسی
 from backend.schemas.item import ItemCreate, ItemUpdate # اسکیماهای ورودی
 from backend.crud.base import CRUDBase # کلاس پایه CRUD
+from backend.crud.item_stats import owner_item_stats # شمارنده‌های آیتم هر مالک
+from backend.core.config import settings
+from backend.core.embeddings import item_embedder, item_embedding_queue, item_vector_index
+
+# -----------------------------------------------------------------
+# کوئری‌های جستجوی متنی
+# -----------------------------------------------------------------
+# ابتدا فقط (id, rank) صفحه جاری محاسبه می‌شود و ts_headline (که پرهزینه است)
+# تنها برای همان چند ردیف نهایی اجرا می‌شود.
+_POSTGRES_SEARCH_SQL = f"""
+WITH q AS (SELECT websearch_to_tsquery('{SEARCH_TEXT_CONFIG}', :query) AS tsq),
+page AS (
+    SELECT items.id, ts_rank_cd(items.search_vector, q.tsq) AS rank
+    FROM items CROSS JOIN q
+    WHERE items.search_vector @@ q.tsq
+    {{keyset}}
+    ORDER BY rank DESC, items.id DESC
+    LIMIT :limit
+)
+SELECT items.id, items.title, items.description, items.owner_id,
+       items.created_at, items.updated_at, page.rank,
+       ts_headline('{SEARCH_TEXT_CONFIG}', items.title, q.tsq,
+                   'StartSel=<b>, StopSel=</b>, HighlightAll=true') AS title_highlight,
+       ts_headline('{SEARCH_TEXT_CONFIG}', coalesce(items.description, ''), q.tsq,
+                   'StartSel=<b>, StopSel=</b>, MaxFragments=2') AS description_highlight
+FROM page JOIN items ON items.id = page.id CROSS JOIN q
+ORDER BY page.rank DESC, page.id DESC
+"""
+_POSTGRES_SEARCH_KEYSET = (
+    "AND (ts_rank_cd(items.search_vector, q.tsq), items.id) < (:after_rank, :after_id)"
+)
+
+# وزن‌های bm25 (عنوان 10، توضیحات 1) معادل وزن‌های A/B ستون tsvector هستند.
+# bm25 هرچه کمتر بهتر است؛ با منفی کردن آن ترتیب مشابه PostgreSQL می‌شود.
+_SQLITE_RANK = "-bm25(items_fts, 10.0, 1.0)"
+_SQLITE_SEARCH_SQL = f"""
+SELECT items.id, items.title, items.description, items.owner_id,
+       items.created_at, items.updated_at, {_SQLITE_RANK} AS rank,
+       highlight(items_fts, 0, '<b>', '</b>') AS title_highlight,
+       snippet(items_fts, 1, '<b>', '</b>', '…', 24) AS description_highlight
+FROM items_fts JOIN items ON items.id = items_fts.rowid
+WHERE items_fts MATCH :query
+{{keyset}}
+ORDER BY rank DESC, items.id DESC
+LIMIT :limit
+"""
+_SQLITE_SEARCH_KEYSET = (
+    f"AND ({_SQLITE_RANK} < :after_rank "
+    f"OR ({_SQLITE_RANK} = :after_rank AND items.id < :after_id))"
+)
+
+
+def encode_search_cursor(rank: float, id: int) -> str:
+    """ساخت Cursor صفحه‌بندی Keyset از (rank, id) آخرین نتیجه صفحه."""
+    return base64.urlsafe_b64encode(f"{rank!r}:{id}".encode()).decode()
+
+
+def decode_search_cursor(cursor: str) -> Tuple[float, int]:
+    """
+    بازگشایی Cursor صفحه‌بندی. برای Cursor نامعتبر ValueError ایجاد می‌کند.
+    """
+    try:
+        rank, _, id = base64.urlsafe_b64decode(cursor.encode()).decode().partition(":")
+        return float(rank), int(id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid search cursor") from e
+
+
+def _fts5_query(query: str) -> str:
+    """
+    تبدیل ورودی کاربر به عبارت امن FTS5: هر کلمه به صورت رشته نقل‌قول‌شده
+    جستجو می‌شود تا نحو (syntax) FTS5 از ورودی کاربر تفسیر نشود.
+    """
+    return " ".join('"%s"' % term.replace('"', '""') for term in query.split())
+
 
 # -----------------------------------------------------------------
 # کلاس CRUD مخصوص مدل Item
 # -----------------------------------------------------------------
 class CRUDItem(CRUDBase[Item, ItemCreate, ItemUpdate]):
+
+    def hot_statements(self) -> List[Any]:
+        """
+        دستورات پرتکرار آیتم، شامل فهرست آیتم‌های یک مالک.
+        """
+        return super().hot_statements() + [
+            select(self.model)
+            .where(self.model.owner_id == 0)
+            .offset(0)
+            .limit(100),
+        ]
     
+    # ------------------- متدهای ایجاد، به‌روزرسانی و حذف -------------------
+    async def create_from_dict(self, db: AsyncSession, *, obj_in_data: Dict[str, Any]) -> Item:
+        """
+        درج آیتم و ثبت آن در صف محاسبه بردار (پس از commit، تا شناسه معلوم باشد).
+        """
+        db_obj = await super().create_from_dict(db, obj_in_data=obj_in_data)
+        self._enqueue_embedding(db_obj)
+        return db_obj
+
+    async def update(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: Item,
+        obj_in: Union[ItemUpdate, Dict[str, Any]]
+    ) -> Item:
+        """
+        به‌روزرسانی آیتم؛ اگر عنوان یا توضیحات تغییر کند، بردار آن دوباره محاسبه می‌شود.
+        """
+        before = (db_obj.title, db_obj.description, db_obj.owner_id)
+        db_obj = await super().update(db, db_obj=db_obj, obj_in=obj_in)
+        if (db_obj.title, db_obj.description, db_obj.owner_id) != before:
+            self._enqueue_embedding(db_obj)
+        return db_obj
+
+    def _enqueue_embedding(self, db_obj: Item) -> None:
+        if settings.EMBEDDINGS_ENABLED:
+            item_embedding_queue.upsert(db_obj.id, db_obj.owner_id, db_obj.title, db_obj.description)
+
+    async def after_create(self, db: AsyncSession, db_objs: List[Item]) -> None:
+        """
+        افزایش شمارنده آیتم‌های هر مالک در همان تراکنش ایجاد آیتم‌ها.
+        """
+        per_owner: Dict[int, int] = {}
+        for db_obj in db_objs:
+            per_owner[db_obj.owner_id] = per_owner.get(db_obj.owner_id, 0) + 1
+        for owner_id, count in per_owner.items():
+            await owner_item_stats.increment(db, owner_id=owner_id, delta=count)
+
+    async def remove(self, db: AsyncSession, *, id: int) -> Optional[Item]:
+        """
+        حذف یک آیتم و کاهش شمارنده مالک در همان تراکنش.
+        """
+        obj = await self.get(db, id=id)
+        if not obj:
+            return None
+
+        await db.delete(obj)
+        await owner_item_stats.increment(db, owner_id=obj.owner_id, delta=-1)
+        await db.commit()
+        if settings.EMBEDDINGS_ENABLED:
+            item_embedding_queue.delete(obj.id)
+        return obj
+
     # ------------------- متدهای خواندن (Read) -------------------
     async def get_multi_by_owner(
-        self, db: AsyncSession, *, owner_id: int, skip: int = 0, limit: int = 100
+        self,
+        db: AsyncSession,
+        *,
+        owner_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        created_since: Optional[datetime] = None,
     ) -> List[Item]:
         """
         دریافت لیست چندگانه آیتم‌ها بر اساس شناسه مالک (Owner ID).
@@ -25,16 +174,87 @@ class CRUDItem(CRUDBase[Item, ItemCreate, ItemUpdate]):
         :param owner_id: شناسه کاربری مالک آیتم‌ها
         :param skip: تعداد رکوردهایی که باید نادیده گرفته شوند (برای صفحه‌بندی)
         :param limit: حداکثر تعداد رکوردهایی که باید برگردانده شوند (برای صفحه‌بندی)
+        :param created_since: فقط آیتم‌های ایجاد شده از این زمان به بعد؛ با پارتیشن‌بندی
+            زمانی جدول، PostgreSQL پارتیشن‌های قدیمی‌تر را اصلاً اسکن نمی‌کند (Partition Pruning)
         :return: لیستی از آبجکت‌های Item
         """
         # ساخت کوئری: انتخاب آیتم‌هایی که owner_id آن‌ها با شناسه ورودی برابر است.
+        stmt = select(self.model).where(self.model.owner_id == owner_id)
+        if created_since is not None:
+            stmt = stmt.where(self.model.created_at >= created_since)
+        result = await db.execute(stmt.offset(skip).limit(limit))
+        return list(result.scalars().all())
+
+    async def search(
+        self,
+        db: AsyncSession,
+        *,
+        query: str,
+        limit: int = 20,
+        after: Optional[Tuple[float, int]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        جستجوی متنی در عنوان و توضیحات آیتم‌ها با رتبه‌بندی و هایلایت.
+
+        در PostgreSQL از ستون tsvector و ایندکس GIN و در SQLite از جدول FTS5 استفاده می‌شود.
+
+        :param query: عبارت جستجو (در PostgreSQL با نحو websearch_to_tsquery)
+        :param limit: حداکثر تعداد نتایج این صفحه
+        :param after: (rank, id) آخرین نتیجه صفحه قبل برای صفحه‌بندی Keyset
+        :return: لیستی از دیکشنری‌ها شامل ستون‌های آیتم، rank و متن‌های هایلایت‌شده
+        """
+        if not query.strip():
+            return []
+
+        if db.get_bind().dialect.name == "sqlite":
+            sql, keyset, query = _SQLITE_SEARCH_SQL, _SQLITE_SEARCH_KEYSET, _fts5_query(query)
+        else:
+            sql, keyset = _POSTGRES_SEARCH_SQL, _POSTGRES_SEARCH_KEYSET
+
+        params: Dict[str, Any] = {"query": query, "limit": limit}
+        if after is not None:
+            params["after_rank"], params["after_id"] = after
+        stmt = text(sql.format(keyset=keyset if after is not None else ""))
+
+        result = await db.execute(stmt, params)
+        return [dict(row) for row in result.mappings()]
+
+    async def semantic_search(
+        self,
+        db: AsyncSession,
+        *,
+        query: str,
+        limit: int = 20,
+        owner_id: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        جستجوی معنایی: top-k آیتم‌ها بر اساس شباهت کسینوسی بردار عبارت جستجو با
+        بردار عنوان و توضیحات آیتم‌ها در ایندکس برداری (محاسبه در Thread).
+
+        :param owner_id: فقط آیتم‌های این مالک
+        :return: لیستی از دیکشنری‌ها شامل ستون‌های آیتم و score، به ترتیب نزولی امتیاز
+        """
+
+        def top_k() -> List[Tuple[int, float]]:
+            vector = item_embedder.embed_query(query)
+            if not vector.any():
+                return []
+            return item_vector_index.search(vector, limit, owner_id=owner_id)
+
+        # امتیاز صفر یا منفی یعنی هیچ ویژگی مشترکی با عبارت جستجو ندارد
+        matches = [(id, score) for id, score in await asyncio.to_thread(top_k) if score > 0]
+        if not matches:
+            return []
+
+        # آیتم‌هایی که حذفشان هنوز به ایندکس نرسیده، در نتایج نمی‌آیند
         result = await db.execute(
-            select(self.model)
-            .where(self.model.owner_id == owner_id)
-            .offset(skip)
-            .limit(limit)
+            select(
+                self.model.id, self.model.title, self.model.description, self.model.owner_id,
+                self.model.created_at, self.model.updated_at,
+            ).where(self.model.id.in_([id for id, _ in matches]))
         )
-        return list(result.scalars().all())
+        rows = {row["id"]: row for row in result.mappings()}
+        return [{**rows[id], "score": score} for id, score in matches if id in rows]
 
 # -----------------------------------------------------------------
 # ایجاد یک نمونه از کلاس CRUDItem برای استفاده آسان در بخش‌های مختلف پروژه
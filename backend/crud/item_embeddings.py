@@ -0,0 +1,132 @@
+import asyncio
+import logging
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from backend.core.embeddings import EmbeddingQueue, HashingEmbedder
+from backend.core.vector_index import VectorIndex
+from backend.models.item import Item
+
+logger = logging.getLogger("backend.embeddings")
+
+Changes = Dict[int, Optional[Tuple[int, str, Optional[str]]]]
+
+
+# -----------------------------------------------------------------
+# محاسبه دسته‌ای بردار آیتم‌ها و نوشتن در ایندکس برداری
+# -----------------------------------------------------------------
+async def index_changes(index: VectorIndex, embedder: HashingEmbedder, changes: Changes) -> None:
+    """
+    محاسبه بردار آیتم‌های درج/به‌روزشده و نوشتن آن‌ها همراه با حذف‌ها در ایندکس؛
+    کار CPU و دیسک در Thread انجام می‌شود (NumPy در این مدت GIL را آزاد می‌کند).
+    """
+    upserts = [(id, change) for id, change in changes.items() if change is not None]
+    deletes = [id for id, change in changes.items() if change is None]
+
+    def work() -> None:
+        vectors = embedder.embed([(title, description) for _, (_, title, description) in upserts])
+        index.write(
+            [id for id, _ in upserts],
+            [owner_id for _, (owner_id, _, _) in upserts],
+            vectors,
+            deletes,
+        )
+
+    await asyncio.to_thread(work)
+
+
+async def flush_embeddings(queue: EmbeddingQueue, index: VectorIndex, embedder: HashingEmbedder) -> int:
+    """
+    تخلیه صف در دسته‌های batch_size تایی؛ دسته ناموفق به صف برمی‌گردد و تا دور
+    بعد تلاشی انجام نمی‌شود. :return: تعداد تغییرات نوشته‌شده
+    """
+    written = 0
+    while len(queue):
+        batch = queue.take(queue.batch_size)
+        try:
+            await index_changes(index, embedder, batch)
+        except asyncio.CancelledError:
+            queue.restore(batch)
+            raise
+        except Exception:
+            logger.exception("embedding %d items failed; retrying on the next flush", len(batch))
+            queue.restore(batch)
+            break
+        written += len(batch)
+    return written
+
+
+async def forget_partition(
+    conn: AsyncConnection, name: str, *, index: VectorIndex, batch_size: int
+) -> int:
+    """
+    علامت‌گذاری (Tombstone) بردار آیتم‌های یک پارتیشن جدا شده پیش از Drop آن؛
+    این آیتم‌ها از مسیر CRUD حذف نمی‌شوند و بدون این کار در ایندکس باقی می‌ماندند.
+    در همان تراکنش Drop اجرا می‌شود تا در صورت خطا، دور بعد دوباره انجام شود.
+    """
+    result = await conn.stream(text(f"SELECT id FROM {name}"))
+    total = 0
+    async for rows in result.partitions(batch_size):
+        ids = [row[0] for row in rows]
+        await asyncio.to_thread(index.write, [], [], None, ids)
+        total += len(ids)
+    return total
+
+
+async def backfill_embeddings(
+    session_maker, index: VectorIndex, embedder: HashingEmbedder, batch_size: int
+) -> int:
+    """
+    محاسبه بردار آیتم‌هایی که شناسه‌شان از بزرگ‌ترین شناسه ایندکس بیشتر است
+    (آیتم‌های پیش از فعال شدن ایندکس، یا ایندکس خالی پس از تغییر ابعاد).
+    """
+    after = await asyncio.to_thread(index.max_id)
+    total = 0
+    while True:
+        async with session_maker() as db:
+            result = await db.execute(
+                select(Item.id, Item.owner_id, Item.title, Item.description)
+                .where(Item.id > after)
+                .order_by(Item.id)
+                .limit(batch_size)
+            )
+            rows = result.all()
+        if not rows:
+            return total
+        await index_changes(
+            index, embedder, {id: (owner_id, title, description) for id, owner_id, title, description in rows}
+        )
+        after = rows[-1][0]
+        total += len(rows)
+
+
+async def run_embedding_indexer(
+    session_maker,
+    queue: EmbeddingQueue,
+    index: VectorIndex,
+    embedder: HashingEmbedder,
+    *,
+    flush_interval: float,
+    backfill: bool,
+) -> None:
+    """
+    حلقه پس‌زمینه (در lifespan): ابتدا backfill (اختیاری) و سپس تخلیه صف با پر
+    شدن یک دسته یا هر `flush_interval` ثانیه. با لغو Task در خاموشی آرام،
+    تغییرات باقی‌مانده صف نوشته می‌شوند.
+    """
+    try:
+        if backfill:
+            try:
+                total = await backfill_embeddings(session_maker, index, embedder, queue.batch_size * 4)
+                if total:
+                    logger.info("backfilled embeddings for %d items", total)
+            except Exception:
+                logger.exception("embedding backfill failed")
+        while True:
+            await queue.wait(flush_interval)
+            await flush_embeddings(queue, index, embedder)
+    finally:
+        if len(queue):
+            await flush_embeddings(queue, index, embedder)
@@ -0,0 +1,115 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import delete, func, insert, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.models.item import Item
+from backend.models.item_stats import OwnerItemStats
+
+logger = logging.getLogger("backend.item_stats")
+
+# -----------------------------------------------------------------
+# کلاس CRUD شمارنده‌های آیتم هر مالک
+# -----------------------------------------------------------------
+class CRUDOwnerItemStats:
+    """
+    خواندن و نگه‌داری افزایشی جدول owner_item_stats.
+
+    متد increment کامیت نمی‌کند تا فراخوان (CRUDItem) آن را در همان تراکنش
+    ایجاد/حذف آیتم اجرا کند.
+    """
+
+    def __init__(self, model=OwnerItemStats):
+        self.model = model
+
+    # ------------------- متدهای خواندن (Read) -------------------
+    async def get(self, db: AsyncSession, *, owner_id: int) -> Optional[OwnerItemStats]:
+        """
+        واکشی آمار یک مالک با جستجوی کلید اصلی (O(1) مستقل از تعداد آیتم‌ها).
+        """
+        return await db.get(self.model, owner_id)
+
+    async def get_many(
+        self, db: AsyncSession, *, owner_ids: Sequence[int]
+    ) -> Dict[int, OwnerItemStats]:
+        """
+        واکشی آمار چند مالک در یک کوئری.
+
+        :return: دیکشنری owner_id -> ردیف آمار (مالکان بدون آیتم در آن نیستند)
+        """
+        if not owner_ids:
+            return {}
+        result = await db.execute(
+            select(self.model).where(self.model.owner_id.in_(set(owner_ids)))
+        )
+        return {row.owner_id: row for row in result.scalars()}
+
+    # ------------------- به‌روزرسانی افزایشی -------------------
+    async def increment(self, db: AsyncSession, *, owner_id: int, delta: int) -> None:
+        """
+        افزودن `delta` به شمارنده مالک با یک دستور UPSERT اتمیک (بدون commit).
+        """
+        dialect = db.get_bind().dialect.name
+        insert_fn = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        now = datetime.now()
+        stmt = insert_fn(self.model).values(
+            owner_id=owner_id, item_count=max(delta, 0), updated_at=now
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[self.model.owner_id],
+            set_={
+                "item_count": self.model.item_count + delta,
+                "updated_at": now,
+            },
+        )
+        await db.execute(stmt)
+
+    # ------------------- کار ترمیم (Repair Job) -------------------
+    async def rebuild(self, db: AsyncSession) -> int:
+        """
+        بازسازی کامل شمارنده‌ها از روی جدول items در یک تراکنش.
+        برای ترمیم پس از درج/حذف مستقیم خارج از CRUDItem استفاده می‌شود.
+
+        در PostgreSQL جدول با قفل SHARE ROW EXCLUSIVE قفل می‌شود: این قفل با UPSERT
+        متد increment تداخل دارد، پس increment همزمان تا پایان بازسازی منتظر
+        می‌ماند و پس از آن روی شمارنده تازه اعمال می‌شود (به جای نقض کلید اصلی
+        در INSERT بازسازی یا بازنویسی شدن). خواندن آمار مسدود نمی‌شود.
+
+        :return: تعداد مالکانی که ردیف آمار دارند.
+        """
+        if db.get_bind().dialect.name == "postgresql":
+            await db.execute(
+                text(f"LOCK TABLE {self.model.__tablename__} IN SHARE ROW EXCLUSIVE MODE")
+            )
+        await db.execute(delete(self.model))
+        result = await db.execute(
+            insert(self.model).from_select(
+                ["owner_id", "item_count", "updated_at"],
+                select(Item.owner_id, func.count(), func.now()).group_by(Item.owner_id),
+            )
+        )
+        await db.commit()
+        return result.rowcount
+
+
+async def run_item_stats_repair(session_maker, interval: float) -> None:
+    """
+    حلقه پس‌زمینه‌ای که هر `interval` ثانیه شمارنده‌ها را بازسازی می‌کند تا
+    انحراف ناشی از تغییرات مستقیم جدول items (خارج از CRUDItem) ترمیم شود.
+    اولین اجرا پس از یک `interval` است. خطای یک دور ثبت می‌شود و حلقه ادامه می‌یابد.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with session_maker() as db:
+                await owner_item_stats.rebuild(db)
+        except Exception:
+            logger.exception("item stats repair failed")
+
+
+# ایجاد نمونه‌ای از کلاس برای استفاده در CRUDItem و اندپوینت‌ها
+owner_item_stats = CRUDOwnerItemStats()
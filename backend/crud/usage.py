@@ -0,0 +1,198 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.core.usage import FIELDS, UsageKey, UsageMeter
+from backend.models.usage import UsageDay, UsageHour, UsageMinute
+
+logger = logging.getLogger("backend.usage")
+
+GRANULARITIES = ("minute", "hour", "day")
+UPSERT_BATCH_SIZE = 1000
+
+
+def as_utc(moment: datetime) -> datetime:
+    """تبدیل زمان دارای منطقه زمانی به UTC بدون tzinfo (مانند ستون‌های جداول مصرف)."""
+    if moment.tzinfo is None:
+        return moment
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def truncate(moment: datetime, granularity: str) -> datetime:
+    """شروع بازه minute/hour/day شامل یک لحظه."""
+    moment = moment.replace(second=0, microsecond=0)
+    if granularity in ("hour", "day"):
+        moment = moment.replace(minute=0)
+    if granularity == "day":
+        moment = moment.replace(hour=0)
+    return moment
+
+
+def _compaction_sql(source: str, target: str, unit: str) -> str:
+    """
+    انتقال اتمیک ردیف‌های قدیمی‌تر از :cutoff از جدول source به جدول درشت‌تر target:
+    حذف و درج در یک دستور انجام می‌شود، پس ردیف‌هایی که همزمان (مثلاً با نوشتن
+    دیرهنگام یک Worker) اضافه شوند یا در این دور منتقل می‌شوند یا در دور بعد، و
+    اجرای همزمان در چند Worker چیزی را دو بار نمی‌شمارد.
+    """
+    sums = ", ".join(f"sum({field})" for field in FIELDS)
+    updates = ", ".join(f"{field} = {target}.{field} + EXCLUDED.{field}" for field in FIELDS)
+    return (
+        f"WITH moved AS (DELETE FROM {source} WHERE bucket_start < :cutoff "
+        f"RETURNING user_id, model, bucket_start, {', '.join(FIELDS)}) "
+        f"INSERT INTO {target} (user_id, model, bucket_start, {', '.join(FIELDS)}) "
+        f"SELECT user_id, model, date_trunc('{unit}', bucket_start), {sums} FROM moved "
+        "GROUP BY 1, 2, 3 "
+        f"ON CONFLICT (user_id, model, bucket_start) DO UPDATE SET {updates}"
+    )
+
+
+# -----------------------------------------------------------------
+# کلاس CRUD جداول مصرف
+# -----------------------------------------------------------------
+class CRUDUsage:
+    """
+    نوشتن شمارنده‌های دقیقه‌ای، فشرده‌سازی دقیقه به ساعت و ساعت به روز، و
+    گزارش مصرف یک کاربر از هر سه جدول.
+    """
+
+    tables = {"minute": UsageMinute, "hour": UsageHour, "day": UsageDay}
+
+    # ------------------- نوشتن شمارنده‌ها -------------------
+    async def upsert_minutes(self, db: AsyncSession, counters: Dict[UsageKey, List[int]]) -> None:
+        """
+        افزودن شمارنده‌های تخلیه‌شده به usage_minute با یک UPSERT افزایشی (بدون commit).
+        """
+        if not counters:
+            return
+        dialect = db.get_bind().dialect.name
+        insert_fn = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        rows = [
+            {
+                "user_id": user_id,
+                "model": model,
+                "bucket_start": datetime.utcfromtimestamp(minute * 60),
+                **dict(zip(FIELDS, values)),
+            }
+            for (user_id, model, minute), values in counters.items()
+        ]
+        # هر دستور حداکثر UPSERT_BATCH_SIZE ردیف (محدودیت تعداد پارامترهای یک دستور)
+        for offset in range(0, len(rows), UPSERT_BATCH_SIZE):
+            stmt = insert_fn(UsageMinute).values(rows[offset:offset + UPSERT_BATCH_SIZE])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[UsageMinute.user_id, UsageMinute.model, UsageMinute.bucket_start],
+                set_={field: getattr(UsageMinute, field) + getattr(stmt.excluded, field) for field in FIELDS},
+            )
+            await db.execute(stmt)
+
+    # ------------------- فشرده‌سازی (فقط PostgreSQL) -------------------
+    async def compact(self, db: AsyncSession, *, now: datetime, hourly_retention_days: int) -> Tuple[int, int]:
+        """
+        انتقال دقیقه‌های ساعت‌های کامل‌شده به usage_hour و ساعت‌های روزهای
+        قدیمی‌تر از hourly_retention_days به usage_day (با commit).
+
+        :return: تعداد ردیف‌های ساعتی و روزانه درج/به‌روزشده
+        """
+        hours = await db.execute(
+            text(_compaction_sql(UsageMinute.__tablename__, UsageHour.__tablename__, "hour")),
+            {"cutoff": truncate(now, "hour")},
+        )
+        days = await db.execute(
+            text(_compaction_sql(UsageHour.__tablename__, UsageDay.__tablename__, "day")),
+            {"cutoff": truncate(now - timedelta(days=hourly_retention_days), "day")},
+        )
+        await db.commit()
+        return hours.rowcount, days.rowcount
+
+    # ------------------- گزارش مصرف -------------------
+    async def get_report(
+        self, db: AsyncSession, *, user_id: int, granularity: str, start: datetime, end: datetime
+    ) -> List[Dict[str, Any]]:
+        """
+        مصرف کاربر در بازه [start, end) به تفکیک مدل و بازه‌های granularity.
+        ردیف‌های جداول درشت‌تر (داده‌های فشرده‌شده) در بازه خودشان گزارش می‌شوند؛
+        start فقط برای همان جداول به شروع ساعت/روز گرد می‌شود.
+        """
+        buckets: Dict[Tuple[datetime, str], List[int]] = {}
+        for unit, table in self.tables.items():
+            result = await db.execute(
+                select(table.bucket_start, table.model, *(getattr(table, field) for field in FIELDS)).where(
+                    table.user_id == user_id,
+                    table.bucket_start >= truncate(start, unit),
+                    table.bucket_start < end,
+                )
+            )
+            for bucket_start, model, *values in result:
+                key = (truncate(bucket_start, granularity), model)
+                totals = buckets.get(key)
+                if totals is None:
+                    buckets[key] = list(values)
+                else:
+                    for index, value in enumerate(values):
+                        totals[index] += value
+        return [
+            {"bucket_start": bucket_start, "model": model, **dict(zip(FIELDS, values))}
+            for (bucket_start, model), values in sorted(buckets.items())
+        ]
+
+
+usage = CRUDUsage()
+
+
+async def flush_usage(session_maker, meter: UsageMeter) -> int:
+    """
+    نوشتن شمارنده‌های این Worker؛ در صورت خطا شمارنده‌ها برای تلاش بعدی
+    به meter برمی‌گردند تا مصرف قابل صورت‌حساب از دست نرود.
+    """
+    counters = meter.drain()
+    if not counters:
+        return 0
+    committed = False
+    try:
+        async with session_maker() as db:
+            await usage.upsert_minutes(db, counters)
+            await db.commit()
+            committed = True
+    except BaseException:
+        if not committed:
+            meter.restore(counters)
+        raise
+    return len(counters)
+
+
+async def run_usage_flusher(
+    session_maker,
+    meter: UsageMeter,
+    interval: float,
+    compaction_interval: float,
+    hourly_retention_days: int,
+) -> None:
+    """
+    حلقه پس‌زمینه‌ای که هر `interval` ثانیه شمارنده‌های مصرف را می‌نویسد و هر
+    `compaction_interval` ثانیه (فقط PostgreSQL) جداول را فشرده می‌کند. با لغو Task
+    در خاموشی آرام، شمارنده‌های باقی‌مانده نوشته می‌شوند.
+    """
+    loop = asyncio.get_running_loop()
+    next_compaction = loop.time() + compaction_interval
+    try:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await flush_usage(session_maker, meter)
+                if compaction_interval > 0 and loop.time() >= next_compaction:
+                    next_compaction = loop.time() + compaction_interval
+                    async with session_maker() as db:
+                        if db.get_bind().dialect.name == "postgresql":
+                            await usage.compact(
+                                db, now=datetime.utcnow(), hourly_retention_days=hourly_retention_days
+                            )
+            except Exception:
+                logger.exception("usage flush failed; counters are kept for the next attempt")
+    finally:
+        if len(meter):
+            await flush_usage(session_maker, meter)
@@ -12,5 +12,17 @@ from .base_class import Base
 # وارد کردن مدل User که در backend/models/user.py تعریف شده است.
 from backend.models.user import User  
 
+# وارد کردن مدل توکن‌های API که در backend/db/models.py تعریف شده است.
+from backend.db.models import APIToken
+
 # وارد کردن مدل Item که در backend/models/item.py تعریف شده است.
 from backend.models.item import Item 
+
+# وارد کردن مدل شمارنده‌های آیتم هر مالک که در backend/models/item_stats.py تعریف شده است.
+from backend.models.item_stats import OwnerItemStats
+
+# وارد کردن مدل سابقه پاسخ‌های /answer که در backend/models/answer_history.py تعریف شده است.
+from backend.models.answer_history import AnswerHistory
+
+# وارد کردن مدل‌های جداول مصرف (دقیقه‌ای/ساعتی/روزانه) که در backend/models/usage.py تعریف شده‌اند.
+from backend.models.usage import UsageDay, UsageHour, UsageMinute
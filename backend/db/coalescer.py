@@ -0,0 +1,155 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.core.config import settings
+from backend.db.session import get_engine
+
+# تابعی که پس از درج یک دسته، در همان تراکنش روی ردیف‌های موفق اجرا می‌شود
+AfterInsertHook = Callable[[AsyncSession, List[Any]], Awaitable[None]]
+_Pending = Tuple[Dict[str, Any], "asyncio.Future[Any]"]
+
+
+# -----------------------------------------------------------------
+# تجمیع نوشتن‌ها (Group Commit) برای درج‌های تک‌ردیفی همزمان
+# -----------------------------------------------------------------
+class WriteCoalescer:
+    """
+    درج‌های همزمان یک مدل را در یک پنجره زمانی کوتاه جمع می‌کند و همه را با یک
+    دستور INSERT چندردیفی و یک commit ثبت می‌کند؛ بنابراین به جای یک flush
+    فایل WAL برای هر ردیف، یک flush برای کل دسته انجام می‌شود.
+
+    اگر دسته با خطای محدودیت (IntegrityError) مواجه شود، ردیف‌ها در همان
+    تراکنش و هر کدام در یک SAVEPOINT جداگانه درج می‌شوند تا هر فراخواننده
+    ردیف خودش یا خطای محدودیت خودش را دریافت کند.
+    """
+
+    def __init__(
+        self,
+        session_maker: Callable[[], AsyncSession],
+        *,
+        window: float,
+        max_batch: int,
+    ):
+        self.session_maker = session_maker
+        self.window = window
+        self.max_batch = max_batch
+        self._pending: Dict[type, List[_Pending]] = {}
+        self._hooks: Dict[type, Optional[AfterInsertHook]] = {}
+        self._timers: Dict[type, asyncio.TimerHandle] = {}
+        self._tasks: set = set()
+        # آمار برای مانیتورینگ
+        self.batches = 0
+        self.rows = 0
+        self.fallbacks = 0
+
+    async def insert(
+        self,
+        model: type,
+        values: Dict[str, Any],
+        *,
+        after_insert: Optional[AfterInsertHook] = None,
+    ) -> Any:
+        """
+        افزودن یک ردیف به دسته جاری مدل و انتظار تا commit شدن آن.
+
+        :return: نمونه ORM درج‌شده (جدا از نشست فراخواننده)
+        :raises IntegrityError: اگر همین ردیف محدودیتی را نقض کند
+        """
+        loop = asyncio.get_running_loop()
+        future: "asyncio.Future[Any]" = loop.create_future()
+        batch = self._pending.setdefault(model, [])
+        batch.append((values, future))
+        self._hooks[model] = after_insert
+
+        if len(batch) == 1:
+            self._timers[model] = loop.call_later(self.window, self._start_flush, model)
+        elif len(batch) >= self.max_batch:
+            self._timers.pop(model).cancel()
+            self._start_flush(model)
+        return await future
+
+    def _start_flush(self, model: type) -> None:
+        self._timers.pop(model, None)
+        batch = self._pending.pop(model, [])
+        if not batch:
+            return
+        task = asyncio.ensure_future(self._flush(model, batch, self._hooks.get(model)))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _flush(
+        self, model: type, batch: List[_Pending], after_insert: Optional[AfterInsertHook]
+    ) -> None:
+        values = [row for row, _ in batch]
+        results: List[Union[Any, BaseException]]
+        try:
+            async with self.session_maker() as db:
+                try:
+                    stmt = insert(model).returning(model, sort_by_parameter_order=True)
+                    results = list(await db.scalars(stmt, values))
+                    if after_insert is not None:
+                        await after_insert(db, results)
+                    await db.commit()
+                except IntegrityError:
+                    await db.rollback()
+                    self.fallbacks += 1
+                    results = await self._insert_individually(db, model, values, after_insert)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.rows += len(batch)
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def _insert_individually(
+        self,
+        db: AsyncSession,
+        model: type,
+        values: List[Dict[str, Any]],
+        after_insert: Optional[AfterInsertHook],
+    ) -> List[Union[Any, BaseException]]:
+        """درج تک‌تک ردیف‌ها در SAVEPOINT‌های جداگانه و یک commit مشترک."""
+        results: List[Union[Any, BaseException]] = []
+        inserted: List[Any] = []
+        for row in values:
+            try:
+                async with db.begin_nested():
+                    obj = model(**row)
+                    db.add(obj)
+                results.append(obj)
+                inserted.append(obj)
+            except IntegrityError as e:
+                results.append(e)
+        if after_insert is not None and inserted:
+            await after_insert(db, inserted)
+        await db.commit()
+        return results
+
+
+def _coalescer_session() -> AsyncSession:
+    """
+    نشست مستقل برای دسته‌های تجمیع‌شده، روی موتور تنبل برنامه.
+    expire_on_commit=False لازم است تا ردیف‌های برگشتی پس از بسته شدن نشست قابل خواندن باشند.
+    """
+    return AsyncSession(bind=get_engine(), expire_on_commit=False)
+
+
+# نمونه سراسری؛ فقط زمانی استفاده می‌شود که DB_WRITE_COALESCING فعال باشد.
+write_coalescer = WriteCoalescer(
+    _coalescer_session,
+    window=settings.DB_WRITE_COALESCING_WINDOW_MS / 1000,
+    max_batch=settings.DB_WRITE_COALESCING_MAX_BATCH,
+)
@@ -0,0 +1,303 @@
+import logging
+import re
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from backend.core.config import settings
+from backend.core.metrics import registry
+
+logger = logging.getLogger("backend.sql")
+
+# -----------------------------------------------------------------
+# زمان‌سنجی و آمار دستورات SQL با رویدادهای Cursor موتور SQLAlchemy
+# -----------------------------------------------------------------
+# جایگزین echo=True: به جای لاگ همگام هر دستور، برای هر دستور نرمال‌شده
+# تعداد، زمان کل/بیشینه و تعداد ردیف‌ها جمع زده می‌شود؛ فقط دستورات کند (با
+# پارامترهای پنهان‌شده) لاگ می‌شوند و تکرار یک دستور در یک درخواست (N+1) گزارش می‌شود.
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+query_duration = registry.histogram(
+    "db_query_duration_seconds",
+    "Database statement execution time by SQL operation.",
+    ("operation",),
+    buckets=QUERY_BUCKETS,
+)
+query_errors = registry.counter(
+    "db_query_errors_total", "Database statements that raised an error.", ("operation",)
+)
+n_plus_one_total = registry.counter(
+    "db_n_plus_one_total", "Requests that repeated one statement more than the N+1 threshold.", ("route",)
+)
+
+_KNOWN_OPERATIONS = frozenset(
+    ("select", "insert", "update", "delete", "with", "begin", "commit", "rollback", "create", "alter", "drop")
+)
+OTHER_STATEMENT = "<other>"
+
+
+# ------------------- نرمال‌سازی دستورات -------------------
+_NORMALIZE_RULES = (
+    # رشته‌های ثابت، placeholderهای asyncpg ($1)، psycopg (%(name)s / %s) و نام‌دار (:name)، و اعداد
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"\$\d+|%\(\w+\)s|%s|(?<![:\w]):\w+"), "?"),
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),
+    # لیست‌های IN با طول متغیر (expanding bind params) و VALUES چندردیفی
+    (re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE), "IN (...)"),
+    (re.compile(r"\bVALUES\s*\([^()]*\)(?:\s*,\s*\([^()]*\))+", re.IGNORECASE), "VALUES (...)"),
+    (re.compile(r"\s+"), " "),
+)
+
+
+def normalize_statement(statement: str) -> str:
+    """حذف مقادیر ثابت و placeholderها تا دستورات هم‌شکل یک کلید داشته باشند."""
+    for pattern, replacement in _NORMALIZE_RULES:
+        statement = pattern.sub(replacement, statement)
+    return statement.strip()
+
+
+# متن دستور -> (نوع عملیات، دستور نرمال‌شده)؛ دستورات کامپایل‌شده SQLAlchemy همان
+# شیء رشته تکراری هستند، پس پس از اولین بار تنها هزینه، یک جستجوی دیکشنری است.
+_STATEMENTS: Dict[str, Tuple[str, str]] = {}
+_STATEMENT_CACHE_SIZE = 4096
+
+
+def describe_statement(statement: str) -> Tuple[str, str]:
+    described = _STATEMENTS.get(statement)
+    if described is None:
+        head = statement.lstrip()[:16].split(None, 1)
+        operation = head[0].lower() if head else "other"
+        if operation not in _KNOWN_OPERATIONS:
+            operation = "other"
+        described = (operation, normalize_statement(statement))
+        if len(_STATEMENTS) < _STATEMENT_CACHE_SIZE:
+            _STATEMENTS[statement] = described
+    return described
+
+
+def statement_operation(statement: str) -> str:
+    """نوع عملیات یک دستور SQL (select، insert، ... یا other)."""
+    return describe_statement(statement)[0]
+
+
+def redact_parameters(parameters: Any, executemany: bool = False) -> Any:
+    """جایگزینی مقادیر پارامترها با نوعشان (برای لاگ بدون افشای داده)."""
+    if executemany:
+        return f"<executemany: {len(parameters)} rows>"
+    if isinstance(parameters, dict):
+        return {key: f"<{type(value).__name__}>" for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [f"<{type(value).__name__}>" for value in parameters]
+    return f"<{type(parameters).__name__}>"
+
+
+def _is_power_of_ten(count: int) -> bool:
+    while count % 10 == 0:
+        count //= 10
+    return count == 1
+
+
+# ------------------- آمار تجمیعی دستورات -------------------
+class StatementStats:
+    """
+    آمار هر دستور نرمال‌شده (تعداد، زمان کل/بیشینه، ردیف‌ها، خطاها)، لاگ دستورات
+    کند و درخواست‌هایی که یک دستور را بیش از آستانه N+1 تکرار کرده‌اند.
+    """
+
+    def __init__(self, max_statements: int, slow_threshold: float, slow_log_size: int, redact: bool):
+        self.max_statements = max_statements
+        self.slow_threshold = slow_threshold
+        self.redact = redact
+        # دستور نرمال‌شده -> [تعداد، زمان کل، بیشینه زمان، ردیف‌ها، خطاها]
+        self.statements: Dict[str, List[float]] = {}
+        self.slow: Deque[Dict[str, Any]] = deque(maxlen=slow_log_size)
+        # دستور نرمال‌شده -> تعداد اجراهای کند (لاگ فقط در اولین بار و هر 10^n بار)
+        self.slow_counts: Dict[str, int] = {}
+        # (مسیر، دستور) -> یافته N+1
+        self.n_plus_one: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    def _entry(self, normalized: str) -> List[float]:
+        entry = self.statements.get(normalized)
+        if entry is None:
+            if len(self.statements) >= self.max_statements:
+                normalized = OTHER_STATEMENT
+                entry = self.statements.get(normalized)
+            if entry is None:
+                entry = self.statements[normalized] = [0, 0.0, 0.0, 0, 0]
+        return entry
+
+    def observe(self, normalized: str, elapsed: float, rows: int) -> None:
+        entry = self._entry(normalized)
+        entry[0] += 1
+        entry[1] += elapsed
+        if elapsed > entry[2]:
+            entry[2] = elapsed
+        if rows > 0:
+            entry[3] += rows
+
+    def observe_error(self, normalized: str) -> None:
+        self._entry(normalized)[4] += 1
+
+    def record_slow(
+        self,
+        statement: str,
+        normalized: str,
+        parameters: Any,
+        executemany: bool,
+        elapsed: float,
+        rows: int,
+        route: Optional[str],
+    ) -> None:
+        if normalized not in self.slow_counts and len(self.slow_counts) >= self.max_statements:
+            normalized = OTHER_STATEMENT
+        count = self.slow_counts[normalized] = self.slow_counts.get(normalized, 0) + 1
+        self.slow.append({
+            "at": datetime.now(timezone.utc).isoformat(),
+            "duration_ms": round(elapsed * 1000, 3),
+            "rows": rows,
+            "route": route,
+            "statement": statement[:4000],
+            "parameters": redact_parameters(parameters, executemany) if self.redact else repr(parameters)[:1000],
+        })
+        # یک دستور کند پرتکرار لاگ را پر نمی‌کند: لاگ در اجرای 1، 10، 100، ...
+        if _is_power_of_ten(count):
+            logger.warning(
+                "slow statement (%.1f ms, %d slow so far) route=%s: %s",
+                elapsed * 1000, count, route, normalized,
+            )
+
+    def record_n_plus_one(self, route: str, normalized: str, count: int) -> None:
+        finding = self.n_plus_one.get((route, normalized))
+        if finding is None:
+            finding = self.n_plus_one[(route, normalized)] = {
+                "route": route, "statement": normalized, "requests": 0, "max_repeats": 0,
+            }
+            logger.warning("possible N+1 on %s: %d x %s", route, count, normalized)
+        finding["requests"] += 1
+        finding["max_repeats"] = max(finding["max_repeats"], count)
+        finding["last_seen"] = datetime.now(timezone.utc).isoformat()
+
+    def top(self, order_by: str = "total", limit: int = 50) -> List[Dict[str, Any]]:
+        index = {"count": 0, "total": 1, "max": 2, "rows": 3, "errors": 4}[order_by]
+        ranked = sorted(self.statements.items(), key=lambda item: item[1][index], reverse=True)[:limit]
+        return [
+            {
+                "statement": statement,
+                "count": count,
+                "total_ms": round(total * 1000, 3),
+                "mean_ms": round(total * 1000 / count, 3) if count else 0.0,
+                "max_ms": round(maximum * 1000, 3),
+                "rows": rows,
+                "errors": errors,
+            }
+            for statement, (count, total, maximum, rows, errors) in ranked
+        ]
+
+    def snapshot(self, order_by: str = "total", limit: int = 50) -> Dict[str, Any]:
+        return {
+            "statements": self.top(order_by, limit),
+            "unique_statements": len(self.statements),
+            "slow": list(self.slow),
+            "slow_counts": dict(
+                sorted(self.slow_counts.items(), key=lambda item: item[1], reverse=True)[:limit]
+            ),
+            "n_plus_one": sorted(self.n_plus_one.values(), key=lambda f: f["requests"], reverse=True),
+        }
+
+    def reset(self) -> None:
+        self.statements = {}
+        self.slow.clear()
+        self.slow_counts = {}
+        self.n_plus_one = {}
+
+
+statement_stats = StatementStats(
+    max_statements=settings.SQL_STATS_MAX_STATEMENTS,
+    slow_threshold=settings.SQL_SLOW_QUERY_MS / 1000,
+    slow_log_size=settings.SQL_SLOW_LOG_SIZE,
+    redact=settings.SQL_SLOW_LOG_REDACT,
+)
+
+
+# ------------------- شمارش دستورات هر درخواست (تشخیص N+1) -------------------
+class RequestStatements:
+    """شمارنده دستورات نرمال‌شده یک درخواست HTTP."""
+
+    __slots__ = ("scope", "counts")
+
+    def __init__(self, scope: Any):
+        self.scope = scope
+        self.counts: Dict[str, int] = {}
+
+    @property
+    def route(self) -> Optional[str]:
+        route = self.scope.get("route")
+        return route.path if route is not None else None
+
+    def finish(self, threshold: int) -> None:
+        """ثبت دستوراتی که بیش از threshold بار در این درخواست اجرا شده‌اند."""
+        route = self.route or "<unrouted>"
+        flagged = False
+        for normalized, count in self.counts.items():
+            if count > threshold:
+                statement_stats.record_n_plus_one(route, normalized, count)
+                flagged = True
+        if flagged:
+            n_plus_one_total.labels(route).inc()
+
+
+current_request_statements: ContextVar[Optional[RequestStatements]] = ContextVar(
+    "current_request_statements", default=None
+)
+
+
+# ------------------- رویدادهای موتور -------------------
+def _before_cursor_execute(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+    conn.info["query_started"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+    started = conn.info.pop("query_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    operation, normalized = describe_statement(statement)
+    query_duration.labels(operation).observe(elapsed)
+
+    rows = getattr(cursor, "rowcount", -1)
+    statement_stats.observe(normalized, elapsed, rows)
+
+    request = current_request_statements.get()
+    if request is not None:
+        request.counts[normalized] = request.counts.get(normalized, 0) + 1
+    if statement_stats.slow_threshold and elapsed >= statement_stats.slow_threshold:
+        statement_stats.record_slow(
+            statement, normalized, parameters, executemany, elapsed, rows,
+            request.route if request is not None else None,
+        )
+
+
+def _handle_error(exception_context: Any) -> None:
+    conn = exception_context.connection
+    if conn is not None:
+        conn.info.pop("query_started", None)
+    statement = exception_context.statement
+    if statement:
+        operation, normalized = describe_statement(statement)
+        statement_stats.observe_error(normalized)
+    else:
+        operation = "other"
+    query_errors.labels(operation).inc()
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """ثبت رویدادهای زمان‌سنجی و آمار دستورات روی موتور همگام زیرین یک AsyncEngine."""
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
@@ -1,65 +1,12 @@
 from datetime import datetime
-from typing import Optional
 
-from sqlalchemy import Boolean, Column, String, Text, DateTime, ForeignKey, Integer, func
+from sqlalchemy import String, DateTime, ForeignKey
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-# ایمپورت کردن کلاس پایه (Base) که قبلا تعریف کردیم
-from backend.db.base import Base
-
-# -----------------------------------------------------------------
-# مدل User: برای ذخیره اطلاعات کاربران
-# -----------------------------------------------------------------
-class User(Base):
-    """
-    مدل SQLAlchemy برای نگهداری اطلاعات کاربران.
-    جدول مربوطه به صورت خودکار 'user' نامیده می شود.
-    """
-    
-    # ایمیل کاربر - باید منحصر به فرد باشد و به عنوان نام کاربری استفاده می شود
-    email: Mapped[str] = mapped_column(
-        String(255), 
-        unique=True, 
-        index=True, 
-        nullable=False,
-        comment="ایمیل منحصر به فرد کاربر"
-    )
-    
-    # پسورد هش شده - از نوع String برای ذخیره هش امن
-    hashed_password: Mapped[str] = mapped_column(
-        String(255), 
-        nullable=False,
-        comment="پسورد هش شده کاربر"
-    )
-    
-    # نام و نام خانوادگی کاربر
-    full_name: Mapped[Optional[str]] = mapped_column(
-        String(255), 
-        nullable=True,
-        comment="نام کامل کاربر"
-    )
-    
-    # پرچم وضعیت فعال بودن کاربر
-    is_active: Mapped[bool] = mapped_column(
-        Boolean, 
-        default=True,
-        comment="وضعیت فعال بودن حساب کاربری"
-    )
-    
-    # پرچم وضعیت مدیر بودن کاربر
-    is_superuser: Mapped[bool] = mapped_column(
-        Boolean, 
-        default=False,
-        comment="تعیین می کند آیا کاربر مدیر است یا خیر"
-    )
-
-    # رابطه (Relationship) با مدل APIToken
-    tokens: Mapped[list["APIToken"]] = relationship(
-        "APIToken",
-        back_populates="user",
-        cascade="all, delete-orphan", # حذف توکن‌ها با حذف کاربر
-        comment="توکن‌های API مرتبط با این کاربر"
-    )
+# همان Base مدل‌های backend/models تا کلید خارجی users.id و رابطه با User حل شوند
+from backend.core.database import Base
+# مدل User در backend/models/user.py تعریف شده و برای سازگاری از اینجا هم در دسترس است
+from backend.models.user import User
 
 # -----------------------------------------------------------------
 # مدل APIToken: برای ذخیره توکن‌های احراز هویت
@@ -67,28 +14,36 @@ class User(Base):
 class APIToken(Base):
     """
     مدل SQLAlchemy برای نگهداری توکن‌های API یا Refresh Token ها.
-    جدول مربوطه به صورت خودکار 'apitoken' نامیده می شود.
+    جدول مربوطه 'api_tokens' است.
+
+    تغییر نام جداول: نام خودکار قبلی این جدول 'apitoken' و جدول کاربران 'user'
+    بود (کلید خارجی items.owner_id از ابتدا به users.id اشاره می‌کرد). برای
+    دیتابیس‌های موجود پیش از استقرار:
+
+        ALTER TABLE "user" RENAME TO users;
+        ALTER TABLE apitoken RENAME TO api_tokens;
     """
+    __tablename__ = "api_tokens"
     
-    # توکن اصلی - باید یکتا و ایندکس شده باشد
-    token: Mapped[str] = mapped_column(
-        String(255), 
-        unique=True, 
-        index=True, 
-        nullable=False,
-        comment="مقدار توکن API"
+    # هش SHA-256 توکن (کلید اصلی) - خود توکن هرگز ذخیره نمی‌شود و فقط یک بار
+    # هنگام صدور به کاربر نشان داده می‌شود
+    token_hash: Mapped[str] = mapped_column(
+        String(64),
+        primary_key=True,
+        comment="هش SHA-256 توکن API"
     )
     
-    # تاریخ انقضای توکن
+    # تاریخ انقضای توکن - ایندکس برای حذف دسته‌ای توکن‌های منقضی
     expires_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), 
         nullable=False,
+        index=True,
         comment="زمان انقضای توکن"
     )
     
     # کلید خارجی برای اتصال به جدول کاربر
     user_id: Mapped[int] = mapped_column(
-        ForeignKey("user.id"), 
+        ForeignKey("users.id", ondelete="CASCADE"), 
         nullable=False,
         comment="کلید خارجی به کاربر مالک توکن"
     )
@@ -97,5 +52,4 @@ class APIToken(Base):
     user: Mapped["User"] = relationship(
         "User", 
         back_populates="tokens",
-        comment="کاربر مالک این توکن"
     )
@@ -0,0 +1,356 @@
+import asyncio
+import csv
+import functools
+import gzip
+import logging
+import os
+from datetime import date, datetime
+from pathlib import Path
+from typing import Awaitable, Callable, List, Optional
+
+from sqlalchemy import Connection, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+logger = logging.getLogger("backend.partitions")
+
+# -----------------------------------------------------------------
+# پارتیشن‌بندی زمانی (Range Partitioning) جدول items بر اساس created_at
+# -----------------------------------------------------------------
+# هر ماه یک پارتیشن با نام items_pYYYYMM دارد. کار نگه‌داری (maintenance):
+#   1. پارتیشن‌های ماه‌های آینده (و ماه‌هایی که ردیف‌هایشان در پارتیشن پیش‌فرض
+#      مانده‌اند) را می‌سازد.
+#   2. پارتیشن‌های قدیمی‌تر از بازه نگه‌داری را Detach، در فایل CSV فشرده
+#      بایگانی و سپس Drop می‌کند.
+# توابع DDL همگام (sync) روی Connection کار می‌کنند تا هم در رویداد
+# after_create و هم از طریق run_sync موتور ناهمگام قابل استفاده باشند؛ تنها
+# بایگانی ناهمگام است تا فشرده‌سازی و نوشتن فایل در Thread انجام شود.
+
+PARTITIONED_TABLE = "items"
+PARTITION_PREFIX = "items_p"
+DEFAULT_PARTITION = "items_default"
+PARTITION_NAME_PATTERN = "^items_p[0-9]{6}$"
+
+# ستون‌های ذخیره‌شده در بایگانی (ستون تولیدی search_vector حذف می‌شود)
+ARCHIVE_COLUMNS = ("id", "title", "description", "owner_id", "created_at", "updated_at")
+# تعداد ردیف‌های هر دسته بایگانی (هر دسته در یک فراخوانی Thread نوشته می‌شود)
+ARCHIVE_BATCH_ROWS = 5000
+
+
+def add_months(month: date, months: int) -> date:
+    """اولین روز ماهی که `months` ماه بعد (یا قبل) از `month` است."""
+    years, index = divmod(month.month - 1 + months, 12)
+    return date(month.year + years, index + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    """نام پارتیشن ماه داده شده، مثلاً items_p202410."""
+    return f"{PARTITION_PREFIX}{month:%Y%m}"
+
+
+def partition_month(name: str) -> date:
+    """استخراج ماه پارتیشن از روی نام آن."""
+    return datetime.strptime(name[len(PARTITION_PREFIX):], "%Y%m").date()
+
+
+# ------------------- ساخت و فهرست پارتیشن‌ها -------------------
+def is_partitioned(conn: Connection) -> bool:
+    """آیا جدول items در حال حاضر یک جدول پارتیشن‌بندی‌شده است؟"""
+    return bool(conn.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table pt "
+        "JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = :table)"
+    ), {"table": PARTITIONED_TABLE}).scalar())
+
+
+def create_partition(conn: Connection, month: date) -> str:
+    """
+    ساخت پارتیشن یک ماه (در صورت عدم وجود).
+
+    اگر ردیف‌هایی از این ماه پیش‌تر در پارتیشن پیش‌فرض قرار گرفته باشند (مثلاً
+    created_at گذشته‌نگر، اختلاف ساعت یا توقف طولانی کار نگه‌داری)، PostgreSQL
+    ساخت پارتیشن را رد می‌کند؛ در این حالت پارتیشن پیش‌فرض جدا، پارتیشن ساخته،
+    ردیف‌ها به آن منتقل و پارتیشن پیش‌فرض دوباره متصل می‌شود (همه در همان تراکنش).
+    """
+    name = partition_name(month)
+    if conn.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is not None:
+        return name
+    bounds = {"start": month, "end": add_months(month, 1)}
+    create = text(
+        f"CREATE TABLE {name} PARTITION OF {PARTITIONED_TABLE} "
+        f"FOR VALUES FROM ('{bounds['start'].isoformat()}') TO ('{bounds['end'].isoformat()}')"
+    )
+    stranded = conn.execute(
+        text("SELECT to_regclass(:name)"), {"name": DEFAULT_PARTITION}
+    ).scalar() is not None and conn.execute(text(
+        f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} "
+        "WHERE created_at >= :start AND created_at < :end)"
+    ), bounds).scalar()
+    if not stranded:
+        conn.execute(create)
+        return name
+
+    columns = ", ".join(ARCHIVE_COLUMNS)
+    conn.execute(text(f"ALTER TABLE {PARTITIONED_TABLE} DETACH PARTITION {DEFAULT_PARTITION}"))
+    conn.execute(create)
+    moved = conn.execute(text(
+        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+        f"WHERE created_at >= :start AND created_at < :end RETURNING {columns}) "
+        f"INSERT INTO {PARTITIONED_TABLE} ({columns}) SELECT {columns} FROM moved"
+    ), bounds).rowcount
+    conn.execute(text(f"ALTER TABLE {PARTITIONED_TABLE} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT"))
+    logger.warning("moved %d rows from %s into new partition %s", moved, DEFAULT_PARTITION, name)
+    return name
+
+
+def ensure_future_partitions(
+    conn: Connection, months_ahead: int, today: Optional[date] = None
+) -> List[str]:
+    """
+    ساخت پارتیشن ماه جاری و `months_ahead` ماه آینده.
+    این کار باید قبل از رسیدن داده به آن ماه‌ها انجام شود تا ردیف‌ها در پارتیشن
+    پیش‌فرض قرار نگیرند.
+    """
+    current = (today or date.today()).replace(day=1)
+    return [create_partition(conn, add_months(current, i)) for i in range(months_ahead + 1)]
+
+
+def partition_default_rows(conn: Connection) -> List[str]:
+    """
+    ساخت پارتیشن برای هر ماهی که ردیف‌هایش در پارتیشن پیش‌فرض مانده‌اند، تا
+    این ردیف‌ها هم در بازه نگه‌داری بایگانی و حذف شوند.
+    """
+    if conn.execute(text("SELECT to_regclass(:name)"), {"name": DEFAULT_PARTITION}).scalar() is None:
+        return []
+    months = conn.execute(text(
+        f"SELECT DISTINCT date_trunc('month', created_at)::date FROM {DEFAULT_PARTITION} ORDER BY 1"
+    )).scalars().all()
+    return [create_partition(conn, month) for month in months]
+
+
+def attached_partitions(conn: Connection) -> List[str]:
+    """فهرست پارتیشن‌های ماهانه متصل به items، به ترتیب زمانی."""
+    rows = conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :table AND c.relname ~ :pattern ORDER BY c.relname"
+    ), {"table": PARTITIONED_TABLE, "pattern": PARTITION_NAME_PATTERN})
+    return [row[0] for row in rows]
+
+
+def detached_partitions(conn: Connection) -> List[str]:
+    """
+    پارتیشن‌هایی که Detach شده‌اند اما هنوز Drop نشده‌اند
+    (مثلاً چون بایگانی آن‌ها در اجرای قبلی با خطا مواجه شد).
+    """
+    rows = conn.execute(text(
+        "SELECT c.relname FROM pg_class c "
+        "WHERE c.relkind = 'r' AND c.relname ~ :pattern "
+        "AND NOT EXISTS (SELECT 1 FROM pg_inherits i WHERE i.inhrelid = c.oid) "
+        "ORDER BY c.relname"
+    ), {"pattern": PARTITION_NAME_PATTERN})
+    return [row[0] for row in rows]
+
+
+# ------------------- تبدیل جدول موجود به جدول پارتیشن‌بندی‌شده -------------------
+def partition_items_table(conn: Connection, months_ahead: int = 3) -> None:
+    """
+    تبدیل جدول معمولی items به جدول پارتیشن‌بندی‌شده بر اساس created_at.
+
+    روی جدول تازه‌ساخته (در رویداد after_create) تقریباً بدون هزینه است و روی
+    جدول موجود، داده‌ها را به پارتیشن‌های ماهانه کپی می‌کند. کلید اصلی به
+    (id, created_at) تغییر می‌کند، زیرا PostgreSQL کلید پارتیشن را در هر
+    محدودیت یکتایی لازم دارد.
+    """
+    if is_partitioned(conn):
+        return
+
+    from backend.models.item import Item
+
+    conn.execute(text(f"ALTER TABLE {PARTITIONED_TABLE} RENAME TO items_unpartitioned"))
+    conn.execute(text(
+        f"CREATE TABLE {PARTITIONED_TABLE} ("
+        "LIKE items_unpartitioned INCLUDING DEFAULTS INCLUDING GENERATED, "
+        "PRIMARY KEY (id, created_at)"
+        ") PARTITION BY RANGE (created_at)"
+    ))
+    # انتقال مالکیت sequence ستون id تا با حذف جدول قدیمی حذف نشود
+    sequence = conn.execute(
+        text("SELECT pg_get_serial_sequence('items_unpartitioned', 'id')")
+    ).scalar()
+    if sequence:
+        conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {PARTITIONED_TABLE}.id"))
+
+    # پارتیشن‌های کافی برای داده‌های موجود، ماه‌های آینده و یک پارتیشن پیش‌فرض
+    oldest = conn.execute(text("SELECT min(created_at) FROM items_unpartitioned")).scalar()
+    month = (oldest.date() if oldest else date.today()).replace(day=1)
+    while month < date.today().replace(day=1):
+        create_partition(conn, month)
+        month = add_months(month, 1)
+    ensure_future_partitions(conn, months_ahead)
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {PARTITIONED_TABLE} DEFAULT"
+    ))
+
+    columns = ", ".join(ARCHIVE_COLUMNS)
+    conn.execute(text(
+        f"INSERT INTO {PARTITIONED_TABLE} ({columns}) "
+        "SELECT id, title, description, owner_id, coalesce(created_at, now()), updated_at "
+        "FROM items_unpartitioned"
+    ))
+    conn.execute(text("DROP TABLE items_unpartitioned"))
+
+    # بازسازی ایندکس‌ها و کلید خارجی روی جدول والد (به پارتیشن‌ها منتقل می‌شوند)
+    for index in Item.__table__.indexes:
+        index.create(conn, checkfirst=True)
+    conn.execute(text(
+        f"ALTER TABLE {PARTITIONED_TABLE} ADD CONSTRAINT items_owner_id_fkey "
+        "FOREIGN KEY (owner_id) REFERENCES users (id)"
+    ))
+
+
+# ------------------- بایگانی و حذف پارتیشن‌های قدیمی -------------------
+def detach_partition(conn: Connection, name: str) -> None:
+    """
+    جدا کردن پارتیشن از items و کاهش شمارنده‌های آیتم مالکان در همان تراکنش
+    (ردیف‌های پارتیشن از این لحظه دیگر جزو items نیستند).
+    """
+    conn.execute(text(
+        "UPDATE owner_item_stats s SET item_count = s.item_count - d.n, updated_at = now() "
+        f"FROM (SELECT owner_id, count(*) AS n FROM {name} GROUP BY owner_id) d "
+        "WHERE s.owner_id = d.owner_id"
+    ))
+    conn.execute(text(f"ALTER TABLE {PARTITIONED_TABLE} DETACH PARTITION {name}"))
+
+
+async def archive_partition(conn: AsyncConnection, name: str, archive_dir: str) -> Path:
+    """
+    نوشتن محتوای یک پارتیشن جدا شده در فایل CSV فشرده (gzip).
+
+    ردیف‌ها به صورت Stream و در دسته‌های ARCHIVE_BATCH_ROWS تایی خوانده می‌شوند و
+    فشرده‌سازی و نوشتن هر دسته در Thread انجام می‌شود تا event loop مسدود نشود.
+    فایل ابتدا با نام موقت نوشته و سپس جابه‌جا می‌شود تا فایل ناقص باقی نماند.
+    """
+    directory = Path(archive_dir)
+    await asyncio.to_thread(directory.mkdir, parents=True, exist_ok=True)
+    path = directory / f"{name}.csv.gz"
+    tmp_path = directory / f".{name}.csv.gz.tmp"
+
+    result = await conn.stream(
+        text(f"SELECT {', '.join(ARCHIVE_COLUMNS)} FROM {name} ORDER BY id")
+    )
+    fh = await asyncio.to_thread(gzip.open, tmp_path, "wt", newline="", encoding="utf-8")
+    try:
+        writer = csv.writer(fh)
+        await asyncio.to_thread(writer.writerow, ARCHIVE_COLUMNS)
+        async for rows in result.partitions(ARCHIVE_BATCH_ROWS):
+            await asyncio.to_thread(writer.writerows, rows)
+        await asyncio.to_thread(_finish_archive, fh)
+    except BaseException:
+        await asyncio.to_thread(_discard_archive, fh, tmp_path)
+        raise
+    os.replace(tmp_path, path)
+    return path
+
+
+def _finish_archive(fh) -> None:
+    fh.flush()
+    os.fsync(fh.fileno())
+    fh.close()
+
+
+def _discard_archive(fh, tmp_path: Path) -> None:
+    fh.close()
+    tmp_path.unlink(missing_ok=True)
+
+
+def drop_partition(conn: Connection, name: str) -> None:
+    """حذف نهایی پارتیشن جدا شده (فقط پس از بایگانی موفق)."""
+    conn.execute(text(f"DROP TABLE IF EXISTS {name}"))
+
+
+# ------------------- کار نگه‌داری (Maintenance Job) -------------------
+async def maintain_item_partitions(
+    engine: AsyncEngine,
+    *,
+    months_ahead: int,
+    retention_months: int,
+    archive_dir: str,
+    today: Optional[date] = None,
+    before_drop: Optional[Callable[[AsyncConnection, str], Awaitable[object]]] = None,
+) -> List[str]:
+    """
+    یک دور کامل نگه‌داری پارتیشن‌ها: ساخت پارتیشن‌های آینده و بایگانی/حذف
+    پارتیشن‌های منقضی. هر مرحله تراکنش جداگانه دارد تا در صورت خطا، اجرای
+    بعدی از همان نقطه ادامه دهد؛ خطای ساخت پارتیشن‌ها ثبت می‌شود و جلوی
+    بایگانی و حذف پارتیشن‌های منقضی را نمی‌گیرد.
+
+    :param before_drop: کار اضافه روی هر پارتیشن بایگانی‌شده، در همان تراکنش Drop
+        (مثلاً حذف بردار آیتم‌های آن از ایندکس برداری)
+
+    :return: نام پارتیشن‌هایی که در این دور بایگانی و حذف شدند.
+    """
+    if engine.dialect.name != "postgresql":
+        return []
+
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(ensure_future_partitions, months_ahead, today)
+            await conn.run_sync(partition_default_rows)
+    except Exception:
+        logger.exception("creating future item partitions failed")
+
+    if retention_months <= 0:
+        return []
+
+    cutoff = add_months((today or date.today()).replace(day=1), -retention_months)
+    async with engine.begin() as conn:
+        expired = [
+            name for name in await conn.run_sync(attached_partitions)
+            if add_months(partition_month(name), 1) <= cutoff
+        ]
+    for name in expired:
+        async with engine.begin() as conn:
+            await conn.run_sync(detach_partition, name)
+
+    dropped: List[str] = []
+    async with engine.connect() as conn:
+        pending = await conn.run_sync(detached_partitions)
+    for name in pending:
+        async with engine.begin() as conn:
+            await archive_partition(conn, name, archive_dir)
+            if before_drop is not None:
+                await before_drop(conn, name)
+            await conn.run_sync(drop_partition, name)
+        dropped.append(name)
+    return dropped
+
+
+async def run_partition_maintenance(engine: AsyncEngine, interval: float) -> None:
+    """
+    حلقه پس‌زمینه‌ای که هر `interval` ثانیه کار نگه‌داری پارتیشن‌ها را اجرا می‌کند.
+    خطای یک دور ثبت می‌شود و دور بعدی از همان نقطه ادامه می‌دهد.
+    """
+    from backend.core.config import settings
+
+    before_drop = None
+    if settings.EMBEDDINGS_ENABLED:
+        # آیتم‌های پارتیشن‌های حذف‌شده از ایندکس برداری هم حذف می‌شوند
+        from backend.core.embeddings import item_vector_index
+        from backend.crud.item_embeddings import forget_partition
+
+        before_drop = functools.partial(
+            forget_partition, index=item_vector_index, batch_size=ARCHIVE_BATCH_ROWS
+        )
+
+    while True:
+        try:
+            await maintain_item_partitions(
+                engine,
+                months_ahead=settings.ITEMS_PARTITION_MONTHS_AHEAD,
+                retention_months=settings.ITEMS_RETENTION_MONTHS,
+                archive_dir=settings.ITEMS_ARCHIVE_DIR,
+                before_drop=before_drop,
+            )
+        except Exception:
+            logger.exception("item partition maintenance failed")
+        await asyncio.sleep(interval)
@@ -0,0 +1,166 @@
+import asyncio
+import bisect
+import logging
+import time
+from typing import Any, Dict, Sequence
+
+from sqlalchemy import event, exc
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+logger = logging.getLogger("backend.pool")
+
+# -----------------------------------------------------------------
+# مرزهای هیستوگرام زمان انتظار برای گرفتن اتصال (به ثانیه)
+# -----------------------------------------------------------------
+CHECKOUT_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class PoolMetrics:
+    """
+    نگه‌داری آمار استخر اتصال: هیستوگرام زمان انتظار Checkout،
+    شمارنده‌های اتصال/قطع اتصال و زمان ایجاد هر اتصال باز (برای محاسبه سن اتصال).
+    """
+
+    def __init__(self, buckets: Sequence[float] = CHECKOUT_WAIT_BUCKETS):
+        self.buckets = tuple(buckets)
+        # یک خانه اضافه برای مقادیر بزرگ‌تر از آخرین مرز (+Inf)
+        self.wait_buckets = [0] * (len(self.buckets) + 1)
+        self.wait_sum = 0.0
+        self.wait_count = 0
+        self.wait_max = 0.0
+        self.checkout_timeouts = 0
+        self.connects = 0
+        self.disconnects = 0
+        self.invalidations = 0
+        self.validations = 0
+        self.validation_failures = 0
+        # id(ConnectionRecord) -> زمان ایجاد اتصال (monotonic)
+        self.connected_at: Dict[int, float] = {}
+
+    def observe_wait(self, seconds: float) -> None:
+        """ثبت یک نمونه زمان انتظار Checkout در هیستوگرام."""
+        self.wait_buckets[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.wait_sum += seconds
+        self.wait_count += 1
+        if seconds > self.wait_max:
+            self.wait_max = seconds
+
+    def snapshot(self, pool: "InstrumentedQueuePool") -> Dict[str, Any]:
+        """
+        وضعیت لحظه‌ای استخر و آمار تجمعی آن را به صورت دیکشنری برمی‌گرداند.
+        """
+        now = time.monotonic()
+        ages = [now - started for started in self.connected_at.values()]
+
+        # هیستوگرام تجمعی (cumulative) به سبک Prometheus
+        cumulative, running = {}, 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.wait_buckets):
+            running += count
+            cumulative["+Inf" if bound == float("inf") else str(bound)] = running
+
+        return {
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(pool.overflow(), 0),
+            "checkout_wait": {
+                "count": self.wait_count,
+                "sum": self.wait_sum,
+                "max": self.wait_max,
+                "buckets": cumulative,
+            },
+            "checkout_timeouts": self.checkout_timeouts,
+            "connection_age": {
+                "count": len(ages),
+                "max": max(ages) if ages else 0.0,
+                "avg": sum(ages) / len(ages) if ages else 0.0,
+            },
+            "connects": self.connects,
+            "disconnects": self.disconnects,
+            "invalidations": self.invalidations,
+            "validations": self.validations,
+            "validation_failures": self.validation_failures,
+        }
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    استخر اتصال ناهمگام SQLAlchemy که زمان انتظار هر Checkout و
+    چرخه عمر اتصال‌ها را در یک شیء PoolMetrics ثبت می‌کند.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+        event.listen(self, "connect", self._on_connect)
+        event.listen(self, "close", self._on_close)
+        event.listen(self, "invalidate", self._on_invalidate)
+
+    def _do_get(self) -> Any:
+        # زمان انتظار شامل صف استخر و ایجاد اتصال جدید (در صورت نیاز) است
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.checkout_timeouts += 1
+            raise
+        finally:
+            self.metrics.observe_wait(time.perf_counter() - start)
+
+    # ------------------- رویدادهای چرخه عمر اتصال -------------------
+    def _on_connect(self, dbapi_connection: Any, connection_record: Any) -> None:
+        self.metrics.connects += 1
+        self.metrics.connected_at[id(connection_record)] = time.monotonic()
+
+    def _on_close(self, dbapi_connection: Any, connection_record: Any) -> None:
+        self.metrics.disconnects += 1
+        self.metrics.connected_at.pop(id(connection_record), None)
+
+    def _on_invalidate(self, dbapi_connection: Any, connection_record: Any, exception: Any) -> None:
+        self.metrics.invalidations += 1
+
+
+# -----------------------------------------------------------------
+# اعتبارسنجی پس‌زمینه اتصال‌های بیکار (جایگزین pre-ping)
+# -----------------------------------------------------------------
+async def validate_idle_connections(engine: AsyncEngine) -> int:
+    """
+    اتصال‌های بیکار استخر را یکی‌یکی با `SELECT 1` بررسی می‌کند.
+
+    QueuePool به صورت پیش‌فرض FIFO است؛ بنابراین N بار گرفتن و برگرداندن
+    پشت‌سرهم اتصال، هر کدام از N اتصال بیکار را دقیقاً یک بار لمس می‌کند.
+    اتصال‌های مرده توسط SQLAlchemy به صورت خودکار Invalidate می‌شوند.
+
+    :return: تعداد اتصال‌هایی که بررسی آن‌ها شکست خورد.
+    """
+    pool = engine.pool
+    metrics = getattr(pool, "metrics", None)
+    failures = 0
+
+    for _ in range(pool.checkedin()):
+        try:
+            async with engine.connect() as conn:
+                await conn.exec_driver_sql("SELECT 1")
+        except exc.DBAPIError:
+            failures += 1
+        if metrics is not None:
+            metrics.validations += 1
+
+    if metrics is not None:
+        metrics.validation_failures += failures
+    return failures
+
+
+async def run_pool_validator(engine: AsyncEngine, interval: float) -> None:
+    """
+    حلقه پس‌زمینه‌ای که هر `interval` ثانیه اتصال‌های بیکار را اعتبارسنجی می‌کند.
+    این حلقه در lifespan برنامه ایجاد و در زمان خاموشی لغو (cancel) می‌شود؛
+    خطای یک دور (مثلاً در دسترس نبودن دیتابیس) ثبت می‌شود و حلقه ادامه می‌یابد.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await validate_idle_connections(engine)
+        except Exception:
+            logger.exception("idle connection validation failed")
@@ -1,7 +1,11 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from backend.core.config import settings
+from backend.db.instrumentation import instrument_engine
+from backend.db.pool import InstrumentedQueuePool
 
 # -----------------------------------------------------------------
 # تعریف موتور اتصال (Engine)
@@ -9,10 +13,33 @@ from backend.core.config import settings
 # با استفاده از رشته اتصال (SQLALCHEMY_DATABASE_URI) که از تنظیمات (settings)
 # خوانده می‌شود، یک موتور اتصال ناهمگام (Async Engine) ایجاد می‌شود.
 # این موتور مسئول ارتباط با دیتابیس (در اینجا PostgreSQL) است.
-engine = create_async_engine(
-    settings.SQLALCHEMY_DATABASE_URI,
-    pool_pre_ping=True  # اطمینان از زنده بودن اتصال قبل از استفاده
-)
+# اندازه و رفتار استخر اتصال از تنظیمات خوانده می‌شود و InstrumentedQueuePool
+# آمار انتظار و سن اتصال‌ها را برای مانیتورینگ جمع‌آوری می‌کند.
+def build_engine() -> AsyncEngine:
+    """
+    ساخت موتور ناهمگام با تنظیمات استخر و کش دستورات خوانده شده از settings.
+    """
+    return create_async_engine(
+        settings.SQLALCHEMY_DATABASE_URI,
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        # اطمینان از زنده بودن اتصال قبل از استفاده؛ در صورت غیرفعال بودن،
+        # اعتبارسنجی پس‌زمینه (backend/db/pool.py) جایگزین آن می‌شود.
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        # کش دستورات کامپایل‌شده SQLAlchemy و کش Prepared Statement درایور asyncpg
+        query_cache_size=settings.DB_COMPILED_CACHE_SIZE,
+        connect_args={
+            "prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE,
+        },
+    )
+
+
+# موتور به صورت تنبل (lazy) ساخته می‌شود: ایمپورت این ماژول هیچ اتصال یا استخری
+# ایجاد نمی‌کند و ساخت موتور در lifespan برنامه (یا اولین فراخوانی get_engine) انجام می‌شود.
+engine: Optional[AsyncEngine] = None
 
 # -----------------------------------------------------------------
 # تعریف سازنده نشست دیتابیس (Sessionmaker)
@@ -20,34 +47,46 @@ engine = create_async_engine(
 # این بخش یک کلاس سازنده برای نشست‌های دیتابیس ایجاد می‌کند.
 # 1. autocommit=False: تضمین می‌کند که تراکنش‌ها به صورت خودکار commit نشوند و نیاز به فراخوانی دستی commit باشد.
 # 2. autoflush=False: تضمین می‌کند که اشیا قبل از فراخوانی query به صورت خودکار به دیتابیس ارسال نشوند.
-# 3. bind=engine: نشست‌ها را به موتور اتصال تعریف شده بالا متصل می‌کند.
+# 3. bind: هنگام ساخت موتور در init_engine تنظیم می‌شود.
 # 4. class_=AsyncSession: نوع نشست را به عنوان نشست ناهمگام (AsyncSession) تعریف می‌کند.
 AsyncSessionLocal = sessionmaker(
     autocommit=False,
     autoflush=False,
-    bind=engine,
     class_=AsyncSession,
 )
 
 
-# -----------------------------------------------------------------
-# تابع کمکی برای تزریق وابستگی (Dependency Injection) در FastAPI
-# -----------------------------------------------------------------
-async def get_db() -> AsyncSession:
+def init_engine() -> AsyncEngine:
     """
-    تابع جنریتور برای دریافت یک نشست دیتابیس ناهمگام (AsyncSession).
-    
-    این تابع برای استفاده به عنوان یک Dependency در FastAPI طراحی شده است.
-    از الگوی Context Manager استفاده می‌کند تا تضمین کند نشست پس از اتمام
-    کار (حتی در صورت بروز خطا) به درستی بسته شود.
+    ساخت موتور (در صورت نبود) و اتصال سازنده نشست به آن.
     """
-    db = AsyncSessionLocal()
-    try:
-        # نشست ایجاد شده را yield می‌کند
-        yield db
-    finally:
-        # پس از اتمام کار، نشست را می‌بندد
-        await db.close()
+    global engine
+    if engine is None:
+        engine = build_engine()
+        # زمان‌سنجی هر دستور SQL برای متریک‌های /metrics
+        instrument_engine(engine)
+        AsyncSessionLocal.configure(bind=engine)
+    return engine
+
+
+def get_engine() -> AsyncEngine:
+    """موتور فعلی؛ در اولین فراخوانی ساخته می‌شود."""
+    return engine if engine is not None else init_engine()
+
+
+async def dispose_engine() -> None:
+    """بستن تمام اتصال‌های استخر هنگام خاموشی برنامه."""
+    global engine
+    if engine is not None:
+        await engine.dispose()
+        engine = None
+
+
+# -----------------------------------------------------------------
+# وابستگی نشست دیتابیس FastAPI در backend/api/deps.py (get_db) است تا همه
+# وابستگی‌های یک درخواست (از جمله احراز هویت) یک نشست و یک اتصال مشترک و
+# statement_timeout مهلت درخواست را داشته باشند.
+# -----------------------------------------------------------------
 
 # -----------------------------------------------------------------
 # نکته مهم:
@@ -0,0 +1,49 @@
+import asyncio
+from typing import Any, Iterable, List
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+# -----------------------------------------------------------------
+# گرم‌کردن استخر اتصال و دستورات پرتکرار در شروع برنامه
+# -----------------------------------------------------------------
+# اولین درخواست‌ها پس از هر استقرار کند هستند، زیرا هم اتصال‌های استخر و هم
+# کامپایل SQLAlchemy و Prepare درایور asyncpg به صورت تنبل (Lazy) انجام می‌شوند.
+# این ماژول این هزینه‌ها را قبل از پذیرش اولین درخواست پرداخت می‌کند.
+
+
+def collect_hot_statements() -> List[Any]:
+    """
+    جمع‌آوری دستورات پرتکرار از نمونه‌های CRUD شناخته شده.
+    """
+    from backend.crud.crud_user import user as crud_user
+    from backend.crud.item import item as crud_item
+
+    statements: List[Any] = []
+    for crud in (crud_user, crud_item):
+        statements.extend(crud.hot_statements())
+    return statements
+
+
+async def warm_up_engine(
+    engine: AsyncEngine, statements: Iterable[Any], connections: int
+) -> int:
+    """
+    `connections` اتصال را همزمان باز می‌کند و هر دستور را یک بار روی هر اتصال اجرا می‌کند.
+
+    اجرای واقعی (و نه فقط compile) لازم است، زیرا کش Prepared Statement درایور
+    asyncpg برای هر اتصال جداگانه است. باز بودن همزمان اتصال‌ها تضمین می‌کند
+    که هر کدام یک اتصال مستقل باشد.
+
+    :return: تعداد اتصال‌های گرم‌شده.
+    """
+    statements = list(statements)
+    # اتصال‌های Overflow پس از برگشت بسته می‌شوند؛ پس گرم‌کردن بیش از pool_size بی‌فایده است.
+    connections = max(0, min(connections, engine.pool.size()))
+
+    async def _prime() -> None:
+        async with engine.connect() as conn:
+            for stmt in statements:
+                await conn.execute(stmt)
+
+    await asyncio.gather(*(_prime() for _ in range(connections)))
+    return connections
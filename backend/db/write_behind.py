@@ -0,0 +1,145 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.core.config import settings
+from backend.core.metrics import registry
+from backend.db.session import get_engine
+from backend.models.answer_history import AnswerHistory
+
+logger = logging.getLogger("backend.write_behind")
+
+write_behind_buffered = registry.gauge(
+    "write_behind_buffered_rows", "Rows waiting in a write-behind buffer.", ("table",)
+)
+write_behind_written = registry.counter(
+    "write_behind_written_rows_total", "Rows inserted from a write-behind buffer.", ("table",)
+)
+write_behind_dropped = registry.counter(
+    "write_behind_dropped_rows_total",
+    "Rows dropped by a write-behind buffer, by reason (buffer_full, write_error).",
+    ("table", "reason"),
+)
+
+
+# -----------------------------------------------------------------
+# نوشتن با تأخیر (Write-Behind) برای ردیف‌هایی که پاسخ به آن‌ها وابسته نیست
+# -----------------------------------------------------------------
+class WriteBehindBuffer:
+    """
+    بافر محدود درون‌حافظه‌ای که ردیف‌ها را بدون انتظار می‌پذیرد و یک Task پس‌زمینه
+    آن‌ها را با رسیدن به `batch_size` یا هر `flush_interval` ثانیه با یک INSERT
+    چندردیفی درج می‌کند.
+
+    برخلاف WriteCoalescer، فراخواننده منتظر commit نمی‌ماند: با پر بودن بافر
+    ردیف دور ریخته و شمرده می‌شود (درخواست هرگز مسدود نمی‌شود)، و یک دسته ناموفق
+    هم پس از لاگ دور ریخته می‌شود تا خطای دیتابیس بافر را پر نکند.
+    """
+
+    def __init__(
+        self,
+        session_maker: Callable[[], AsyncSession],
+        model: type,
+        *,
+        max_size: int,
+        batch_size: int,
+        flush_interval: float,
+    ):
+        self.session_maker = session_maker
+        self.model = model
+        self.table = model.__tablename__
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._rows: Deque[Dict[str, Any]] = deque()
+        self._wake = asyncio.Event()
+        # آمار برای مانیتورینگ
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def add(self, **values: Any) -> bool:
+        """افزودن یک ردیف بدون انتظار؛ False اگر بافر پر بوده و ردیف دور ریخته شده باشد."""
+        if len(self._rows) >= self.max_size:
+            self.dropped += 1
+            write_behind_dropped.labels(self.table, "buffer_full").inc()
+            return False
+        self._rows.append(values)
+        if len(self._rows) >= self.batch_size:
+            self._wake.set()
+        return True
+
+    async def flush(self) -> int:
+        """درج همه ردیف‌های فعلی بافر در دسته‌های batch_size تایی؛ تعداد ردیف‌های درج‌شده."""
+        written = 0
+        while self._rows:
+            batch: List[Dict[str, Any]] = [
+                self._rows.popleft() for _ in range(min(self.batch_size, len(self._rows)))
+            ]
+            try:
+                async with self.session_maker() as db:
+                    await db.execute(insert(self.model), batch)
+                    await db.commit()
+            except asyncio.CancelledError:
+                # لغو در میانه درج: دسته به بافر برمی‌گردد تا در flush پایانی درج شود
+                self._rows.extendleft(reversed(batch))
+                raise
+            except Exception:
+                logger.exception("dropping %d %s rows after a failed write", len(batch), self.table)
+                self.failed += len(batch)
+                write_behind_dropped.labels(self.table, "write_error").inc(len(batch))
+                continue
+            written += len(batch)
+            self.written += len(batch)
+            write_behind_written.labels(self.table).inc(len(batch))
+        return written
+
+    async def run(self) -> None:
+        """
+        حلقه پس‌زمینه (در lifespan)؛ با لغو Task در خاموشی آرام، پیش از خروج
+        همه ردیف‌های باقی‌مانده بافر درج می‌شوند.
+        """
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+                await self.flush()
+        finally:
+            if self._rows:
+                logger.info("flushing %d buffered %s rows on shutdown", len(self._rows), self.table)
+                await self.flush()
+
+    def collect(self) -> None:
+        write_behind_buffered.labels(self.table).set(len(self._rows))
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "buffered": len(self._rows),
+            "max_size": self.max_size,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+
+def _write_behind_session() -> AsyncSession:
+    """نشست مستقل برای درج دسته‌ها، روی موتور تنبل برنامه."""
+    return AsyncSession(bind=get_engine(), expire_on_commit=False)
+
+
+# سابقه فراخوانی‌های /answer
+answer_history_buffer = WriteBehindBuffer(
+    _write_behind_session,
+    AnswerHistory,
+    max_size=settings.ANSWER_HISTORY_BUFFER_SIZE,
+    batch_size=settings.ANSWER_HISTORY_BATCH_SIZE,
+    flush_interval=settings.ANSWER_HISTORY_FLUSH_INTERVAL,
+)
+registry.add_collector(answer_history_buffer.collect)
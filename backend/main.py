@@ -1,18 +1,250 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
 from datetime import datetime
 
-# ایجاد یک نمونه از برنامه FastAPI
-# عنوان و توضیحات برای مستندات Swagger/Redoc استفاده می‌شود.
-app = FastAPI(
-    title="VIRA-AI Modular Backend",
-    description="سرویس‌های ماژولار هوش مصنوعی و مدیریت داده.",
-    version="1.0.0"
-)
+from fastapi import FastAPI
+
+from backend.core.config import settings
+
+# ----------------------------------------------------------------------
+# چرخه عمر برنامه (Lifespan): راه‌اندازی و خاموشی منابع
+# ----------------------------------------------------------------------
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    منابع پس‌زمینه را هنگام شروع برنامه راه‌اندازی و هنگام خاموشی آزاد می‌کند.
+    موتور دیتابیس و استخرها فقط در این مرحله ساخته می‌شوند، نه هنگام ایمپورت.
+    """
+    from backend.api.metrics import run_metrics_flusher
+    from backend.api.profiling import profiler, run_profile_flusher
+    from backend.core import auth_cache
+    from backend.core.embeddings import item_embedder, item_embedding_queue, item_vector_index
+    from backend.core.memory import memory_profiler, memory_watchdog, run_memory_watchdog
+    from backend.core.routing import upstream_router
+    from backend.core.security import password_hasher
+    from backend.core.usage import usage_meter
+    from backend.crud.api_token import run_token_sweeper
+    from backend.crud.item_embeddings import run_embedding_indexer
+    from backend.crud.item_stats import run_item_stats_repair
+    from backend.crud.usage import run_usage_flusher
+    from backend.db.partitions import run_partition_maintenance
+    from backend.db.pool import run_pool_validator
+    from backend.db.session import AsyncSessionLocal, dispose_engine, init_engine
+    from backend.db.warmup import collect_hot_statements, warm_up_engine
+    from backend.db.write_behind import answer_history_buffer
+
+    engine = init_engine()
+    background_tasks = []
+
+    # باز کردن حداقل اتصال‌های استخر و آماده‌سازی دستورات پرتکرار قبل از اولین درخواست
+    if settings.DB_WARMUP_ENABLED:
+        await warm_up_engine(
+            engine, collect_hot_statements(), settings.DB_POOL_MIN_CONNECTIONS
+        )
+
+    # اگر pre-ping خاموش باشد، اتصال‌های بیکار به صورت دوره‌ای در پس‌زمینه بررسی می‌شوند.
+    if not settings.DB_POOL_PRE_PING and settings.DB_POOL_VALIDATION_INTERVAL > 0:
+        background_tasks.append(
+            asyncio.create_task(
+                run_pool_validator(engine, settings.DB_POOL_VALIDATION_INTERVAL)
+            )
+        )
+
+    # ساخت پارتیشن‌های آینده و بایگانی/حذف پارتیشن‌های قدیمی جدول items (فقط PostgreSQL)
+    if engine.dialect.name == "postgresql" and settings.ITEMS_PARTITION_MAINTENANCE_INTERVAL > 0:
+        background_tasks.append(
+            asyncio.create_task(
+                run_partition_maintenance(engine, settings.ITEMS_PARTITION_MAINTENANCE_INTERVAL)
+            )
+        )
+
+    # ترمیم دوره‌ای شمارنده‌های آیتم هر مالک
+    if settings.ITEM_STATS_REPAIR_INTERVAL > 0:
+        background_tasks.append(
+            asyncio.create_task(
+                run_item_stats_repair(AsyncSessionLocal, settings.ITEM_STATS_REPAIR_INTERVAL)
+            )
+        )
+
+    # حذف دسته‌ای توکن‌های API منقضی
+    if settings.API_TOKEN_SWEEP_INTERVAL > 0:
+        background_tasks.append(
+            asyncio.create_task(
+                run_token_sweeper(
+                    AsyncSessionLocal,
+                    settings.API_TOKEN_SWEEP_INTERVAL,
+                    settings.API_TOKEN_SWEEP_BATCH_SIZE,
+                )
+            )
+        )
+
+    # نوشتن دوره‌ای متریک‌های این Worker برای جمع‌زدن در /metrics (اجرای چندپردازه‌ای)
+    if settings.METRICS_ENABLED and settings.METRICS_MULTIPROC_DIR:
+        background_tasks.append(
+            asyncio.create_task(
+                run_metrics_flusher(settings.METRICS_MULTIPROC_DIR, settings.METRICS_FLUSH_INTERVAL)
+            )
+        )
+
+    # نوشتن دوره‌ای پروفایل این Worker برای ادغام در مسیر مدیریتی
+    if settings.PROFILING_ENABLED and settings.PROFILING_DIR:
+        background_tasks.append(
+            asyncio.create_task(
+                run_profile_flusher(settings.PROFILING_DIR, profiler, settings.PROFILING_FLUSH_INTERVAL)
+            )
+        )
+
+    # درج دسته‌ای سابقه پاسخ‌های /answer؛ با لغو Task در خاموشی، بافر تخلیه می‌شود
+    if settings.ANSWER_HISTORY_ENABLED:
+        background_tasks.append(asyncio.create_task(answer_history_buffer.run()))
+
+    # نوشتن دوره‌ای شمارنده‌های مصرف و فشرده‌سازی جداول مصرف؛ با لغو Task، شمارنده‌ها نوشته می‌شوند
+    if settings.USAGE_METERING_ENABLED:
+        background_tasks.append(
+            asyncio.create_task(
+                run_usage_flusher(
+                    AsyncSessionLocal,
+                    usage_meter,
+                    settings.USAGE_FLUSH_INTERVAL,
+                    settings.USAGE_COMPACTION_INTERVAL,
+                    settings.USAGE_HOURLY_RETENTION_DAYS,
+                )
+            )
+        )
+
+    # محاسبه دسته‌ای بردار آیتم‌های ایجاد/به‌روزشده برای جستجوی معنایی؛ با لغو Task، صف تخلیه می‌شود
+    if settings.EMBEDDINGS_ENABLED:
+        background_tasks.append(
+            asyncio.create_task(
+                run_embedding_indexer(
+                    AsyncSessionLocal,
+                    item_embedding_queue,
+                    item_vector_index,
+                    item_embedder,
+                    flush_interval=settings.EMBEDDINGS_FLUSH_INTERVAL,
+                    backfill=settings.EMBEDDINGS_BACKFILL,
+                )
+            )
+        )
+
+    # نگهبان حافظه: کوچک کردن کش‌ها و رد درخواست‌های سنگین با نزدیک شدن به محدودیت cgroup
+    if settings.MEMORY_WATCHDOG_ENABLED:
+        memory_watchdog.register_cache("tokens", auth_cache.token_cache.shrink)
+        memory_watchdog.register_cache("principals", auth_cache.principal_cache.shrink)
+        memory_watchdog.register_cache("api_tokens", auth_cache.api_token_cache.shrink)
+        memory_watchdog.register_cache("api_tokens_negative", auth_cache.invalid_token_cache.shrink)
+        if settings.MEMORY_TRACEMALLOC_ENABLED:
+            memory_profiler.start()
+        background_tasks.append(
+            asyncio.create_task(
+                run_memory_watchdog(settings.MEMORY_WATCHDOG_INTERVAL, settings.MEMORY_TRACEMALLOC_INTERVAL)
+            )
+        )
+
+    yield
+
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    password_hasher.shutdown()
+    profiler.stop()
+    memory_profiler.stop()
+    await upstream_router.aclose()
+    await dispose_engine()
+
+
+# ----------------------------------------------------------------------
+# سازنده برنامه (App Factory)
+# ----------------------------------------------------------------------
+def create_app() -> FastAPI:
+    """
+    ساخت برنامه FastAPI با میان‌افزارها و روترها.
+
+    ایمپورت روترها (و به تبع آن CRUD و مدل‌ها) در همین تابع انجام می‌شود و منابع
+    سنگین (موتور دیتابیس، استخرها و کارهای پس‌زمینه) در lifespan ساخته می‌شوند؛
+    بنابراین ایمپورت backend.main تقریباً هزینه‌ای ندارد. اجرا با:
+        uvicorn --factory backend.main:create_app
+    """
+    from backend.api import answer, metrics
+    from backend.api.api_v1.api import api_router
+    from backend.api.compression import CompressionMiddleware
+    from backend.api.deadline import DeadlineMiddleware
+    from backend.api.profiling import ProfilingMiddleware
+    from backend.api.sql_audit import StatementAuditMiddleware
+    from backend.api.rate_limit import RateLimitMiddleware, build_store
+    from backend.api.usage import UsageMiddleware
+
+    # عنوان و توضیحات برای مستندات Swagger/Redoc استفاده می‌شود.
+    app = FastAPI(
+        title="VIRA-AI Modular Backend",
+        description="سرویس‌های ماژولار هوش مصنوعی و مدیریت داده.",
+        version="1.0.0",
+        lifespan=lifespan,
+    )
+
+    # فشرده‌سازی پاسخ‌ها با مذاکره روی Accept-Encoding (zstd / br / gzip)
+    if settings.COMPRESSION_ENABLED:
+        app.add_middleware(
+            CompressionMiddleware,
+            min_size=settings.COMPRESSION_MIN_SIZE,
+            levels={
+                "gzip": settings.COMPRESSION_GZIP_LEVEL,
+                "br": settings.COMPRESSION_BROTLI_LEVEL,
+                "zstd": settings.COMPRESSION_ZSTD_LEVEL,
+            },
+        )
+
+    # شمارش دستورات SQL هر درخواست برای تشخیص الگوی N+1
+    if settings.SQL_N_PLUS_ONE_THRESHOLD > 0:
+        app.add_middleware(StatementAuditMiddleware, threshold=settings.SQL_N_PLUS_ONE_THRESHOLD)
+
+    # پروفایل نمونه‌بردار درخواست‌های کند (اختیاری)
+    if settings.PROFILING_ENABLED:
+        app.add_middleware(ProfilingMiddleware)
+
+    # مهلت درخواست و لغو کار با قطع اتصال؛ بیرون از پروفایلر تا پروفایلر Task اجرای درخواست را ببیند
+    if settings.REQUEST_DEADLINE_ENABLED:
+        app.add_middleware(
+            DeadlineMiddleware,
+            default=settings.REQUEST_TIMEOUT_DEFAULT,
+            max_timeout=settings.REQUEST_TIMEOUT_MAX,
+            routes=settings.REQUEST_TIMEOUT_ROUTES,
+            header=settings.REQUEST_TIMEOUT_HEADER,
+        )
+
+    # شمارش مصرف هر کاربر؛ بیرون از میان‌افزار مهلت تا درخواست‌های لغوشده هم شمرده شوند
+    if settings.USAGE_METERING_ENABLED:
+        app.add_middleware(UsageMiddleware)
+
+    # محدودسازی نرخ درخواست‌ها؛ آخرین میان‌افزار اضافه‌شده بیرونی‌ترین است. درست
+    # داخل میان‌افزار متریک‌ها قرار می‌گیرد تا درخواست‌های رد شده بدون مهلت، پروفایلر،
+    # بررسی SQL و شمارش مصرف پاسخ 429 بگیرند و فقط در متریک‌های HTTP ثبت شوند.
+    if settings.RATE_LIMIT_ENABLED:
+        app.add_middleware(
+            RateLimitMiddleware,
+            rules=settings.RATE_LIMIT_RULES,
+            store=build_store(
+                settings.RATE_LIMIT_STORE_URL, settings.RATE_LIMIT_SHARDS, settings.RATE_LIMIT_MAX_KEYS
+            ),
+            trust_forwarded=settings.RATE_LIMIT_TRUST_FORWARDED,
+        )
+
+    # متریک‌های HTTP؛ بیرونی‌ترین میان‌افزار تا پاسخ‌های 429 و زمان سایر میان‌افزارها هم ثبت شوند
+    if settings.METRICS_ENABLED:
+        app.add_middleware(metrics.MetricsMiddleware)
+        app.include_router(metrics.router, tags=["سیستم"])
+
+    # اتصال روترهای نسخه 1 API
+    app.include_router(api_router, prefix=settings.API_V1_STR)
+    # درگاه مدل‌های هوش مصنوعی
+    app.include_router(answer.router, tags=["answer"])
+    app.add_api_route("/", root, tags=["سیستم"], summary="بررسی سلامت برنامه")
+    return app
+
 
 # ----------------------------------------------------------------------
 # 1. مسیر اصلی / Health Check
 # ----------------------------------------------------------------------
-@app.get("/", tags=["سیستم"], summary="بررسی سلامت برنامه")
 async def root():
     """
     بررسی می‌کند که آیا سرویس در حال اجرا است یا خیر.
@@ -24,6 +256,18 @@ async def root():
         "timestamp": datetime.now().isoformat()
     }
 
+
+def __getattr__(name: str):
+    """
+    سازگاری با `uvicorn backend.main:app` و `from backend.main import app`:
+    نمونه برنامه فقط در اولین دسترسی ساخته می‌شود.
+    """
+    if name == "app":
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 # ----------------------------------------------------------------------
 # 2. ماژول‌های آینده‌ی هوش مصنوعی (Future AI Modules)
 # ----------------------------------------------------------------------
@@ -0,0 +1,37 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Integer, String, Text
+
+from backend.core.database import Base
+
+
+class AnswerHistory(Base):
+    """
+    مدل SQLAlchemy برای جدول 'answer_history'.
+    سابقه هر فراخوانی /answer (سؤال، پاسخ، مدل و نتیجه) برای تحلیل؛ ردیف‌ها با
+    تأخیر و به صورت دسته‌ای از بافر درون‌حافظه‌ای (backend/db/write_behind.py) درج می‌شوند.
+    """
+    __tablename__ = "answer_history"
+
+    # BIGINT در PostgreSQL؛ در SQLite فقط INTEGER PRIMARY KEY خودافزاینده است
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+
+    # کاربر درخواست‌دهنده (در صورت احراز هویت)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True)
+
+    # ارائه‌دهنده و مدل پاسخ‌دهنده
+    provider = Column(String(64), nullable=False)
+    model = Column(String(256), nullable=False)
+
+    prompt = Column(Text, nullable=False)
+    # پاسخ مدل؛ برای فراخوانی‌های ناموفق خالی است
+    answer = Column(Text, nullable=True)
+    # ok، cancelled یا دسته خطای مدل بالادستی (timeout، http_503، ...)
+    status = Column(String(32), nullable=False)
+    latency_ms = Column(Integer, nullable=False)
+
+    # زمان خود درخواست (نه زمان درج دسته)
+    created_at = Column(DateTime, default=datetime.now, nullable=False, index=True)
+
+    def __repr__(self) -> str:
+        return f"<AnswerHistory id={self.id}, provider={self.provider}, status={self.status}>"
@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import TYPE_CHECKING
 
-from sqlalchemy import Column, ForeignKey, Integer, String, Text, DateTime
+from sqlalchemy import DDL, Column, ForeignKey, Integer, String, Text, DateTime, event
 from sqlalchemy.orm import relationship
 
 from backend.core.database import Base
@@ -27,15 +27,81 @@ class Item(Base):
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     
     # زمان‌بندی
-    created_at = Column(DateTime, default=datetime.now)
+    # created_at کلید پارتیشن‌بندی جدول در PostgreSQL است (backend/db/partitions.py)
+    created_at = Column(DateTime, default=datetime.now, nullable=False)
     updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
 
     # تعریف رابطه (Relationship)
     # تعریف مالک آیتم (یک به یک با مدل User)
-    owner: "User" = relationship("User", back_populates="items")
+    owner = relationship("User", back_populates="items")
 
     def __repr__(self) -> str:
         """
         نمایش آبجکت در کنسول
         """
         return f"<Item id={self.id}, title={self.title}, owner_id={self.owner_id}>"
+
+
+# ----------------------------------------------------------------------
+# زیرساخت جستجوی متنی (Full-Text Search)
+# ----------------------------------------------------------------------
+# ستون tsvector به صورت Generated فقط در PostgreSQL وجود دارد و به همین دلیل
+# در مدل ORM تعریف نشده است؛ کوئری‌های جستجو مستقیماً به آن اشاره می‌کنند.
+# پیکربندی 'simple' بدون ریشه‌یابی است و برای متن‌های فارسی و انگلیسی مناسب است.
+SEARCH_TEXT_CONFIG = "simple"
+
+POSTGRES_SEARCH_DDL = [
+    DDL(
+        "ALTER TABLE items ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        "GENERATED ALWAYS AS ("
+        f"setweight(to_tsvector('{SEARCH_TEXT_CONFIG}', coalesce(title, '')), 'A') || "
+        f"setweight(to_tsvector('{SEARCH_TEXT_CONFIG}', coalesce(description, '')), 'B')"
+        ") STORED"
+    ),
+    DDL("CREATE INDEX IF NOT EXISTS ix_items_search_vector ON items USING gin (search_vector)"),
+]
+
+# جایگزین SQLite برای تست محلی: جدول مجازی FTS5 با محتوای خارجی (items)
+# که با Triggerها همگام نگه داشته می‌شود.
+SQLITE_SEARCH_DDL = [
+    DDL(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5("
+        "title, description, content='items', content_rowid='id')"
+    ),
+    DDL(
+        "CREATE TRIGGER IF NOT EXISTS items_fts_ai AFTER INSERT ON items BEGIN "
+        "INSERT INTO items_fts(rowid, title, description) "
+        "VALUES (new.id, new.title, new.description); END"
+    ),
+    DDL(
+        "CREATE TRIGGER IF NOT EXISTS items_fts_ad AFTER DELETE ON items BEGIN "
+        "INSERT INTO items_fts(items_fts, rowid, title, description) "
+        "VALUES ('delete', old.id, old.title, old.description); END"
+    ),
+    DDL(
+        "CREATE TRIGGER IF NOT EXISTS items_fts_au AFTER UPDATE OF title, description ON items BEGIN "
+        "INSERT INTO items_fts(items_fts, rowid, title, description) "
+        "VALUES ('delete', old.id, old.title, old.description); "
+        "INSERT INTO items_fts(rowid, title, description) "
+        "VALUES (new.id, new.title, new.description); END"
+    ),
+]
+
+
+def _partition_items_table(target, connection, **kw) -> None:
+    """
+    تبدیل جدول items به جدول پارتیشن‌بندی‌شده بر اساس created_at در PostgreSQL.
+    باید قبل از DDL جستجو اجرا شود تا ستون و ایندکس GIN روی جدول والد ساخته شوند.
+    """
+    if connection.dialect.name == "postgresql":
+        from backend.core.config import settings
+        from backend.db.partitions import partition_items_table
+
+        partition_items_table(connection, settings.ITEMS_PARTITION_MONTHS_AHEAD)
+
+
+event.listen(Item.__table__, "after_create", _partition_items_table)
+for _ddl in POSTGRES_SEARCH_DDL:
+    event.listen(Item.__table__, "after_create", _ddl.execute_if(dialect="postgresql"))
+for _ddl in SQLITE_SEARCH_DDL:
+    event.listen(Item.__table__, "after_create", _ddl.execute_if(dialect="sqlite"))
@@ -0,0 +1,26 @@
+from datetime import datetime
+
+from sqlalchemy import Column, ForeignKey, Integer, DateTime
+
+from backend.core.database import Base
+
+
+class OwnerItemStats(Base):
+    """
+    مدل SQLAlchemy برای جدول 'owner_item_stats'.
+    شمارنده‌های تجمعی آیتم‌های هر مالک که همراه با ایجاد/حذف آیتم در همان تراکنش
+    به‌روز می‌شوند تا خواندن آمار بدون شمارش جدول items و با هزینه O(1) انجام شود.
+    """
+    __tablename__ = "owner_item_stats"
+
+    # شناسه مالک، کلید اصلی (هر مالک دقیقاً یک ردیف دارد)
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+
+    # تعداد آیتم‌های فعلی مالک
+    item_count = Column(Integer, nullable=False, default=0)
+
+    # زمان آخرین تغییر شمارنده
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<OwnerItemStats owner_id={self.owner_id}, item_count={self.item_count}>"
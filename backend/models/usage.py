@@ -0,0 +1,51 @@
+from sqlalchemy import BigInteger, Column, DateTime, Integer, String
+
+from backend.core.database import Base
+
+
+class UsageColumns:
+    """
+    ستون‌های مشترک جداول مصرف: شمارنده‌های هر (کاربر، مدل، بازه زمانی).
+    بازه‌ها با شروعشان به وقت UTC مشخص می‌شوند. user_id عمداً کلید خارجی
+    نیست تا سابقه صورت‌حساب با حذف کاربر از بین نرود.
+    """
+
+    user_id = Column(Integer, primary_key=True)
+    # نام مدل برای /answer یا «متد الگوی‌مسیر» برای روترهای API
+    model = Column(String(256), primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True, index=True)
+
+    requests = Column(BigInteger, nullable=False, default=0)
+    # پاسخ‌های 5xx و خطاهای مدل بالادستی
+    errors = Column(BigInteger, nullable=False, default=0)
+    # طول سؤال و پاسخ تولیدشده (نویسه)
+    prompt_chars = Column(BigInteger, nullable=False, default=0)
+    completion_chars = Column(BigInteger, nullable=False, default=0)
+    # مجموع زمان پاسخ درخواست‌ها و زمان انتظار برای مدل بالادستی (میلی‌ثانیه)
+    latency_ms = Column(BigInteger, nullable=False, default=0)
+    upstream_ms = Column(BigInteger, nullable=False, default=0)
+
+
+class UsageMinute(UsageColumns, Base):
+    """
+    مدل SQLAlchemy برای جدول 'usage_minute'.
+    شمارنده‌های دقیقه‌ای که Workerها به صورت دوره‌ای با UPSERT افزایشی می‌نویسند؛
+    ساعت‌های کامل‌شده به usage_hour منتقل می‌شوند.
+    """
+    __tablename__ = "usage_minute"
+
+
+class UsageHour(UsageColumns, Base):
+    """
+    مدل SQLAlchemy برای جدول 'usage_hour'.
+    تجمیع ساعتی؛ روزهای قدیمی‌تر از USAGE_HOURLY_RETENTION_DAYS به usage_day منتقل می‌شوند.
+    """
+    __tablename__ = "usage_hour"
+
+
+class UsageDay(UsageColumns, Base):
+    """
+    مدل SQLAlchemy برای جدول 'usage_day'.
+    تجمیع روزانه (نگه‌داری دائمی).
+    """
+    __tablename__ = "usage_day"
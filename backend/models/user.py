@@ -1,45 +1,42 @@
-from typing import AsyncGenerator, Annotated
+from datetime import datetime
 
-from fastapi import Depends
-from sqlalchemy.ext.asyncio import AsyncSession
-# از OAuth2PasswordBearer برای ساخت طرح احراز هویت مبتنی بر توکن استفاده می‌کنیم
-from fastapi.security import OAuth2PasswordBearer 
+from sqlalchemy import Boolean, Column, DateTime, Integer, String
+from sqlalchemy.orm import relationship
 
-# سشن دیتابیس را از ماژول database وارد می‌کنیم
-from backend.core.database import get_async_session 
+from backend.core.database import Base
 
-# طرح احراز هویت OAuth2
-# این طرح مشخص می‌کند که توکن از طریق هدر Authorization (Bearer Token) ارسال می‌شود.
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/login/access-token")
 
-# ------------------- وابستگی: دریافت سشن دیتابیس -------------------
-
-async def get_db() -> AsyncGenerator[AsyncSession, None]:
-    """
-    تابع تزریق وابستگی (Dependency) برای ارائه یک سشن دیتابیس غیرهمزمان (AsyncSession)
-    به Endopintهای FastAPI.
-    """
-    async for session in get_async_session():
-        # سشن را در اختیار endpoint قرار می‌دهد
-        yield session
-
-# تعریف یک نوع (Type) کوتاه‌تر برای استفاده در روترها
-# Annotated[AsyncSession, Depends(get_db)]
-AsyncDB = Annotated[AsyncSession, Depends(get_db)]
-
-
-# ------------------- وابستگی: دریافت کاربر فعلی (در آینده) -------------------
-# توجه: منطق احراز هویت در حال حاضر پیاده‌سازی نشده است.
-# این توابع فقط برای ساختار آینده پروژه نگه داشته شده‌اند.
-
-async def get_current_user_placeholder(
-    token: Annotated[str, Depends(oauth2_scheme)],
-    db: AsyncDB,
-):
+class User(Base):
     """
-    وابستگی موقت برای احراز هویت.
-    در آینده، منطق دیکد کردن JWT و واکشی کاربر از دیتابیس اینجا قرار می‌گیرد.
+    مدل SQLAlchemy برای جدول 'users' در دیتابیس.
+    آیتم‌ها (items) و توکن‌های API (api_tokens) با کلید خارجی به این جدول اشاره می‌کنند.
     """
-    # در حال حاضر فقط توکن را دریافت می‌کنیم
-    # منطق واقعی در فایل‌های security و CRUD قرار خواهد گرفت.
-    return {"token_received": token}
+    __tablename__ = "users"
+
+    # ستون‌های اصلی
+    id = Column(Integer, primary_key=True, index=True)
+    # ایمیل کاربر - منحصر به فرد و به عنوان نام کاربری استفاده می‌شود
+    email = Column(String(255), unique=True, index=True, nullable=False)
+    # پسورد هش شده (bcrypt)
+    hashed_password = Column(String(255), nullable=False)
+    full_name = Column(String(255), nullable=True)
+
+    # پرچم‌های وضعیت
+    is_active = Column(Boolean, default=True, nullable=False)
+    is_superuser = Column(Boolean, default=False, nullable=False)
+
+    # زمان‌بندی؛ updated_at در محاسبه ETag کاربر استفاده می‌شود
+    created_at = Column(DateTime, default=datetime.now, nullable=False)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now, nullable=False)
+
+    # تعریف روابط (Relationships)
+    items = relationship("Item", back_populates="owner")
+    tokens = relationship(
+        "APIToken", back_populates="user", cascade="all, delete-orphan"
+    )
+
+    def __repr__(self) -> str:
+        """
+        نمایش آبجکت در کنسول
+        """
+        return f"<User id={self.id}, email={self.email}>"
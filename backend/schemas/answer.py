@@ -0,0 +1,19 @@
+from pydantic import BaseModel, Field
+
+# ----------------------------------------------------------------------
+# شمای درخواست و پاسخ مسیر /answer (تولید متن با مدل هوش مصنوعی)
+# ----------------------------------------------------------------------
+
+
+class AnswerQuery(BaseModel):
+    """
+    سؤال (ورودی prompt) برای مدل تولید متن.
+    """
+    question: str = Field(..., min_length=1, max_length=4000)
+
+
+class AnswerResponse(BaseModel):
+    """
+    متن تولیدشده توسط مدل.
+    """
+    answer: str
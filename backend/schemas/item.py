@@ -0,0 +1,69 @@
+from typing import Optional, List
+from pydantic import BaseModel, Field
+from datetime import datetime
+
+# ----------------- Base Schemas -----------------
+
+class ItemBase(BaseModel):
+    """
+    ویژگی‌های مشترک آیتم برای خواندن و نوشتن (عنوان و توضیحات)
+    """
+    title: str = Field(..., max_length=256, example="My first item")
+    description: Optional[str] = Field(None, example="A longer description")
+
+
+class ItemCreate(ItemBase):
+    """
+    مدل برای ایجاد یک آیتم جدید (نیاز به شناسه مالک).
+    """
+    owner_id: int
+
+
+class ItemUpdate(ItemBase):
+    """
+    مدل برای به‌روزرسانی اختیاری اطلاعات آیتم.
+    """
+    title: Optional[str] = Field(None, max_length=256)
+    description: Optional[str] = None
+
+
+# ----------------- Response Schemas -----------------
+
+class ItemInDB(ItemBase):
+    """
+    مدل نمایش داده‌های آیتم به مشتری (شامل ID، مالک و زمان‌ها).
+    """
+    id: int
+    owner_id: int
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+# ----------------- Search Schemas -----------------
+
+class ItemSearchHit(ItemInDB):
+    """
+    یک نتیجه جستجوی متنی: آیتم به همراه امتیاز رتبه‌بندی و متن‌های هایلایت‌شده.
+    """
+    rank: float
+    title_highlight: str
+    description_highlight: Optional[str] = None
+
+
+class ItemSearchPage(BaseModel):
+    """
+    یک صفحه از نتایج جستجو با صفحه‌بندی Keyset.
+    next_cursor را برای دریافت صفحه بعد به پارامتر cursor بدهید (None یعنی صفحه آخر).
+    """
+    items: List[ItemSearchHit]
+    next_cursor: Optional[str] = None
+
+
+class ItemSemanticHit(ItemInDB):
+    """
+    یک نتیجه جستجوی معنایی: آیتم به همراه شباهت کسینوسی بردار آن با عبارت جستجو.
+    """
+    score: float
@@ -0,0 +1,34 @@
+from datetime import datetime
+from typing import List
+
+from pydantic import BaseModel
+
+# ----------------------------------------------------------------------
+# شمای گزارش مصرف کاربر (/users/{id}/usage)
+# ----------------------------------------------------------------------
+
+
+class UsageBucket(BaseModel):
+    """
+    مصرف یک مدل (یا مسیر API) در یک بازه زمانی (شروع بازه به وقت UTC).
+    """
+    bucket_start: datetime
+    model: str
+    requests: int = 0
+    errors: int = 0
+    prompt_chars: int = 0
+    completion_chars: int = 0
+    latency_ms: int = 0
+    upstream_ms: int = 0
+
+
+class UsageReport(BaseModel):
+    """
+    گزارش مصرف کاربر در بازه [start, end)؛ مصرف Workerها با تأخیر حداکثر
+    USAGE_FLUSH_INTERVAL ثانیه در آن دیده می‌شود.
+    """
+    user_id: int
+    granularity: str
+    start: datetime
+    end: datetime
+    buckets: List[UsageBucket]
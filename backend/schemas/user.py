@@ -59,3 +59,28 @@ class User(UserBase):
         اجازه می‌دهد که مدل Pydantic از ORM (SQLAlchemy) Object Mapping بسازد.
         """
         from_attributes = True
+
+
+class UserInDB(UserBase):
+    """
+    مدل پاسخ Endpointهای کاربران: مانند User اما بدون لیست آیتم‌ها، تا پاسخ
+    به بارگذاری رابطه items (که در AsyncSession به صورت Lazy ممکن نیست) نیاز نداشته باشد.
+    """
+    id: int
+    is_active: bool
+    is_superuser: bool
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+# ----------------- Stats Schemas -----------------
+
+class UserStats(BaseModel):
+    """
+    آمار تجمعی آیتم‌های یک کاربر (از جدول شمارنده‌ها، بدون شمارش آیتم‌ها).
+    """
+    user_id: int
+    item_count: int = 0
+    last_updated: Optional[datetime] = None
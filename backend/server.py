@@ -0,0 +1,364 @@
+# اجراکننده چندپردازه‌ای تولیدی (Production Runner) برای backend.
+#
+#     python -m backend.server                     # تعداد Worker از سهمیه cgroup
+#     python -m backend.server --workers 4 --port 8000
+#
+# - تعداد Workerها از محدودیت CPU و حافظه cgroup v2 (با پشتیبانی v1) محاسبه می‌شود.
+# - برنامه یک بار در پردازه اصلی ساخته (preload) و سپس fork می‌شود؛ موتور دیتابیس
+#   و سایر منابع در lifespan هر Worker ساخته می‌شوند.
+# - هر Worker سوکت خودش را با SO_REUSEPORT باز می‌کند و هسته اتصال‌ها را بین آن‌ها
+#   پخش می‌کند؛ Worker جایگزین پس از پایان lifespan startup شروع به گوش دادن می‌کند
+#   و اعلام آمادگی می‌کند و تنها پس از آن Worker قدیمی تخلیه می‌شود.
+# - Worker پس از N درخواست یا عبور RSS از حد مجاز بازتولید می‌شود؛ با عبور مصرف
+#   کانتینر از آستانه سخت نگهبان حافظه، پرمصرف‌ترین Worker (یکی در هر زمان) ابتدا
+#   تخلیه و خارج می‌شود و سپس جایگزین آن ساخته می‌شود، تا مصرف حافظه موقتاً بیشتر نشود.
+# - با SIGTERM، همه Workerها درخواست‌های در حال اجرا را تخلیه و سپس خارج می‌شوند.
+
+import argparse
+import logging
+import math
+import multiprocessing
+import os
+import queue
+import random
+import signal
+import socket
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+from backend.core.cgroup import available_cpus, cgroup_cpu_limit, cgroup_memory_limit, current_rss
+
+logger = logging.getLogger("backend.server")
+
+
+# ----------------------------------------------------------------------
+# تعداد Workerها بر اساس محدودیت‌های cgroup
+# ----------------------------------------------------------------------
+def default_workers(worker_memory_mb: int) -> int:
+    """
+    هر Worker ناهمگام یک هسته را اشباع می‌کند: تعداد Worker برابر سقف سهمیه CPU
+    است و اگر محدودیت حافظه وجود داشته باشد، به اندازه‌ای محدود می‌شود که جا شوند.
+    """
+    cpus = min(cgroup_cpu_limit() or available_cpus(), available_cpus())
+    workers = max(1, math.ceil(cpus))
+    memory = cgroup_memory_limit()
+    if memory and worker_memory_mb > 0:
+        workers = min(workers, max(1, memory // (worker_memory_mb * 1024 * 1024)))
+    return workers
+
+
+# ----------------------------------------------------------------------
+# سوکت با SO_REUSEPORT
+# ----------------------------------------------------------------------
+def bind_socket(host: str, port: int, backlog: int) -> socket.socket:
+    """
+    ساخت سوکت مستقل برای هر Worker. با SO_REUSEPORT چند سوکت روی یک پورت
+    گوش می‌دهند و هسته اتصال‌های جدید را بین آن‌ها توزیع می‌کند.
+
+    سوکت اینجا فقط bind می‌شود؛ listen را uvicorn هنگام شروع سرویس‌دهی (پس از
+    lifespan startup) با همین `backlog` انجام می‌دهد، تا هسته پیش از آماده شدن
+    Worker اتصالی به آن نفرستد.
+    """
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.set_inheritable(True)
+    return sock
+
+
+# ----------------------------------------------------------------------
+# Worker
+# ----------------------------------------------------------------------
+MEMORY_PRESSURE = "memory_pressure"
+# فاصله تکرار گزارش فشار حافظه از هر Worker (ثانیه)
+MEMORY_PRESSURE_REPORT_INTERVAL = 10.0
+
+
+def _make_server_class():
+    import uvicorn
+
+    from backend.core.memory import LEVEL_HARD, memory_watchdog
+
+    class RecyclingServer(uvicorn.Server):
+        """
+        سرور uvicorn که به جای خروج فوری با رسیدن به سقف درخواست/RSS، از پردازه
+        اصلی جایگزین می‌خواهد و تا دریافت SIGTERM (پس از آماده شدن جایگزین) به
+        خدمت‌دهی ادامه می‌دهد.
+        """
+
+        def __init__(self, config, *, slot: int, events, max_requests: int, max_rss: int):
+            super().__init__(config)
+            self.slot = slot
+            self.events = events
+            self.max_requests = max_requests
+            self.max_rss = max_rss
+            self.recycle_requested_at: Optional[float] = None
+            self.memory_pressure_reported_at = 0.0
+
+        async def startup(self, sockets=None) -> None:
+            # lifespan startup (اتصال دیتابیس، Taskهای پس‌زمینه) و سپس listen؛
+            # فقط پس از آن پردازه اصلی می‌تواند Worker قدیمی را تخلیه کند
+            await super().startup(sockets=sockets)
+            if not self.should_exit:
+                self.events.put(("ready", self.slot, os.getpid(), None))
+
+        async def on_tick(self, counter: int) -> bool:
+            if await super().on_tick(counter):
+                return True
+            # هر ثانیه (10 تیک) یک بار
+            if counter % 10:
+                return False
+            if self.recycle_requested_at is not None:
+                # اگر پردازه اصلی پاسخ نداد، پس از مهلت خودمان خارج می‌شویم
+                return time.monotonic() - self.recycle_requested_at > 30
+            reason = None
+            if self.max_requests and self.server_state.total_requests >= self.max_requests:
+                reason = "max_requests"
+            elif self.max_rss and current_rss() > self.max_rss:
+                reason = "max_rss"
+            if reason:
+                self.recycle_requested_at = time.monotonic()
+                self.events.put(("recycle", self.slot, os.getpid(), reason))
+            elif memory_watchdog.level == LEVEL_HARD:
+                # مصرف کل کانتینر است و همه Workerها آن را می‌بینند؛ پردازه اصلی
+                # تصمیم می‌گیرد کدام Worker بازتولید شود، پس خروج خودکار نداریم
+                now = time.monotonic()
+                if now - self.memory_pressure_reported_at >= MEMORY_PRESSURE_REPORT_INTERVAL:
+                    self.memory_pressure_reported_at = now
+                    self.events.put(("recycle", self.slot, os.getpid(), MEMORY_PRESSURE))
+            return False
+
+    return RecyclingServer
+
+
+def run_worker(app: Any, slot: int, events, options: Dict[str, Any]) -> None:
+    """بدنه پردازه Worker (پس از fork)."""
+    import uvicorn
+
+    # بازگرداندن هندلرهای سیگنال پردازه اصلی؛ uvicorn هندلرهای خودش را نصب می‌کند
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, signal.SIG_DFL)
+
+    sock = bind_socket(options["host"], options["port"], options["backlog"])
+
+    jitter = options["max_requests_jitter"]
+    max_requests = options["max_requests"] + (random.randint(0, jitter) if jitter else 0)
+    config = uvicorn.Config(
+        app,
+        lifespan="on",
+        backlog=options["backlog"],
+        timeout_graceful_shutdown=options["graceful_timeout"],
+    )
+    server = _make_server_class()(
+        config,
+        slot=slot,
+        events=events,
+        max_requests=max_requests if options["max_requests"] else 0,
+        max_rss=options["max_rss"],
+    )
+    server.run(sockets=[sock])
+
+
+# ----------------------------------------------------------------------
+# پردازه اصلی (Supervisor)
+# ----------------------------------------------------------------------
+class Supervisor:
+    """
+    نگه‌داری تعداد ثابتی Worker: بازتولید Workerهای خارج‌شده، جایگزینی بدون
+    وقفه Workerهای در حال بازیافت و تخلیه همه Workerها هنگام SIGTERM/SIGINT.
+    """
+
+    def __init__(self, app: Any, workers: int, options: Dict[str, Any]):
+        self.app = app
+        self.count = workers
+        self.options = options
+        self.ctx = multiprocessing.get_context("fork")
+        self.events = self.ctx.Queue()
+        self.slots: List[Optional[multiprocessing.Process]] = [None] * workers
+        self.started_at: Dict[int, float] = {}
+        # Workerهایی که جایگزین‌شان در حال راه‌اندازی است: pid جایگزین -> Worker قدیمی
+        self.retiring: Dict[int, multiprocessing.Process] = {}
+        self.draining: List[multiprocessing.Process] = []
+        # جایگاه‌های خالی -> زمان (monotonic) مجاز برای بازتولید، پس از خروج‌های پیاپی سریع
+        self.respawn_at: Dict[int, float] = {}
+        # pid Workerی که به دلیل فشار حافظه در حال تخلیه است (یکی در هر زمان)
+        self.pressure_pid: Optional[int] = None
+        self.failures = 0
+        self.stopping = False
+
+    def spawn(self, slot: int) -> multiprocessing.Process:
+        process = self.ctx.Process(
+            target=run_worker,
+            args=(self.app, slot, self.events, self.options),
+            name=f"backend-worker-{slot}",
+            daemon=False,
+        )
+        process.start()
+        self.started_at[process.pid] = time.monotonic()
+        return process
+
+    def _handle_signal(self, signum, frame) -> None:
+        self.stopping = True
+
+    def run(self) -> int:
+        signal.signal(signal.SIGTERM, self._handle_signal)
+        signal.signal(signal.SIGINT, self._handle_signal)
+        for slot in range(self.count):
+            self.slots[slot] = self.spawn(slot)
+        logger.info("started %d workers on %s:%d", self.count, self.options["host"], self.options["port"])
+
+        while not self.stopping:
+            self._process_events(timeout=0.5)
+            self._reap()
+        return self.shutdown()
+
+    def _process_events(self, timeout: float) -> None:
+        try:
+            kind, slot, pid, reason = self.events.get(timeout=timeout)
+        except (queue.Empty, InterruptedError):
+            return
+        if kind == "recycle":
+            if reason == MEMORY_PRESSURE:
+                # تا پایان بازتولید قبلی صبر می‌کنیم، سپس پرمصرف‌ترین Worker را انتخاب می‌کنیم
+                if self.retiring or self.draining or self.pressure_pid is not None:
+                    return
+                slot = self._largest_worker()
+                if slot is None:
+                    return
+                # ساخت جایگزین پیش از خروج Worker بزرگ مصرف را بیشتر می‌کرد؛ Worker
+                # تخلیه می‌شود و _reap پس از خروج آن جایگاه را دوباره پر می‌کند
+                old = self.slots[slot]
+                logger.info("recycling worker %d (%s): draining before respawn", old.pid, reason)
+                self.pressure_pid = old.pid
+                old.terminate()
+                return
+            old = self.slots[slot]
+            if old is None or old.pid != pid:
+                return
+            logger.info("recycling worker %d (%s)", pid, reason)
+            replacement = self.spawn(slot)
+            self.slots[slot] = replacement
+            self.retiring[replacement.pid] = old
+        elif kind == "ready":
+            # جایگزین lifespan را اجرا کرده و روی پورت گوش می‌دهد؛ حالا Worker قدیمی می‌تواند تخلیه شود
+            old = self.retiring.pop(pid, None)
+            if old is not None and old.is_alive():
+                old.terminate()
+                self.draining.append(old)
+
+    def _largest_worker(self) -> Optional[int]:
+        """شماره جایگاه Worker زنده با بیشترین RSS."""
+        alive = [
+            (current_rss(process.pid), slot)
+            for slot, process in enumerate(self.slots)
+            if process is not None and process.is_alive()
+        ]
+        return max(alive)[1] if alive else None
+
+    def _reap(self) -> None:
+        self.draining = [p for p in self.draining if p.is_alive()]
+        now = time.monotonic()
+        for slot, process in enumerate(self.slots):
+            if process is None:
+                # جایگاه در انتظار پایان Backoff؛ حلقه اصلی مسدود نمی‌شود
+                if now >= self.respawn_at.get(slot, 0):
+                    self.respawn_at.pop(slot, None)
+                    self.slots[slot] = self.spawn(slot)
+                continue
+            if process.is_alive():
+                continue
+            process.join()
+            lifetime = now - self.started_at.pop(process.pid, now)
+            if process.pid == self.pressure_pid:
+                # خروج مورد انتظار پس از تخلیه به دلیل فشار حافظه
+                self.pressure_pid = None
+                self.slots[slot] = self.spawn(slot)
+                continue
+            # جلوگیری از حلقه fork سریع اگر Worker بلافاصله از کار بیفتد (مثلاً خطای ایمپورت)
+            self.failures = self.failures + 1 if lifetime < 5 else 0
+            logger.warning("worker %d exited with code %s, respawning", process.pid, process.exitcode)
+            old = self.retiring.pop(process.pid, None)
+            if old is not None and old.is_alive():
+                # جایگزین پیش از آماده شدن از کار افتاد؛ Worker قدیمی همچنان کار می‌کند
+                self.slots[slot] = old
+                continue
+            if self.failures:
+                self.slots[slot] = None
+                self.respawn_at[slot] = now + min(0.5 * 2 ** self.failures, 10)
+            else:
+                self.slots[slot] = self.spawn(slot)
+
+    def shutdown(self) -> int:
+        """ارسال SIGTERM به همه Workerها و انتظار برای تخلیه درخواست‌ها."""
+        processes = [p for p in self.slots + list(self.retiring.values()) + self.draining if p is not None]
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        deadline = time.monotonic() + self.options["graceful_timeout"] + 5
+        for process in processes:
+            process.join(max(deadline - time.monotonic(), 0))
+            if process.is_alive():
+                logger.warning("worker %d did not drain in time, killing", process.pid)
+                process.kill()
+                process.join()
+        return 0
+
+
+# ----------------------------------------------------------------------
+# نقطه ورود
+# ----------------------------------------------------------------------
+def main(argv: Optional[List[str]] = None) -> int:
+    from backend.core.config import settings
+    from backend.core.metrics import reset_directory
+
+    parser = argparse.ArgumentParser(description="Production multi-process server for backend")
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=settings.SERVER_WORKERS, help="0 = from cgroup limits")
+    parser.add_argument("--max-requests", type=int, default=settings.SERVER_MAX_REQUESTS)
+    parser.add_argument("--max-requests-jitter", type=int, default=settings.SERVER_MAX_REQUESTS_JITTER)
+    parser.add_argument("--max-rss-mb", type=int, default=settings.SERVER_MAX_RSS_MB)
+    parser.add_argument("--graceful-timeout", type=int, default=settings.SERVER_GRACEFUL_TIMEOUT)
+    parser.add_argument("--backlog", type=int, default=settings.SERVER_BACKLOG)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    workers = args.workers or default_workers(settings.SERVER_WORKER_MEMORY_MB)
+
+    max_rss = args.max_rss_mb * 1024 * 1024
+    memory = cgroup_memory_limit()
+    if not max_rss and memory:
+        # سهم هر Worker از محدودیت حافظه، با حاشیه برای پردازه اصلی
+        max_rss = int(memory * 0.9 / workers)
+
+    # متریک‌های Workerها از طریق فایل‌های یک پوشه مشترک جمع زده می‌شوند
+    if workers > 1 and settings.METRICS_ENABLED:
+        if not settings.METRICS_MULTIPROC_DIR:
+            settings.METRICS_MULTIPROC_DIR = tempfile.mkdtemp(prefix="backend-metrics-")
+        reset_directory(settings.METRICS_MULTIPROC_DIR)
+    if workers > 1 and settings.PROFILING_ENABLED and not settings.PROFILING_DIR:
+        settings.PROFILING_DIR = tempfile.mkdtemp(prefix="backend-profiles-")
+
+    # Preload: ساخت برنامه قبل از fork تا کد و داده‌های فقط‌خواندنی بین Workerها
+    # به اشتراک گذاشته شوند (copy-on-write). موتور دیتابیس در lifespan هر Worker ساخته می‌شود.
+    from backend.main import create_app
+
+    app = create_app()
+    options = {
+        "host": args.host,
+        "port": args.port,
+        "backlog": args.backlog,
+        "max_requests": args.max_requests,
+        "max_requests_jitter": args.max_requests_jitter,
+        "max_rss": max_rss,
+        "graceful_timeout": args.graceful_timeout,
+    }
+    return Supervisor(app, workers, options).run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,2 @@
+# مقادیر پیش‌فرض متغیرهای الزامی Settings (مانند بنچمارک‌ها)، پیش از ایمپورت backend
+from backend.benchmarks import bootstrap  # noqa: F401
@@ -0,0 +1,231 @@
+# آزمون مسیریابی بین ارائه‌دهنده‌های مدل با سرورهای جایگزین محلی (Stand-in).
+# زمان و تصمیم Probe با clock و rng تزریقی ProviderRouter کنترل می‌شوند تا
+# کنار گذاشتن، بازگشت و دو برابر شدن مدت کنار گذاشتن بدون انتظار واقعی آزموده شوند.
+
+import asyncio
+import contextlib
+from typing import AsyncIterator, Dict
+
+import pytest
+
+from backend.benchmarks.upstream_routing import StandInServer
+from backend.core.routing import ProviderRouter
+from backend.core.upstream import GeminiClient, HuggingFaceClient, LocalModelClient, UpstreamError
+
+EJECT_SECONDS = 30.0
+EJECT_AFTER = 3
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+class FakeRandom:
+    """rng ثابت: 0.0 یعنی همیشه Probe و 1.0 یعنی هرگز (در حضور ارائه‌دهنده سالم)."""
+
+    def __init__(self, value: float = 1.0) -> None:
+        self.value = value
+
+    def __call__(self) -> float:
+        return self.value
+
+
+@contextlib.asynccontextmanager
+async def stand_in_servers() -> AsyncIterator[Dict[str, StandInServer]]:
+    servers = {kind: StandInServer(kind) for kind in ("huggingface", "gemini", "local")}
+    for server in servers.values():
+        server.latency = 0.0
+        await server.start()
+    try:
+        yield servers
+    finally:
+        for server in servers.values():
+            await server.stop()
+
+
+def make_router(servers: Dict[str, StandInServer], clock: FakeClock, rng: FakeRandom, **options) -> ProviderRouter:
+    providers = [
+        HuggingFaceClient(f"{servers['huggingface'].url}/models/stand-in", None, 5.0, cost=1.0),
+        GeminiClient(servers["gemini"].url, "stand-in-key", "gemini-stand-in", 5.0, cost=2.0),
+        LocalModelClient(f"{servers['local'].url}/v1", "local-stand-in", 5.0, cost=0.0),
+    ]
+    config = dict(
+        alpha=0.2,
+        eject_after=EJECT_AFTER,
+        error_threshold=0.5,
+        eject_seconds=EJECT_SECONDS,
+        probe_ratio=0.05,
+        max_attempts=3,
+        default_policy="cheapest",
+        policies={},
+        clock=clock,
+        rng=rng,
+    )
+    config.update(options)
+    return ProviderRouter(providers, **config)
+
+
+def state(router: ProviderRouter, name: str) -> str:
+    return router.snapshot()["providers"][name]["state"]
+
+
+async def serve(router: ProviderRouter, requests: int, route: str = "/answer") -> Dict[str, int]:
+    """ارسال پیاپی درخواست‌ها؛ هر UpstreamError شکست آزمون است."""
+    served: Dict[str, int] = {}
+    for _ in range(requests):
+        provider, answer = await router.generate("stand-in prompt", route=route)
+        assert answer == f"answer from {provider.name}"
+        served[provider.name] = served.get(provider.name, 0) + 1
+    return served
+
+
+def test_failover_serves_every_request() -> None:
+    async def scenario() -> None:
+        async with stand_in_servers() as servers:
+            router = make_router(servers, FakeClock(), FakeRandom())
+            servers["local"].failing = True
+            try:
+                served = await serve(router, 20)
+            finally:
+                await router.aclose()
+            # ارزان‌ترین (local) خطا می‌دهد؛ همه درخواست‌ها با Failover به بعدی پاسخ می‌گیرند
+            assert served == {"huggingface": 20}
+            assert servers["local"].calls == EJECT_AFTER
+            assert servers["gemini"].calls == 0
+
+    asyncio.run(scenario())
+
+
+def test_ejects_after_consecutive_failures() -> None:
+    async def scenario() -> None:
+        async with stand_in_servers() as servers:
+            clock = FakeClock()
+            router = make_router(servers, clock, FakeRandom())
+            servers["local"].failing = True
+            try:
+                await serve(router, EJECT_AFTER - 1)
+                assert state(router, "local") == "healthy"
+                await serve(router, 1)
+                assert state(router, "local") == "ejected"
+                assert router.stats["local"].ejected_until == clock.now + EJECT_SECONDS
+
+                # در مدت کنار گذاشتن هیچ فراخوانی‌ای به local نمی‌رسد
+                await serve(router, 10)
+                assert servers["local"].calls == EJECT_AFTER
+            finally:
+                await router.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_probe_readmission_with_doubled_backoff() -> None:
+    async def scenario() -> None:
+        async with stand_in_servers() as servers:
+            clock = FakeClock()
+            rng = FakeRandom(1.0)
+            router = make_router(servers, clock, rng)
+            servers["local"].failing = True
+            try:
+                await serve(router, EJECT_AFTER)
+                clock.advance(EJECT_SECONDS)
+                assert state(router, "local") == "recovering"
+
+                # بدون انتخاب Probe، local فقط پس از ارائه‌دهنده‌های سالم و بدون علامت Probe می‌آید
+                assert router.plan("cheapest") == [("huggingface", False), ("gemini", False), ("local", False)]
+                calls = servers["local"].calls
+                await serve(router, 5)
+                assert servers["local"].calls == calls
+
+                # Probe ناموفق: کنار گذاشتن دوباره با مدت دو برابر
+                rng.value = 0.0
+                assert router.plan("cheapest")[0] == ("local", True)
+                assert await serve(router, 1) == {"huggingface": 1}
+                assert state(router, "local") == "ejected"
+                assert router.stats["local"].backoff == 2
+                assert router.stats["local"].ejected_until == clock.now + 2 * EJECT_SECONDS
+                clock.advance(EJECT_SECONDS)
+                assert state(router, "local") == "ejected"
+                clock.advance(EJECT_SECONDS)
+                assert state(router, "local") == "recovering"
+
+                # Probe موفق: بازگشت به مسیریابی و شروع دوباره مدت کنار گذاشتن
+                servers["local"].failing = False
+                assert await serve(router, 1) == {"local": 1}
+                assert state(router, "local") == "healthy"
+                assert router.stats["local"].backoff == 1
+                rng.value = 1.0
+                assert await serve(router, 5) == {"local": 5}
+            finally:
+                await router.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_only_the_chosen_recovering_provider_is_probed() -> None:
+    async def scenario() -> None:
+        async with stand_in_servers() as servers:
+            clock = FakeClock()
+            router = make_router(servers, clock, FakeRandom(0.0))
+            try:
+                for name in ("local", "gemini"):
+                    for _ in range(EJECT_AFTER):
+                        router.record(name, ok=False, latency=0.1)
+                    clock.advance(1.0)
+                clock.advance(EJECT_SECONDS)
+                # local زودتر کنار گذاشته شده و Probe می‌شود؛ gemini فقط جایگزین است
+                assert router.plan("cheapest") == [("local", True), ("huggingface", False), ("gemini", False)]
+            finally:
+                await router.aclose()
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize(
+    "route, served_by",
+    [("/answer", "local"), ("/answer/stream", "local"), ("/items", "gemini")],
+)
+def test_policy_ordering(route: str, served_by: str) -> None:
+    async def scenario() -> None:
+        async with stand_in_servers() as servers:
+            router = make_router(
+                servers, FakeClock(), FakeRandom(), default_policy="fastest", policies={"/answer": "cheapest"}
+            )
+            try:
+                for name, latency in (("huggingface", 0.3), ("gemini", 0.1), ("local", 0.2)):
+                    router.record(name, ok=True, latency=latency)
+                assert [name for name, _ in router.plan("fastest")] == ["gemini", "local", "huggingface"]
+                assert [name for name, _ in router.plan("cheapest")] == ["local", "huggingface", "gemini"]
+                # زمان پاسخ پایین ولی نرخ خطای بالا، زمان مورد انتظار را بالا می‌برد
+                router.stats["gemini"].error_rate = 0.8
+                assert [name for name, _ in router.plan("fastest")][0] == "local"
+                router.stats["gemini"].error_rate = 0.0
+
+                assert await serve(router, 3, route=route) == {served_by: 3}
+            finally:
+                await router.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_all_providers_down_raises_last_error() -> None:
+    async def scenario() -> None:
+        async with stand_in_servers() as servers:
+            router = make_router(servers, FakeClock(), FakeRandom())
+            for server in servers.values():
+                server.failing = True
+            try:
+                with pytest.raises(UpstreamError) as info:
+                    await router.generate("stand-in prompt", route="/answer")
+            finally:
+                await router.aclose()
+            assert info.value.reason == "http_503"
+            assert all(server.calls == 1 for server in servers.values())
+
+    asyncio.run(scenario())